@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0002_article_featured_image_url_article_reading_time_and_more'),
+        ('projects', '0003_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['status', '-is_featured', '-published_date'], name='article_listing_idx'),
+        ),
+    ]
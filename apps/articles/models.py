@@ -109,6 +109,9 @@ class Article(models.Model):
         verbose_name = _("Article")
         verbose_name_plural = _("Articles")
         ordering = ['-is_featured', '-published_date']
+        indexes = [
+            models.Index(fields=['status', '-is_featured', '-published_date'], name='article_listing_idx'),
+        ]
     
     def __str__(self):
         return self.title
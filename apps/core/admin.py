@@ -6,9 +6,11 @@ Site settings, team, testimonials, partners, and contact messages.
 from django.contrib import admin
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
+from .exports import ExportMixin, stream_csv
 from .models import (
     SiteSettings, TeamMember, Testimonial, Partner, 
-    ImpactStat, FAQ, ContactMessage, Newsletter, Event, GalleryImage
+    ImpactStat, FAQ, ContactMessage, Newsletter, Event, GalleryImage, OutboundEmail,
+    NewsletterCampaign
 )
 
 
@@ -115,7 +117,7 @@ class FAQAdmin(admin.ModelAdmin):
 
 
 @admin.register(ContactMessage)
-class ContactMessageAdmin(admin.ModelAdmin):
+class ContactMessageAdmin(ExportMixin, admin.ModelAdmin):
     list_display = ['name', 'email', 'subject', 'is_read', 'is_replied', 'created_at']
     list_filter = ['is_read', 'is_replied', 'created_at']
     list_editable = ['is_read', 'is_replied']
@@ -123,24 +125,86 @@ class ContactMessageAdmin(admin.ModelAdmin):
     date_hierarchy = 'created_at'
     readonly_fields = ['name', 'email', 'phone', 'subject', 'message', 'ip_address', 'created_at']
     
+    export_columns = ['created_at', 'name', 'email', 'phone', 'subject', 'message',
+                      'is_read', 'is_replied']
+    actions = ['export_csv', 'export_xlsx']
+    
     def has_add_permission(self, request):
         return False
 
 
 @admin.register(Newsletter)
-class NewsletterAdmin(admin.ModelAdmin):
+class NewsletterAdmin(ExportMixin, admin.ModelAdmin):
     list_display = ['email', 'name', 'language', 'is_active', 'subscribed_at']
     list_filter = ['is_active', 'language', 'subscribed_at']
     list_editable = ['is_active']
     search_fields = ['email', 'name']
     date_hierarchy = 'subscribed_at'
     
-    actions = ['export_emails']
+    export_columns = ['email', 'name', 'language', 'is_active', 'subscribed_at', 'unsubscribed_at']
+    actions = ['export_emails', 'export_csv', 'export_xlsx', 'unsubscribe']
     
     @admin.action(description=_("Exporter les emails"))
     def export_emails(self, request, queryset):
-        # TODO: Implement email export
-        self.message_user(request, _("Fonctionnalité à implémenter"))
+        return stream_csv(queryset.order_by('pk'), ['email', 'name', 'language'])
+    
+    @admin.action(description=_("Désinscrire"))
+    def unsubscribe(self, request, queryset):
+        from django.utils import timezone
+        count = queryset.filter(is_active=True).update(is_active=False, unsubscribed_at=timezone.now())
+        self.message_user(request, _("%(count)s abonnés désinscrits.") % {'count': count})
+
+
+@admin.register(NewsletterCampaign)
+class NewsletterCampaignAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'status', 'sent_count', 'created_at', 'finished_at']
+    list_filter = ['status']
+    search_fields = ['subject', 'body']
+    readonly_fields = ['status', 'translations', 'progress', 'sent_count', 'started_at', 'finished_at']
+    
+    actions = ['send_campaign', 'pause_campaign']
+    
+    @admin.action(description=_("Envoyer / reprendre la campagne"))
+    def send_campaign(self, request, queryset):
+        from .newsletter_service import send_campaign
+        
+        # send_campaign() claims each one: campaigns already sending are skipped.
+        # It only queues the messages; send_queued_email delivers them.
+        queued = 0
+        for campaign in queryset.filter(
+            status__in=[NewsletterCampaign.Status.DRAFT, NewsletterCampaign.Status.PAUSED]
+        ):
+            queued += send_campaign(campaign)['queued']
+        self.message_user(request, _("%(count)s emails de campagne mis en file d'envoi.") % {
+            'count': queued
+        })
+    
+    @admin.action(description=_("Mettre en pause"))
+    def pause_campaign(self, request, queryset):
+        count = queryset.filter(status=NewsletterCampaign.Status.SENDING).update(
+            status=NewsletterCampaign.Status.PAUSED
+        )
+        self.message_user(request, _("%(count)s campagnes mises en pause.") % {'count': count})
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ['to_email', 'subject', 'category', 'status', 'attempts', 'created_at', 'sent_at']
+    list_filter = ['status', 'category', 'created_at']
+    search_fields = ['to_email', 'subject']
+    date_hierarchy = 'created_at'
+    readonly_fields = ['attempts', 'last_error', 'created_at', 'sent_at']
+    
+    actions = ['retry_now']
+    
+    @admin.action(description=_("Réessayer maintenant"))
+    def retry_now(self, request, queryset):
+        from django.utils import timezone
+        count = queryset.exclude(status=OutboundEmail.Status.SENT).update(
+            status=OutboundEmail.Status.PENDING,
+            next_attempt_at=timezone.now(),
+        )
+        self.message_user(request, _("%(count)s emails remis en file d'attente.") % {'count': count})
 
 
 @admin.register(Event)
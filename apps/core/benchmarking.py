@@ -0,0 +1,266 @@
+"""
+View Benchmarks
+Drives the public views through the test client and measures, per view and
+language: SQL queries (cold cache and warm), SQL time, template render
+time, total time, peak Python memory and N+1 query patterns
+(apps/core/nplusone.py).
+
+Results are compared with a committed baseline (benchmarks/views_baseline.json).
+Query counts are budgets: a view that runs more queries, or more N+1
+patterns, than its baseline fails. Timings are noisy and only reported, unless a time tolerance is
+enforced.
+
+Run with `python manage.py benchmark_views` (see the command for options).
+"""
+
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.template.backends.django import Template as BackendTemplate
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import translation
+
+from . import db_router, nplusone
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'views_baseline.json'
+
+# (url name, kind of object the URL needs, URL kwarg)
+VIEWS = [
+    ('core:home', None, None),
+    ('core:about', None, None),
+    ('core:contact', None, None),
+    ('core:events', None, None),
+    ('core:gallery', None, None),
+    ('projects:list', None, None),
+    ('projects:detail', 'project', 'slug'),
+    ('articles:list', None, None),
+    ('articles:detail', 'article', 'slug'),
+    ('donations:donate', None, None),
+    ('donations:donate_to_project', 'project', 'project_slug'),
+]
+
+
+class QueryRecorder:
+    """connection.execute_wrapper that counts and times queries"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+
+class RenderTimer:
+    """Times Django template rendering (queries run by the template included)"""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self._depth = 0
+
+    @contextmanager
+    def installed(self):
+        original = BackendTemplate.render
+        timer = self
+
+        def render(template, context=None, request=None):
+            timer._depth += 1
+            start = time.perf_counter()
+            try:
+                return original(template, context, request)
+            finally:
+                timer._depth -= 1
+                if not timer._depth:
+                    timer.seconds += time.perf_counter() - start
+
+        BackendTemplate.render = render
+        try:
+            yield self
+        finally:
+            BackendTemplate.render = original
+
+
+@contextmanager
+def seeded_database(seed_command: str = 'populate_sample_data', scale: float = None,
+                    current_db: bool = False, log=None):
+    """
+    Run the block against a fresh test database seeded with `seed_command`
+    (and generate_load_data at `scale`), destroyed afterwards. Replicas read
+    the test database too (their TEST MIRROR), as in Django's test runner.
+    With `current_db`, the configured databases are used as is.
+    """
+    log = log or (lambda message: None)
+    setup_test_environment()
+    old_name = None
+    replicas = {}
+    try:
+        if not current_db:
+            old_name = connection.settings_dict['NAME']
+            connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            for alias in db_router.replica_aliases():
+                replicas[alias] = connections[alias].settings_dict
+                connections[alias].close()
+                connections[alias].creation.set_as_test_mirror(connection.settings_dict)
+            random.seed(0)
+            log(f'Seeding with {seed_command}...')
+            call_command(seed_command, stdout=StringIO())
+            if scale:
+                log(f'Generating load data at scale {scale}...')
+                call_command('generate_load_data', scale=scale, stdout=StringIO())
+        yield
+    finally:
+        for alias, settings_dict in replicas.items():
+            connections[alias].close()
+            connections[alias].settings_dict = settings_dict
+        if old_name is not None:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def view_objects() -> dict:
+    """Slugs of the objects detail views are benchmarked with"""
+    from apps.articles.models import Article
+    from apps.projects.models import Project
+
+    return {
+        'project': Project.objects.filter(status='active').order_by('pk').values_list('slug', flat=True).first(),
+        'article': Article.objects.filter(status='published').order_by('pk').values_list('slug', flat=True).first(),
+    }
+
+
+def view_urls(languages=None, names=None):
+    """[(key, url)] for every benchmarked view and language; key is 'name@lang'"""
+    objects = view_objects()
+    languages = languages or [code for code, _ in settings.LANGUAGES]
+    urls = []
+    for name, kind, kwarg in VIEWS:
+        if names and name not in names:
+            continue
+        kwargs = {}
+        if kind:
+            if not objects[kind]:
+                continue
+            kwargs[kwarg] = objects[kind]
+        for language in languages:
+            with translation.override(language):
+                urls.append((f'{name}@{language}', reverse(name, kwargs=kwargs)))
+    return urls
+
+
+def _request(client, url):
+    recorder, timer = QueryRecorder(), RenderTimer()
+    start = time.perf_counter()
+    with db_router.execute_wrapper(recorder), timer.installed():
+        response = client.get(url)
+    total = time.perf_counter() - start
+    if response.status_code != 200:
+        raise RuntimeError(f'{url} returned {response.status_code}')
+    return recorder, timer.seconds, total
+
+
+def measure(client, url, repeat: int = 5) -> dict:
+    """
+    Measure one URL: a cold request (cache cleared) for the query count and
+    N+1 patterns, then `repeat` warm requests for timings (medians), then one
+    traced request for peak memory.
+    """
+    cache.clear()
+    with nplusone.detect() as detector:
+        cold, _, _ = _request(client, url)
+    findings = detector.findings()
+
+    runs = [_request(client, url) for _ in range(max(repeat, 1))]
+    warm = runs[-1][0]
+
+    tracemalloc.start()
+    try:
+        _request(client, url)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'queries': cold.count,
+        'warm_queries': warm.count,
+        'sql_ms': round(statistics.median(r.seconds for r, _, _ in runs) * 1000, 2),
+        'render_ms': round(statistics.median(render for _, render, _ in runs) * 1000, 2),
+        'total_ms': round(statistics.median(total for _, _, total in runs) * 1000, 2),
+        'peak_kb': round(peak / 1024),
+        'n_plus_one': len(findings),
+        'findings': [str(finding) for finding in findings],
+    }
+
+
+def run_benchmarks(languages=None, names=None, repeat: int = 5, progress=None) -> dict:
+    """Measure every view; returns {'name@lang': metrics}"""
+    client = Client()
+    results = {}
+    for key, url in view_urls(languages, names):
+        results[key] = measure(client, url, repeat)
+        if progress:
+            progress(key, url, results[key])
+    return results
+
+
+def load_baseline(path=DEFAULT_BASELINE) -> dict:
+    path = Path(path)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text()).get('views', {})
+
+
+def save_baseline(results: dict, path=DEFAULT_BASELINE):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {
+        'note': 'Generated by `python manage.py benchmark_views --update-baseline`. '
+                'Query counts are budgets; timings are informative.',
+        'views': {key: {field: value for field, value in metrics.items() if field != 'findings'}
+                  for key, metrics in sorted(results.items())},
+    }
+    path.write_text(json.dumps(data, indent=2) + '\n')
+
+
+def compare(results: dict, baseline: dict, query_slack: int = 0, time_tolerance: float = None) -> list:
+    """
+    Check results against the baseline.
+
+    Args:
+        query_slack: Extra queries allowed over the baseline counts
+        time_tolerance: If set, fail views whose total time exceeds the
+                        baseline by more than this fraction (0.5 = +50%)
+
+    Returns:
+        [(key, message)] for every failing view
+    """
+    failures = []
+    for key, metrics in sorted(results.items()):
+        expected = baseline.get(key)
+        if expected is None:
+            continue
+        for field in ('queries', 'warm_queries'):
+            if metrics[field] > expected[field] + query_slack:
+                failures.append((key, f'{field} {metrics[field]} > budget {expected[field] + query_slack}'))
+        if metrics['n_plus_one'] > expected.get('n_plus_one', 0):
+            failures.extend((key, f'N+1 {finding}') for finding in metrics['findings'])
+        if time_tolerance is not None and metrics['total_ms'] > expected['total_ms'] * (1 + time_tolerance):
+            failures.append((key, f"total {metrics['total_ms']}ms > {expected['total_ms']}ms "
+                                  f"+{time_tolerance:.0%}"))
+    return failures
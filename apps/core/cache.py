@@ -0,0 +1,230 @@
+"""
+Two-Tier Cache
+Cache backend keeping a bounded, short-lived copy of hot keys in process
+memory in front of the cache shared by all workers (file, database, Redis
+or Memcached).
+
+Only keys starting with one of LOCAL_PREFIXES are copied into the local
+tier, each prefix with its own local TTL; everything else (rate limits,
+webhook dedup, progress snapshots) goes straight to the shared backend.
+
+A delete only evicts the local copy of the process that made it, so keys
+served locally should be immutable: content-addressed (translations) or
+versioned. Versioned keys embed a namespace version stored in the shared
+cache; bumping it invalidates the whole namespace everywhere once the
+other workers re-read the version (its local TTL is short). Versions are
+random tokens rather than counters: a version evicted from the shared cache
+is replaced by a new token, never by one that older entries were stored under:
+
+    key = versioned_key('site_settings', 'instance')
+    ...
+    bump_version('site_settings')
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'apps.core.cache.TwoTierCache',
+            'OPTIONS': {
+                'SHARED': 'shared',                   # alias of the shared cache
+                'LOCAL_MAX_ENTRIES': 2000,
+                'LOCAL_PREFIXES': {'translation:': 300, 'version:': 2},
+            },
+        },
+        'shared': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', ...},
+    }
+"""
+
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+_MISSING = object()
+
+
+class LocalLRU:
+    """Thread-safe LRU of pickled values with per-entry expiry"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data = OrderedDict()  # key -> (expires monotonic, pickled value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            if entry[0] <= time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+        return pickle.loads(entry[1])
+
+    def set(self, key, value, ttl: float):
+        entry = (time.monotonic() + ttl, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class TwoTierCache(BaseCache):
+    """Process-local LRU for selected key prefixes, in front of a shared cache"""
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = options.get('SHARED', location or 'shared')
+        # Longest prefix first, so 'version:' style prefixes can be nested
+        self._prefixes = sorted(options.get('LOCAL_PREFIXES', {}).items(), key=lambda item: -len(item[0]))
+        self._local = LocalLRU(int(options.get('LOCAL_MAX_ENTRIES', 2000)))
+
+    @property
+    def shared(self) -> BaseCache:
+        return caches[self._shared_alias]
+
+    def _local_ttl(self, key: str, timeout=DEFAULT_TIMEOUT):
+        """Seconds `key` may live in the local tier (0 = not locally cached)"""
+        for prefix, ttl in self._prefixes:
+            if key.startswith(prefix):
+                if timeout is not DEFAULT_TIMEOUT and timeout is not None:
+                    return min(ttl, timeout)
+                return ttl
+        return 0
+
+    def _local_key(self, key, version):
+        return self.make_and_validate_key(key, version)
+
+    def get(self, key, default=None, version=None):
+        ttl = self._local_ttl(key)
+        if ttl:
+            value = self._local.get(self._local_key(key, version))
+            if value is not _MISSING:
+                return value
+        value = self.shared.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            return default
+        if ttl:
+            self._local.set(self._local_key(key, version), value, ttl)
+        return value
+
+    def get_many(self, keys, version=None):
+        found, remote = {}, []
+        for key in keys:
+            value = _MISSING
+            if self._local_ttl(key):
+                value = self._local.get(self._local_key(key, version))
+            if value is _MISSING:
+                remote.append(key)
+            else:
+                found[key] = value
+        if remote:
+            fetched = self.shared.get_many(remote, version=version)
+            for key, value in fetched.items():
+                ttl = self._local_ttl(key)
+                if ttl:
+                    self._local.set(self._local_key(key, version), value, ttl)
+            found.update(fetched)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        ttl = self._local_ttl(key, timeout)
+        if ttl > 0:
+            self._local.set(self._local_key(key, version), value, ttl)
+        else:
+            self._local.delete(self._local_key(key, version))
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        for key, value in data.items():
+            ttl = self._local_ttl(key, timeout)
+            if ttl > 0 and key not in failed:
+                self._local.set(self._local_key(key, version), value, ttl)
+            else:
+                self._local.delete(self._local_key(key, version))
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        self._local.delete(self._local_key(key, version))
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self._local.delete(self._local_key(key, version))
+        return self.shared.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        for key in keys:
+            self._local.delete(self._local_key(key, version))
+        self.shared.delete_many(keys, version=version)
+
+    def has_key(self, key, version=None):
+        return self.get(key, _MISSING, version=version) is not _MISSING
+
+    def incr(self, key, delta=1, version=None):
+        self._local.delete(self._local_key(key, version))
+        return self.shared.incr(key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        self._local.delete(self._local_key(key, version))
+        return self.shared.decr(key, delta, version=version)
+
+    def clear(self):
+        self._local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+
+# -----------------------------------------------------------------------------
+# Versioned namespaces
+
+def _version_key(namespace: str) -> str:
+    return f'version:{namespace}'
+
+
+def _new_version() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def get_version(namespace: str) -> str:
+    from django.core.cache import cache
+
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        # First use, or evicted: start a fresh token (a concurrent worker may win the add)
+        version = _new_version()
+        if not cache.add(_version_key(namespace), version, None):
+            version = cache.get(_version_key(namespace)) or version
+    return version
+
+
+def versioned_key(namespace: str, *parts) -> str:
+    """'<namespace>:<version>:<parts...>'; stale after bump_version(namespace)"""
+    return ':'.join([namespace, str(get_version(namespace)), *map(str, parts)])
+
+
+def bump_version(namespace: str):
+    """Invalidate every key of a namespace, in every worker"""
+    from django.core.cache import cache
+
+    cache.set(_version_key(namespace), _new_version(), None)
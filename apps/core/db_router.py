@@ -0,0 +1,99 @@
+"""
+Read Replica Router
+Sends reads to the replica databases (DATABASE_REPLICA_URLS) and writes to
+the primary ('default').
+
+Reads stay on the primary:
+- inside a transaction on the primary;
+- for the rest of a request (or command) once it has written, and for
+  REPLICA_STICKY_SECONDS afterwards: the next requests of the same browser
+  are pinned by a cookie (ReplicaPinMiddleware), so a donor redirected
+  after a donation or a contact form reads their own writes;
+- for the whole of unsafe requests (POST, webhooks) and the admin.
+
+Two local SQLite files are enough to try it: point DATABASE_REPLICA_URLS at
+a second file and copy the primary into it with `manage.py sync_replica`.
+
+Instrumentation that watches queries (profiling, N+1 detection, benchmarks)
+installs its hook with execute_wrapper() below, on every connection, so
+reads served by a replica are counted too.
+"""
+
+import random
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+PRIMARY = 'default'
+
+# Monotonic time until which reads go to the primary in this context
+_pinned_until = ContextVar('replica_pinned_until', default=0.0)
+# Whether this context wrote since reset_pin()
+_wrote = ContextVar('replica_wrote', default=False)
+
+
+def replica_aliases() -> list:
+    return [alias for alias in settings.DATABASES if alias != PRIMARY]
+
+
+def sticky_seconds() -> float:
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+
+
+def pin_primary(seconds: float = None):
+    """Read from the primary in this context for `seconds` (default REPLICA_STICKY_SECONDS)"""
+    seconds = sticky_seconds() if seconds is None else seconds
+    _pinned_until.set(max(_pinned_until.get(), time.monotonic() + seconds))
+
+
+def reset_pin(seconds: float = 0):
+    """Start a request: pinned for `seconds` (left over from the cookie) or not at all"""
+    _pinned_until.set(time.monotonic() + seconds if seconds > 0 else 0.0)
+    _wrote.set(False)
+
+
+def has_written() -> bool:
+    """Whether anything was written since reset_pin()"""
+    return _wrote.get()
+
+
+def is_pinned() -> bool:
+    return _pinned_until.get() > time.monotonic()
+
+
+@contextmanager
+def execute_wrapper(wrapper):
+    """connection.execute_wrapper(wrapper) on the primary and every replica for the block"""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        yield
+
+
+class ReplicaRouter:
+    """DATABASE_ROUTERS entry; a no-op when no replica is configured"""
+
+    def __init__(self):
+        self.replicas = replica_aliases()
+
+    def db_for_read(self, model, **hints):
+        if not self.replicas or is_pinned() or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        return random.choice(self.replicas)
+
+    def db_for_write(self, model, **hints):
+        if self.replicas:
+            pin_primary()
+            _wrote.set(True)
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are populated by replication, never migrated
+        return db == PRIMARY
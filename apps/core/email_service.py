@@ -0,0 +1,308 @@
+"""
+Email Service
+Outbox-based email delivery.
+
+Views and signals call `enqueue_email` (a single INSERT), so request latency
+never includes SMTP time. `deliver_pending` - run by
+`python manage.py send_queued_email` - claims due messages in batches, sends
+them over one reused SMTP connection, throttles to EMAIL_RATE_PER_SECOND and
+retries failures with exponential backoff. When the mail server cannot be
+reached, the claimed messages are handed back untouched (their attempts are
+not the messages' fault) and the worker backs off.
+
+To test against a local SMTP sink, run one on port 1025 (for example
+`python -m aiosmtpd -n -l localhost:1025`) and start the worker with
+EMAIL_HOST=localhost EMAIL_PORT=1025 EMAIL_USE_TLS=False.
+"""
+
+import logging
+import smtplib
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import Case, F, Q, Value, When
+from django.template.loader import render_to_string
+from django.utils import timezone, translation
+
+logger = logging.getLogger(__name__)
+
+# A claimed batch is reclaimable after this long (worker crashed mid-batch)
+CLAIM_LEASE = timedelta(minutes=10)
+
+
+class MailServerUnavailable(Exception):
+    """The SMTP connection could not be opened"""
+
+
+class Throttle:
+    """
+    Simple rate limiter for outgoing messages.
+    `wait()` blocks just long enough to keep under `rate` calls per second.
+    """
+
+    def __init__(self, rate: float = None):
+        self.rate = rate if rate is not None else getattr(settings, 'EMAIL_RATE_PER_SECOND', 0)
+        self._interval = 1.0 / self.rate if self.rate else 0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self._interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self._interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _build(to_email, subject, body_text, body_html='', category='other',
+           attachments=None, from_email='', reply_to='', headers=None):
+    from apps.core.models import OutboundEmail
+
+    return OutboundEmail(
+        to_email=to_email,
+        from_email=from_email or '',
+        reply_to=reply_to or '',
+        subject=str(subject)[:255],
+        body_text=body_text,
+        body_html=body_html,
+        attachments=list(attachments or []),
+        category=category,
+        headers=dict(headers or {}),
+    )
+
+
+def enqueue_email(to_email: str, subject: str, body_text: str, body_html: str = '',
+                  category: str = 'other', attachments: list = None,
+                  from_email: str = '', reply_to: str = '', headers: dict = None):
+    """
+    Queue an email for background delivery.
+
+    Args:
+        to_email: Recipient address
+        subject: Subject line
+        body_text: Plain text body
+        body_html: Optional HTML alternative
+        category: OutboundEmail.Category value
+        attachments: Paths of files in media storage to attach
+        from_email: Sender (default: settings.DEFAULT_FROM_EMAIL)
+        reply_to: Optional Reply-To address
+        headers: Extra headers (e.g. List-Unsubscribe)
+
+    Returns:
+        The OutboundEmail row
+    """
+    email = _build(to_email, subject, body_text, body_html, category,
+                   attachments, from_email, reply_to, headers)
+    email.save()
+    return email
+
+
+def enqueue_template(to_email: str, subject: str, template_name: str, context: dict = None,
+                     language: str = None, **kwargs):
+    """
+    Render `emails/<template_name>.txt` (and `.html` if it exists) and queue it.
+    The template is rendered in `language` when given.
+    """
+    with translation.override(language or translation.get_language()):
+        body_text = render_to_string(f'emails/{template_name}.txt', context or {})
+        subject = str(subject)
+    return enqueue_email(to_email, subject, body_text, **kwargs)
+
+
+def enqueue_many(messages: list) -> int:
+    """
+    Queue several emails with one bulk INSERT.
+
+    Args:
+        messages: list of dicts accepted by `enqueue_email`
+
+    Returns:
+        Number of queued emails
+    """
+    from apps.core.models import OutboundEmail
+
+    rows = [_build(**message) for message in messages]
+    OutboundEmail.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def _claim_batch(batch_size: int):
+    """Atomically claim up to `batch_size` due messages for this worker"""
+    from apps.core.models import OutboundEmail
+
+    now = timezone.now()
+    due = (
+        Q(status=OutboundEmail.Status.PENDING, next_attempt_at__lte=now) |
+        Q(status=OutboundEmail.Status.SENDING, next_attempt_at__lte=now)  # expired lease
+    )
+    # Transactional mail goes before campaign mail queued earlier
+    bulk_last = Case(When(category=OutboundEmail.Category.NEWSLETTER, then=Value(1)), default=Value(0))
+    ids = list(OutboundEmail.objects.filter(due)
+               .order_by(bulk_last, 'next_attempt_at')
+               .values_list('pk', flat=True)[:batch_size])
+    if not ids:
+        return []
+
+    lease_until = now + CLAIM_LEASE
+    # Only rows still unclaimed are taken; a concurrent worker gets the rest
+    OutboundEmail.objects.filter(due, pk__in=ids).update(
+        status=OutboundEmail.Status.SENDING,
+        next_attempt_at=lease_until,
+    )
+    return list(OutboundEmail.objects.filter(
+        pk__in=ids,
+        status=OutboundEmail.Status.SENDING,
+        next_attempt_at=lease_until,
+    ))
+
+
+def _to_message(email, connection):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body_text,
+        from_email=email.from_email or settings.DEFAULT_FROM_EMAIL,
+        to=[email.to_email],
+        reply_to=[email.reply_to] if email.reply_to else None,
+        headers=email.headers or None,
+        connection=connection,
+    )
+    if email.body_html:
+        message.attach_alternative(email.body_html, 'text/html')
+    for path in email.attachments:
+        with default_storage.open(path, 'rb') as f:
+            message.attach(path.rsplit('/', 1)[-1], f.read())
+    return message
+
+
+def _open(connection):
+    try:
+        connection.open()
+    except OSError as e:  # socket errors and smtplib.SMTPException
+        raise MailServerUnavailable(str(e)) from e
+
+
+def _release(emails, error):
+    """Hand claimed messages back for a later batch, without counting an attempt"""
+    from apps.core.models import OutboundEmail
+
+    OutboundEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+        status=OutboundEmail.Status.PENDING,
+        next_attempt_at=timezone.now() + timedelta(seconds=getattr(settings, 'EMAIL_RETRY_BASE_DELAY', 60)),
+        last_error=str(error)[:2000],
+    )
+
+
+def _fail(email, error):
+    """Give up on a message at once (the recipient was refused)"""
+    from apps.core.models import OutboundEmail
+
+    email.attempts += 1
+    email.last_error = str(error)[:2000]
+    email.status = OutboundEmail.Status.FAILED
+    email.save(update_fields=['attempts', 'last_error', 'status'])
+
+
+def _schedule_retry(email, error):
+    from apps.core.models import OutboundEmail
+
+    max_attempts = getattr(settings, 'EMAIL_MAX_ATTEMPTS', 5)
+    base_delay = getattr(settings, 'EMAIL_RETRY_BASE_DELAY', 60)
+
+    email.attempts += 1
+    email.last_error = str(error)[:2000]
+    if email.attempts >= max_attempts:
+        email.status = OutboundEmail.Status.FAILED
+    else:
+        email.status = OutboundEmail.Status.PENDING
+        email.next_attempt_at = timezone.now() + timedelta(
+            seconds=base_delay * (2 ** (email.attempts - 1))
+        )
+    email.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+    return email.status == OutboundEmail.Status.FAILED
+
+
+def deliver_pending(batch_size: int = None, rate: float = None, connection=None,
+                    throttle: Throttle = None) -> dict:
+    """
+    Deliver one batch of due messages over a single connection.
+
+    Args:
+        batch_size: Messages per batch (default: settings.EMAIL_OUTBOX_BATCH_SIZE)
+        rate: Max messages per second (default: settings.EMAIL_RATE_PER_SECOND)
+        connection: Optional email backend connection to reuse
+        throttle: Optional Throttle shared across batches
+
+    Returns:
+        dict with sent / retried / failed counts, and deferred: messages
+        handed back because the mail server could not be reached
+    """
+    from apps.core.models import OutboundEmail
+    from apps.core.newsletter_service import unsubscribe
+
+    batch_size = batch_size or getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 100)
+    stats = {'sent': 0, 'retried': 0, 'failed': 0, 'deferred': 0}
+
+    batch = _claim_batch(batch_size)
+    if not batch:
+        return stats
+
+    throttle = throttle or Throttle(rate)
+    connection = connection or get_connection()
+    sent_ids = []
+    bounced = []
+
+    index = 0
+    try:
+        _open(connection)
+        for index, email in enumerate(batch):
+            throttle.wait()
+            try:
+                message = _to_message(email, connection)
+                try:
+                    message.send()
+                except smtplib.SMTPServerDisconnected:
+                    # Provider dropped the connection: reopen once and retry
+                    connection.close()
+                    _open(connection)
+                    message.send()
+                sent_ids.append(email.pk)
+            except MailServerUnavailable:
+                raise
+            except smtplib.SMTPRecipientsRefused as e:
+                # Hard bounce: no retry, and newsletter addresses are opted out
+                logger.warning("Email %s to %s refused: %s", email.pk, email.to_email, e)
+                _fail(email, e)
+                stats['failed'] += 1
+                if email.category == OutboundEmail.Category.NEWSLETTER:
+                    bounced.append(email.to_email)
+            except Exception as e:
+                logger.warning("Email %s to %s failed: %s", email.pk, email.to_email, e)
+                if _schedule_retry(email, e):
+                    stats['failed'] += 1
+                else:
+                    stats['retried'] += 1
+    except MailServerUnavailable as e:
+        # Nothing after `index` was attempted: hand it back for a later batch
+        logger.warning("Mail server unavailable, %s emails deferred: %s", len(batch) - index, e)
+        _release(batch[index:], e)
+        stats['deferred'] = len(batch) - index
+    finally:
+        connection.close()
+        if sent_ids:
+            OutboundEmail.objects.filter(pk__in=sent_ids).update(
+                status=OutboundEmail.Status.SENT,
+                sent_at=timezone.now(),
+                attempts=F('attempts') + 1,
+                last_error='',
+            )
+        if bounced:
+            unsubscribe(bounced)
+    stats['sent'] = len(sent_ids)
+    return stats
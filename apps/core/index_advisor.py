@@ -0,0 +1,175 @@
+"""
+Index Advisor
+Runs EXPLAIN on the queries of every benchmarked view (apps/core/benchmarking.py)
+and reports the ones that read a large table sequentially, or sort it
+without an index.
+
+Each distinct query shape is explained once, with the parameters of its
+first execution. Only tables with at least `min_rows` rows are reported: a
+sequential scan of the site settings row is fine, one of the donations
+table is not.
+
+SQLite (EXPLAIN QUERY PLAN) and PostgreSQL (EXPLAIN (FORMAT JSON)) are
+supported. Run with `python manage.py advise_indexes` (see the command for
+options).
+"""
+
+import json
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+
+from . import db_router
+from .benchmarking import view_urls
+from .nplusone import normalize_sql
+
+SCAN = 'seq scan'
+SORT = 'sort'
+
+# "table" alias / "table" AS "alias" after FROM or JOIN
+_TABLE = re.compile(r'(?:FROM|JOIN)\s+"(\w+)"(?:\s+(?:AS\s+)?"?(?!(?:WHERE|INNER|LEFT|ORDER|GROUP|LIMIT|ON)\b)(\w+)"?)?',
+                    re.IGNORECASE)
+_COLUMN = re.compile(r'"?(\w+)"?\."(\w+)"')
+
+
+class QueryCapture:
+    """connection.execute_wrapper keeping the first SQL and params of every SELECT shape"""
+
+    def __init__(self):
+        self.queries = {}  # shape -> (sql, params, {view keys})
+        self.view = ''
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip()[:6].upper() == 'SELECT':
+            shape = normalize_sql(sql)
+            entry = self.queries.setdefault(shape, (sql, params, set()))
+            entry[2].add(self.view)
+        return execute(sql, params, many, context)
+
+
+class Problem:
+    def __init__(self, kind: str, table: str, rows: int, detail: str, sql: str, views, columns):
+        self.kind = kind
+        self.table = table
+        self.rows = rows
+        self.detail = detail
+        self.sql = sql
+        self.views = sorted(views)
+        self.columns = columns
+
+    def __str__(self):
+        hint = f" on ({', '.join(self.columns)})" if self.columns else ''
+        return f'{self.kind} of {self.table} ({self.rows} rows){hint}: {self.detail}'
+
+
+def _tables(sql: str) -> dict:
+    """{alias or table name: table name} of the tables a query reads"""
+    tables = {}
+    for table, alias in _TABLE.findall(sql):
+        tables[table] = table
+        if alias:
+            tables[alias] = table
+    return tables
+
+
+def _candidate_columns(sql: str, names) -> list:
+    """Columns of the aliases `names` used after WHERE or ORDER BY: what an index would cover"""
+    match = re.search(r'\bWHERE\b|\bORDER BY\b', sql, re.IGNORECASE)
+    if not match:
+        return []
+    columns = []
+    for alias, column in _COLUMN.findall(sql[match.start():]):
+        if alias in names and column not in columns:
+            columns.append(column)
+    return columns
+
+
+def _explain_sqlite(sql, params) -> list:
+    """[(kind, alias or None, detail)] of the plan steps that need an index"""
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        steps = [row[3] for row in cursor.fetchall()]
+    problems = []
+    for detail in steps:
+        if detail.startswith('SCAN ') and ' USING ' not in detail:
+            problems.append((SCAN, detail.split()[1], detail))
+        elif detail.startswith('USE TEMP B-TREE FOR ORDER BY'):
+            problems.append((SORT, None, detail))
+    return problems
+
+
+def _explain_postgresql(sql, params) -> list:
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    problems = []
+
+    def walk(node):
+        if node['Node Type'] == 'Seq Scan':
+            problems.append((SCAN, node.get('Alias') or node['Relation Name'],
+                             f"Seq Scan on {node['Relation Name']}"))
+        elif node['Node Type'] in ('Sort', 'Incremental Sort'):
+            problems.append((SORT, None, f"{node['Node Type']} by {', '.join(node.get('Sort Key', []))}"))
+        for child in node.get('Plans', []):
+            walk(child)
+
+    walk(plan[0]['Plan'])
+    return problems
+
+
+def explain(sql, params) -> list:
+    """[(kind, alias or None, detail)]; alias is None when the step is about the whole query"""
+    if connection.vendor == 'sqlite':
+        return _explain_sqlite(sql, params)
+    if connection.vendor == 'postgresql':
+        return _explain_postgresql(sql, params)
+    raise NotImplementedError(f'EXPLAIN is not supported on {connection.vendor}')
+
+
+def capture_queries(languages=None, names=None) -> dict:
+    """Request every benchmarked view with a cold cache; returns QueryCapture.queries"""
+    client = Client()
+    capture = QueryCapture()
+    for key, url in view_urls(languages, names):
+        cache.clear()
+        capture.view = key
+        with db_router.execute_wrapper(capture):
+            response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f'{url} returned {response.status_code}')
+    return capture.queries
+
+
+def analyze(queries: dict, min_rows: int = 1000) -> list:
+    """Problems of the captured queries on tables of `min_rows` rows or more, largest tables first"""
+    counts = {}
+
+    def row_count(table):
+        if table not in counts:
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+                counts[table] = cursor.fetchone()[0]
+        return counts[table]
+
+    problems = {}  # (kind, table, columns) -> Problem
+    for sql, params, views in queries.values():
+        tables = _tables(sql)
+        if not tables:
+            continue
+        main_table = _TABLE.search(sql).group(1)
+        for kind, alias, detail in explain(sql, params):
+            table = tables.get(alias, alias) if alias else main_table
+            if table not in tables.values() or row_count(table) < min_rows:
+                continue
+            names = [name for name, target in tables.items() if target == table]
+            columns = _candidate_columns(sql, names)
+            key = (kind, table, tuple(columns))
+            if key in problems:
+                problems[key].views = sorted(set(problems[key].views) | views)
+            else:
+                problems[key] = Problem(kind, table, row_count(table), detail, sql, views, columns)
+    return sorted(problems.values(), key=lambda problem: (-problem.rows, problem.table, problem.kind))
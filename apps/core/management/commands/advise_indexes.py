@@ -0,0 +1,51 @@
+"""
+Management command to find queries of the public views that need an index.
+
+    python manage.py advise_indexes                       # seeded test database at scale 1
+    python manage.py advise_indexes --scale 10 --min-rows 5000
+    python manage.py advise_indexes --current-db --views projects:list --strict
+
+Runs EXPLAIN on every query the views issue and reports sequential scans and
+unindexed sorts of large tables (see apps/core/index_advisor.py).
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.benchmarking import seeded_database
+from apps.core.index_advisor import analyze, capture_queries
+
+
+class Command(BaseCommand):
+    help = 'Report sequential scans and unindexed sorts in the queries of every public view'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--current-db', action='store_true',
+                            help='Analyze the configured database instead of a seeded test database')
+        parser.add_argument('--seed-command', default='populate_sample_data',
+                            help='Management command that seeds the test database')
+        parser.add_argument('--scale', type=float, default=1,
+                            help='generate_load_data scale of the test database (0 to skip)')
+        parser.add_argument('--views', nargs='*', help='URL names to analyze (default: all)')
+        parser.add_argument('--languages', nargs='*', help='Language codes (default: all)')
+        parser.add_argument('--min-rows', type=int, default=1000,
+                            help='Ignore tables smaller than this')
+        parser.add_argument('--sql', action='store_true', help='Print the offending queries')
+        parser.add_argument('--strict', action='store_true', help='Exit with an error when anything is reported')
+
+    def handle(self, *args, **options):
+        with seeded_database(options['seed_command'], options['scale'], options['current_db'],
+                             log=self.stdout.write):
+            queries = capture_queries(options['languages'], options['views'])
+            self.stdout.write(f'Explaining {len(queries)} distinct queries...')
+            problems = analyze(queries, options['min_rows'])
+
+        for problem in problems:
+            self.stdout.write(self.style.WARNING(f'⚠️  {problem}'))
+            self.stdout.write(f"    views: {', '.join(problem.views)}")
+            if options['sql']:
+                self.stdout.write(f'    {problem.sql}')
+        if not problems:
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ No sequential scan of a table over {options['min_rows']} rows"))
+        elif options['strict']:
+            raise CommandError(f'{len(problems)} scan(s) or sort(s) without an index')
@@ -0,0 +1,68 @@
+"""
+Management command to benchmark the public views against the committed baseline.
+
+    python manage.py benchmark_views                    # seeded test database, compare
+    python manage.py benchmark_views --update-baseline  # after an intended change
+    python manage.py benchmark_views --current-db --views core:home projects:detail
+    python manage.py benchmark_views --scale 5 --update-baseline --baseline /tmp/scaled.json
+
+Exits with an error when a view runs more queries than its baseline budget.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.benchmarking import (
+    DEFAULT_BASELINE, compare, load_baseline, run_benchmarks, save_baseline, seeded_database,
+)
+
+
+class Command(BaseCommand):
+    help = 'Measure queries, SQL/render time and memory of every public view, per language'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+        parser.add_argument('--update-baseline', action='store_true',
+                            help='Write the results as the new baseline instead of comparing')
+        parser.add_argument('--current-db', action='store_true',
+                            help='Benchmark the configured database instead of a seeded test database')
+        parser.add_argument('--seed-command', default='populate_sample_data',
+                            help='Management command that seeds the test database')
+        parser.add_argument('--scale', type=float,
+                            help='Also run generate_load_data at this scale after seeding')
+        parser.add_argument('--views', nargs='*', help='URL names to benchmark (default: all)')
+        parser.add_argument('--languages', nargs='*', help='Language codes (default: all)')
+        parser.add_argument('--repeat', type=int, default=5, help='Warm requests per view')
+        parser.add_argument('--query-slack', type=int, default=0,
+                            help='Extra queries allowed over the baseline')
+        parser.add_argument('--time-tolerance', type=float,
+                            help='Also fail when total time exceeds the baseline by this fraction')
+
+    def handle(self, *args, **options):
+        with seeded_database(options['seed_command'], options['scale'], options['current_db'],
+                             log=self.stdout.write):
+            results = run_benchmarks(
+                languages=options['languages'], names=options['views'],
+                repeat=options['repeat'], progress=self.report,
+            )
+
+        if options['update_baseline']:
+            save_baseline(results, options['baseline'])
+            self.stdout.write(self.style.SUCCESS(f"✅ Baseline written to {options['baseline']}"))
+            return
+
+        baseline = load_baseline(options['baseline'])
+        if not baseline:
+            raise CommandError(f"No baseline at {options['baseline']}; run with --update-baseline")
+        failures = compare(results, baseline, options['query_slack'], options['time_tolerance'])
+        for key, message in failures:
+            self.stdout.write(self.style.ERROR(f'❌ {key}: {message}'))
+        if failures:
+            raise CommandError(f'{len(failures)} budget(s) exceeded')
+        self.stdout.write(self.style.SUCCESS(f'✅ {len(results)} views within budget'))
+
+    def report(self, key, url, metrics):
+        self.stdout.write(
+            f"{key:<36} {metrics['queries']:>4}q cold {metrics['warm_queries']:>4}q warm "
+            f"sql {metrics['sql_ms']:>7.1f}ms render {metrics['render_ms']:>7.1f}ms "
+            f"total {metrics['total_ms']:>7.1f}ms peak {metrics['peak_kb']:>6}KB"
+        )
@@ -0,0 +1,420 @@
+"""
+Management command to generate large, realistic datasets for load testing.
+
+    python manage.py generate_load_data --scale 1     # ~20k donations
+    python manage.py generate_load_data --scale 50    # ~1M donations, 5k projects
+
+Rows are written with bulk_create in batches from a seeded random generator,
+so the same --scale and --seed always produce the same data. Generated rows
+are marked (slugs starting with `load-`, emails at @load.example) and are
+replaced on every run; other content is left alone.
+
+Distributions are skewed like real traffic: a few projects get most of the
+donations, amounts are log-normal, most donors give once and a few often,
+and activity grows towards the present.
+"""
+
+import math
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from apps.articles.models import Article, ArticleCategory
+from apps.core.models import Event, GalleryImage, Newsletter
+from apps.donations.models import (
+    DailyDonationAggregate, Donation, FundingRollup, MaterialContribution,
+)
+from apps.donations.services.aggregates import rebuild_aggregates
+from apps.donations.services.currency import (
+    ExchangeRateUnavailable, apply_conversion, base_currency, exchange_rate, recompute_funding_totals,
+)
+from apps.donations.services.page_cache import invalidate_donate_pages
+from apps.donations.services.timeseries import rebuild_rollups
+from apps.projects.models import Project, ProjectCategory, ProjectNeed
+from apps.projects.progress import forget_progress
+
+PREFIX = 'load-'
+EMAIL_DOMAIN = 'load.example'
+
+# Rows per unit of --scale
+VOLUMES = {
+    'projects': 100,
+    'articles': 200,
+    'gallery': 500,
+    'events': 50,
+    'subscribers': 5000,
+    'donations': 20000,
+    'contributions': 1000,
+}
+
+CATEGORIES = ['Santé', 'Éducation', 'Eau', 'Agriculture', 'Culture', 'Urgence', 'Femmes', 'Environnement']
+PLACES = ['Dschang', 'Bafoussam', 'Douala', 'Yaoundé', 'Foto', 'Fongo-Tongo', 'Nkong-Ni', 'Penka-Michel']
+WORDS = ('communauté village école puits santé récolte avenir formation enfants femmes eau '
+         'solidarité culture terre forêt marché savoir lumière route espoir').split()
+LANGUAGES = ['fr', 'fr', 'fr', 'en', 'en', 'it', 'de']
+CURRENCIES = [('EUR', 60), ('XAF', 25), ('USD', 10), ('GBP', 5)]
+STATUSES = [('completed', 85), ('pending', 8), ('failed', 5), ('refunded', 2)]
+METHODS = [('stripe', 55), ('fapshi', 35), ('bank', 7), ('other', 3)]
+HISTORY_DAYS = 730
+
+
+@contextmanager
+def keep_timestamps(*fields):
+    """Let bulk_create store our dates in auto_now/auto_now_add fields"""
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field, _, _ in saved:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _field(model, name):
+    return model._meta.get_field(name)
+
+
+class Command(BaseCommand):
+    help = 'Generate a large deterministic dataset (projects, donations, articles, ...) with bulk_create'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0,
+                            help='Volume multiplier (1 = 100 projects, 20,000 donations)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        volumes = {name: max(1, int(count * options['scale'])) for name, count in VOLUMES.items()}
+
+        started = time.monotonic()
+        self.step('Removing previously generated data', self.clear)
+        categories = self.step('Categories', self.create_categories)
+        projects = self.step(f"{volumes['projects']:,} projects", self.create_projects,
+                             categories, volumes['projects'])
+        needs = self.step('Project needs', self.create_needs, projects)
+        self.step(f"{volumes['articles']:,} articles", self.create_articles, projects, volumes['articles'])
+        self.step(f"{volumes['gallery']:,} gallery images", self.create_gallery, projects, volumes['gallery'])
+        self.step(f"{volumes['events']:,} events", self.create_events, projects, volumes['events'])
+        self.step(f"{volumes['subscribers']:,} subscribers", self.create_subscribers, volumes['subscribers'])
+        self.step(f"{volumes['donations']:,} donations", self.create_donations,
+                  projects, needs, volumes['donations'])
+        self.step(f"{volumes['contributions']:,} material contributions", self.create_contributions,
+                  needs, volumes['contributions'])
+        self.step('Funding totals, aggregates and time series', self.rebuild)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Load data generated in {time.monotonic() - started:.0f}s'
+        ))
+
+    def step(self, label, func, *args):
+        self.stdout.write(f'  {label}...', ending='')
+        self.stdout.flush()
+        started = time.monotonic()
+        result = func(*args)
+        self.stdout.write(f' {time.monotonic() - started:.1f}s')
+        return result
+
+    # -------------------------------------------------------------------------
+    # Helpers
+
+    def words(self, count):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(count))
+
+    def past(self, days=HISTORY_DAYS):
+        """A moment in the last `days`, denser towards now"""
+        return self.now - timedelta(days=days * self.rng.random() ** 1.7,
+                                    seconds=self.rng.randrange(86400))
+
+    def uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def weighted(self, choices, k):
+        values, weights = zip(*choices)
+        return self.rng.choices(values, weights=weights, k=k)
+
+    def bulk(self, model, objects):
+        model.objects.bulk_create(objects, batch_size=self.batch_size)
+
+    # -------------------------------------------------------------------------
+    # Steps
+
+    def clear(self):
+        # Raw deletes: no per-row signals or cascades for a million donations
+        projects = Project.objects.filter(slug__startswith=PREFIX)
+        articles = Article.objects.filter(slug__startswith=PREFIX)
+        with transaction.atomic():
+            for queryset in [
+                Article.projects.through.objects.filter(article__in=articles),
+                Donation.objects.filter(donor_email__endswith='@' + EMAIL_DOMAIN),
+                MaterialContribution.objects.filter(contributor_email__endswith='@' + EMAIL_DOMAIN),
+                FundingRollup.objects.filter(project__in=projects),
+                DailyDonationAggregate.objects.filter(project__in=projects),
+                GalleryImage.objects.filter(photographer=PREFIX + 'data'),
+                Event.objects.filter(location__startswith=PREFIX),
+                Newsletter.objects.filter(email__endswith='@' + EMAIL_DOMAIN),
+                articles,
+                ArticleCategory.objects.filter(slug__startswith=PREFIX),
+                ProjectNeed.objects.filter(project__in=projects),
+                projects,
+                ProjectCategory.objects.filter(slug__startswith=PREFIX),
+            ]:
+                queryset._raw_delete(queryset.db)
+
+    def create_categories(self):
+        project_categories = [
+            ProjectCategory(name=name, slug=f'{PREFIX}{i}', order=i) for i, name in enumerate(CATEGORIES)
+        ]
+        article_categories = [
+            ArticleCategory(name=name, slug=f'{PREFIX}{i}') for i, name in enumerate(CATEGORIES)
+        ]
+        self.bulk(ProjectCategory, project_categories)
+        self.bulk(ArticleCategory, article_categories)
+        return {
+            'projects': list(ProjectCategory.objects.filter(slug__startswith=PREFIX)),
+            'articles': list(ArticleCategory.objects.filter(slug__startswith=PREFIX)),
+        }
+
+    def create_projects(self, categories, count):
+        statuses = self.weighted([('active', 70), ('funded', 10), ('completed', 15), ('draft', 5)], count)
+        objects = []
+        for i in range(count):
+            title = f'{self.words(3).capitalize()} {self.rng.choice(PLACES)}'
+            objects.append(Project(
+                title=title,
+                slug=f'{PREFIX}{i}',
+                category=self.rng.choice(categories['projects']),
+                short_description=self.words(25),
+                description=self.words(300),
+                impact_description=self.words(60),
+                featured_image_url=f'https://picsum.photos/seed/{PREFIX}{i}/800/600',
+                location=f'{self.rng.choice(PLACES)}, Cameroun',
+                goal_amount=Decimal(self.rng.choice([5, 10, 20, 35, 50, 100, 250]) * 1000),
+                currency='EUR' if self.rng.random() < 0.8 else 'XAF',
+                status=statuses[i],
+                is_featured=self.rng.random() < 0.05,
+                is_urgent=self.rng.random() < 0.08,
+                created_at=self.past(),
+                updated_at=self.now,
+            ))
+        with keep_timestamps(_field(Project, 'created_at'), _field(Project, 'updated_at')):
+            self.bulk(Project, objects)
+        return list(Project.objects.filter(slug__startswith=PREFIX).order_by('pk'))
+
+    def create_needs(self, projects):
+        objects = []
+        for project in projects:
+            for priority in range(1, self.rng.randint(1, 6) + 1):
+                material = self.rng.random() < 0.4
+                needed = self.rng.choice([10, 20, 50, 100, 500])
+                objects.append(ProjectNeed(
+                    project=project,
+                    need_type='material' if material else 'financial',
+                    title=self.words(3).capitalize(),
+                    description=self.words(30),
+                    target_amount=None if material else project.goal_amount / 4,
+                    item_name=self.words(1) if material else '',
+                    quantity_needed=needed if material else 0,
+                    quantity_received=int(needed * self.rng.random()) if material else 0,
+                    unit='pièces' if material else '',
+                    priority=priority,
+                ))
+        self.bulk(ProjectNeed, objects)
+        return list(ProjectNeed.objects.filter(project__slug__startswith=PREFIX).order_by('pk'))
+
+    def create_articles(self, projects, count):
+        categories = list(ArticleCategory.objects.filter(slug__startswith=PREFIX))
+        objects = []
+        for i in range(count):
+            published = self.past()
+            title = self.words(6).capitalize()
+            excerpt = self.words(30)
+            objects.append(Article(
+                title=title,
+                slug=f'{PREFIX}{i}',
+                excerpt=excerpt,
+                content='\n\n'.join(self.words(80) for _ in range(6)),
+                featured_image_url=f'https://picsum.photos/seed/{PREFIX}a{i}/1200/630',
+                category=self.rng.choice(categories),
+                author_name=self.words(2).title(),
+                status='published' if self.rng.random() < 0.9 else 'draft',
+                is_featured=self.rng.random() < 0.05,
+                published_date=published,
+                views_count=int(self.rng.paretovariate(1.3) * 20),
+                meta_title=title[:70],
+                meta_description=excerpt[:160],
+                created_at=published,
+                updated_at=published,
+            ))
+        with keep_timestamps(_field(Article, 'created_at'), _field(Article, 'updated_at')):
+            self.bulk(Article, objects)
+
+        # Article <-> project links (0-3 per article)
+        through = Article.projects.through
+        links = []
+        for article_id in Article.objects.filter(slug__startswith=PREFIX).values_list('pk', flat=True):
+            for project in self.rng.sample(projects, min(len(projects), self.rng.randint(0, 3))):
+                links.append(through(article_id=article_id, project_id=project.pk))
+        self.bulk(through, links)
+
+    def create_gallery(self, projects, count):
+        objects = [
+            GalleryImage(
+                title=self.words(3).capitalize(),
+                caption=self.words(15),
+                image_url=f'https://picsum.photos/seed/{PREFIX}g{i}/800/600',
+                project=self.rng.choice(projects) if self.rng.random() < 0.8 else None,
+                location=self.rng.choice(PLACES),
+                date_taken=self.past().date(),
+                photographer=PREFIX + 'data',
+                is_featured=self.rng.random() < 0.1,
+                is_published=self.rng.random() < 0.95,
+                order=i,
+                created_at=self.past(),
+                updated_at=self.now,
+            )
+            for i in range(count)
+        ]
+        with keep_timestamps(_field(GalleryImage, 'created_at'), _field(GalleryImage, 'updated_at')):
+            self.bulk(GalleryImage, objects)
+
+    def create_events(self, projects, count):
+        objects = []
+        for i in range(count):
+            start = self.now + timedelta(days=self.rng.randint(-365, 120), hours=self.rng.randint(8, 18))
+            objects.append(Event(
+                title=self.words(4).capitalize(),
+                description=self.words(80),
+                short_description=self.words(20),
+                event_date=start,
+                end_date=start + timedelta(hours=self.rng.choice([2, 4, 8, 48])),
+                location=f'{PREFIX}{self.rng.choice(PLACES)}',
+                image_url=f'https://picsum.photos/seed/{PREFIX}e{i}/800/600',
+                project=self.rng.choice(projects) if self.rng.random() < 0.5 else None,
+                is_featured=self.rng.random() < 0.1,
+                is_published=True,
+            ))
+        self.bulk(Event, objects)
+
+    def create_subscribers(self, count):
+        languages = self.rng.choices(LANGUAGES, k=count)
+        objects = [
+            Newsletter(
+                email=f'subscriber{i}@{EMAIL_DOMAIN}',
+                name=self.words(2).title(),
+                is_active=self.rng.random() < 0.92,
+                language=languages[i],
+                subscribed_at=self.past(),
+            )
+            for i in range(count)
+        ]
+        with keep_timestamps(_field(Newsletter, 'subscribed_at')):
+            self.bulk(Newsletter, objects)
+
+    def create_donations(self, projects, needs, count):
+        # Zipf-like popularity: project of rank r gets weight 1 / r^1.1
+        visible = [p for p in projects if p.status != 'draft']
+        self.rng.shuffle(visible)
+        weights = [1 / (rank + 1) ** 1.1 for rank in range(len(visible))]
+        needs_by_project = {}
+        for need in needs:
+            if need.need_type == 'financial':
+                needs_by_project.setdefault(need.project_id, []).append(need)
+        donors = max(1, count // 3)
+        currencies_known = self.convertible(CURRENCIES)
+
+        with keep_timestamps(_field(Donation, 'created_at')), transaction.atomic():
+            for offset in range(0, count, self.batch_size):
+                size = min(self.batch_size, count - offset)
+                targets = self.rng.choices(visible, weights=weights, k=size)
+                currencies = self.weighted(currencies_known, size)
+                statuses = self.weighted(STATUSES, size)
+                methods = self.weighted(METHODS, size)
+                batch = []
+                for i in range(size):
+                    general = self.rng.random() < 0.15
+                    project = None if general else targets[i]
+                    project_needs = needs_by_project.get(project.pk) if project else None
+                    need = self.rng.choice(project_needs) if project_needs and self.rng.random() < 0.3 else None
+                    currency = currencies[i]
+                    amount = self.amount(currency)
+                    # Most donors give once, a few give often
+                    donor = int(donors * self.rng.random() ** 3)
+                    created = self.past()
+                    status = statuses[i]
+                    donation = Donation(
+                        reference=self.uuid(),
+                        donor_name=f'Donateur {donor}',
+                        donor_email=f'donor{donor}@{EMAIL_DOMAIN}',
+                        is_anonymous=self.rng.random() < 0.2,
+                        amount=amount,
+                        currency=currency,
+                        project=project,
+                        project_need=need,
+                        payment_method=methods[i],
+                        status=status,
+                        created_at=created,
+                        completed_at=created + timedelta(minutes=self.rng.randint(1, 30))
+                        if status in ('completed', 'refunded') else None,
+                    )
+                    if donation.completed_at:
+                        apply_conversion(donation)
+                    batch.append(donation)
+                Donation.objects.bulk_create(batch)
+
+    def convertible(self, choices):
+        """Currencies with a known exchange rate, so every donation converts"""
+        self.unit_rates = {}
+        for currency, _ in choices:
+            try:
+                self.unit_rates[currency] = float(exchange_rate(base_currency(), currency))
+            except ExchangeRateUnavailable:
+                self.stdout.write(f' (no {currency} rate, skipped)', ending='')
+        return [(currency, weight) for currency, weight in choices if currency in self.unit_rates]
+
+    def amount(self, currency):
+        """Log-normal amounts around 30 EUR, rounded like real gifts"""
+        value = math.exp(self.rng.gauss(3.4, 0.9)) * self.unit_rates[currency]
+        step = 500 if currency == 'XAF' else 5
+        return Decimal(max(step, int(round(value / step)) * step))
+
+    def create_contributions(self, needs, count):
+        material = [need for need in needs if need.need_type == 'material']
+        if not material:
+            return
+        statuses = self.weighted([('pledged', 40), ('confirmed', 30), ('delivered', 25), ('cancelled', 5)], count)
+        objects = [
+            MaterialContribution(
+                reference=self.uuid(),
+                contributor_name=self.words(2).title(),
+                contributor_email=f'contributor{i}@{EMAIL_DOMAIN}',
+                project_need=self.rng.choice(material),
+                description=self.words(15),
+                quantity=self.rng.randint(1, 20),
+                status=statuses[i],
+                created_at=self.past(),
+                updated_at=self.now,
+            )
+            for i in range(count)
+        ]
+        with keep_timestamps(_field(MaterialContribution, 'created_at'),
+                             _field(MaterialContribution, 'updated_at')):
+            self.bulk(MaterialContribution, objects)
+
+    def rebuild(self):
+        # bulk_create skips the signals that normally maintain these
+        recompute_funding_totals()
+        rebuild_aggregates()
+        rebuild_rollups()
+        invalidate_donate_pages()
+        forget_progress(Project.objects.filter(slug__startswith=PREFIX).values_list('slug', flat=True))
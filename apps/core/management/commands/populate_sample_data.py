@@ -529,10 +529,12 @@ Impact :
                 'address': 'Dschang, Région de l\'Ouest, Cameroun',
                 'mission_text': 'Allumer l\'espoir, autonomiser les vies et transformer les communautés par notre humanité partagée.',
                 'vision_text': 'Un monde uni par la compassion, où chaque communauté s\'épanouit dans la dignité et avec un but.',
-                'facebook_url': 'https://facebook.com/fdtm.org',
-                'instagram_url': 'https://instagram.com/fdtm_org',
-                'twitter_url': 'https://twitter.com/fdtm_org',
-                'linkedin_url': 'https://linkedin.com/company/fdtm',
+                'social_links': {
+                    'facebook': 'https://facebook.com/fdtm.org',
+                    'instagram': 'https://instagram.com/fdtm_org',
+                    'twitter': 'https://twitter.com/fdtm_org',
+                    'linkedin': 'https://linkedin.com/company/fdtm',
+                },
             }
         )
         self.stdout.write('  ✓ Created site settings')
@@ -0,0 +1,88 @@
+"""
+Management command to report what booting a worker costs in imports.
+
+    python manage.py report_import_time
+    python manage.py report_import_time --top 30 --budget-ms 600 --strict
+
+Runs `python -X importtime` in a fresh interpreter that does what a worker
+does before its first request (django.setup(), the WSGI application and the
+URLconf), then reports the total, the most expensive top-level packages, and
+the SDKs of lazy services (apps/core/services.py) that were imported anyway.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core import services
+
+BOOT_SCRIPT = (
+    'import django; django.setup(); '
+    'from django.core.wsgi import get_wsgi_application; get_wsgi_application(); '
+    'from django.urls import get_resolver; get_resolver().url_patterns'
+)
+
+
+def import_times() -> dict:
+    """{module: (self µs, cumulative µs)} of one boot"""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE, PYTHONPATH=str(settings.BASE_DIR))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise CommandError(f'Boot failed:\n{result.stderr[-2000:]}')
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(own), int(cumulative))
+    return modules
+
+
+class Command(BaseCommand):
+    help = 'Measure the import cost of booting a worker and flag eagerly imported service SDKs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=3, help='Boots to measure (median reported)')
+        parser.add_argument('--top', type=int, default=15, help='Packages to list')
+        parser.add_argument('--budget-ms', type=float, help='Fail (with --strict) above this total')
+        parser.add_argument('--strict', action='store_true',
+                            help='Exit with an error on an eager SDK import or a blown budget')
+
+    def handle(self, *args, **options):
+        runs = [import_times() for _ in range(max(options['repeat'], 1))]
+        totals = [sum(own for own, _ in modules.values()) / 1000 for modules in runs]
+        modules = runs[totals.index(sorted(totals)[len(totals) // 2])]
+        total_ms = statistics.median(totals)
+
+        packages = {}
+        for name, (own, _) in modules.items():
+            package = name.split('.')[0]
+            packages[package] = packages.get(package, 0) + own
+        self.stdout.write(f'{len(modules)} modules imported in {total_ms:.0f}ms '
+                          f'(median of {len(runs)} boots)\n')
+        for package, own in sorted(packages.items(), key=lambda item: -item[1])[:options['top']]:
+            self.stdout.write(f'{package:<32} {own / 1000:>8.1f}ms')
+
+        problems = []
+        for name, service in sorted(services.registered().items()):
+            eager = [module for module in service.modules if module in modules]
+            for module in eager:
+                problems.append(f"{module} ({modules[module][1] / 1000:.1f}ms) imported at boot, "
+                                f"before service '{name}' is used")
+        if options['budget_ms'] is not None and total_ms > options['budget_ms']:
+            problems.append(f"boot imports take {total_ms:.0f}ms > budget {options['budget_ms']:.0f}ms")
+
+        self.stdout.write('')
+        for problem in problems:
+            self.stdout.write(self.style.WARNING(f'⚠️  {problem}'))
+        if not problems:
+            self.stdout.write(self.style.SUCCESS('✅ No service SDK imported at boot'))
+        elif options['strict']:
+            raise CommandError(f'{len(problems)} import problem(s)')
@@ -0,0 +1,35 @@
+"""
+Management command to send (or resume) a newsletter campaign.
+Messages are queued in the outbox; send_queued_email delivers them.
+
+A paused campaign resumes after its last sent batch. A campaign left
+"sending" by a run that died is paused from the admin, then sent again.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.models import NewsletterCampaign
+from apps.core.newsletter_service import send_campaign
+
+
+class Command(BaseCommand):
+    help = 'Send a newsletter campaign to all active subscribers, resuming where it stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument('campaign_id', type=int)
+        parser.add_argument('--batch-size', type=int, help='Subscribers queued per batch')
+
+    def handle(self, *args, **options):
+        try:
+            campaign = NewsletterCampaign.objects.get(pk=options['campaign_id'])
+        except NewsletterCampaign.DoesNotExist:
+            raise CommandError(f"Campaign {options['campaign_id']} does not exist")
+
+        if campaign.status == NewsletterCampaign.Status.SENDING:
+            raise CommandError('Campaign is already being sent; pause it first to take over a run that died')
+
+        self.stdout.write(f'Sending campaign "{campaign}"...')
+        stats = send_campaign(campaign, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {stats['queued']} emails queued (delivered by send_queued_email)"
+        ))
@@ -0,0 +1,65 @@
+"""
+Management command to deliver queued outbound email.
+Run it from cron, or as a long-lived worker with --loop. While the mail
+server is unreachable the worker backs off (doubling the wait up to
+MAX_BACKOFF) instead of exiting; the messages stay queued.
+"""
+
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from apps.core.email_service import Throttle, deliver_pending
+
+# Longest wait between attempts while the mail server is down (seconds)
+MAX_BACKOFF = 300
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued OutboundEmail rows in throttled batches over a reused SMTP connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Messages per SMTP connection')
+        parser.add_argument('--rate', type=float, help='Max messages per second')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new messages')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Seconds to sleep when the outbox is empty (with --loop)')
+
+    def handle(self, *args, **options):
+        throttle = Throttle(options['rate'])
+        connection = get_connection()
+        totals = {'sent': 0, 'retried': 0, 'failed': 0, 'deferred': 0}
+        backoff = options['interval']
+
+        while True:
+            stats = deliver_pending(
+                batch_size=options['batch_size'],
+                connection=connection,
+                throttle=throttle,
+            )
+            for key, value in stats.items():
+                totals[key] += value
+            if stats['deferred']:
+                self.stdout.write(self.style.WARNING(
+                    f"  ⚠ mail server unavailable, {stats['deferred']} deferred"
+                ))
+                if not options['loop']:
+                    break
+                time.sleep(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF)
+                continue
+            backoff = options['interval']
+            if any(stats.values()):
+                self.stdout.write(
+                    f"  ✓ sent {stats['sent']}, retrying {stats['retried']}, failed {stats['failed']}"
+                )
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Outbox drained: {totals['sent']} sent, {totals['retried']} to retry, "
+            f"{totals['failed']} failed, {totals['deferred']} deferred"
+        ))
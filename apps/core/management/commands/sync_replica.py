@@ -0,0 +1,42 @@
+"""
+Management command to copy the primary SQLite database into its replicas.
+
+    DATABASE_REPLICA_URLS=sqlite:////tmp/replica.sqlite3 python manage.py sync_replica
+
+Stands in for replication when trying the replica router locally: the
+replicas only see writes made before the last sync, like a lagging
+PostgreSQL standby. Real replicas are kept up to date by the database
+server.
+"""
+
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from apps.core.db_router import PRIMARY, replica_aliases
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database into every configured SQLite replica'
+
+    def handle(self, *args, **options):
+        aliases = replica_aliases()
+        if not aliases:
+            raise CommandError('No replica configured (set DATABASE_REPLICA_URLS)')
+        for alias in [PRIMARY] + aliases:
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(f'{alias} is not SQLite; replication is handled by the database server')
+
+        source = sqlite3.connect(str(connections[PRIMARY].settings_dict['NAME']))
+        try:
+            for alias in aliases:
+                connections[alias].close()
+                target = sqlite3.connect(str(connections[alias].settings_dict['NAME']))
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(self.style.SUCCESS(f'✅ {alias} synced from {PRIMARY}'))
+        finally:
+            source.close()
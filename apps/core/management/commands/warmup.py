@@ -0,0 +1,30 @@
+"""
+Management command to warm the shared caches (and this process) after a deploy.
+
+    python manage.py warmup
+    python manage.py warmup --steps caches
+
+Run it once per deploy: gunicorn workers started with gunicorn.conf.py warm
+their own process (templates, URLs, catalogs, clients) but not the shared
+caches (see apps/core/warmup.py).
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.warmup import STEPS, warmup
+
+
+class Command(BaseCommand):
+    help = 'Compile templates, populate URL resolvers and catalogs, build clients and fill the caches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--steps', nargs='*', choices=list(STEPS), help='Steps to run (default: all)')
+
+    def handle(self, *args, **options):
+        steps = options['steps'] or list(STEPS)
+        results = warmup(steps, log=self.stdout.write)
+        failed = [step for step in steps if step not in results]
+        if failed:
+            raise CommandError(f"Warmup failed: {', '.join(failed)} (see the log)")
+        seconds = sum(duration for _, duration in results.values())
+        self.stdout.write(self.style.SUCCESS(f'✅ Warmed up in {seconds * 1000:.0f}ms'))
@@ -0,0 +1,331 @@
+"""
+Metrics
+In-process metrics registry exposed at /metrics in the Prometheus text
+exposition format.
+
+Counters and histograms are updated in memory by the code that observes
+them (request latency, queries, cache, translations, webhooks, payment
+providers). Gauges for business KPIs (pending donations, DeepL usage,
+open circuits) are computed by collectors when /metrics is scraped.
+
+Several gunicorn workers: METRICS_MULTIPROC_DIR is a directory shared by
+the workers (gunicorn.conf.py sets a default), emptied by the master when
+the server starts. Every process writes its counters to its own file there
+(metrics_<pid>.json), METRICS_FLUSH_INTERVAL seconds after an update (from
+a timer thread), and /metrics sums the files of all processes, so any
+worker can answer a scrape. The master removes the file of a worker that
+exits: Prometheus sees a counter reset, and the directory does not grow
+with every recycled worker.
+
+    from apps.core import metrics
+
+    WIDGETS = metrics.counter('widgets_total', 'Widgets built', ['kind'])
+    WIDGETS.inc(kind='round')
+"""
+
+import atexit
+import glob
+import json
+import os
+import threading
+from bisect import bisect_left
+
+from django.conf import settings
+
+PREFIX = 'fdtm_'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Metric:
+    """A named counter or histogram with a fixed set of label names"""
+
+    def __init__(self, registry, kind, name, documentation, labelnames=(), buckets=None):
+        self.registry = registry
+        self.kind = kind
+        self.name = PREFIX + name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets or DEFAULT_BUCKETS) if kind == 'histogram' else None
+
+    def _labels(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def inc(self, amount: float = 1, **labels):
+        self.registry.add(self, self._labels(labels), amount)
+
+    def observe(self, value: float, **labels):
+        self.registry.add(self, self._labels(labels), value)
+
+
+class Registry:
+    """Metric values of this process, optionally mirrored to a file"""
+
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []
+        self._values = {}  # (name, label values) -> float, or [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_pid = None  # process with a flush scheduled (timers do not survive fork)
+        self._dirty = False
+
+    # Definition
+
+    def _define(self, kind, name, documentation, labelnames=(), buckets=None) -> Metric:
+        metric = Metric(self, kind, name, documentation, labelnames, buckets)
+        return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labelnames=()) -> Metric:
+        return self._define('counter', name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=None) -> Metric:
+        return self._define('histogram', name, documentation, labelnames, buckets)
+
+    def collector(self, func):
+        """
+        Register a function called at scrape time. It returns
+        [(name, documentation, [(labels dict, value), ...]), ...] exposed as gauges.
+        """
+        self.collectors.append(func)
+        return func
+
+    # Updates
+
+    def add(self, metric: Metric, labels: tuple, value: float):
+        key = (metric.name, labels)
+        with self._lock:
+            if metric.kind == 'counter':
+                self._values[key] = self._values.get(key, 0) + value
+            else:
+                entry = self._values.get(key)
+                if entry is None:
+                    entry = self._values[key] = [0] * (len(metric.buckets) + 2)
+                index = bisect_left(metric.buckets, value)
+                if index < len(metric.buckets):
+                    entry[index] += 1
+                entry[-2] += value
+                entry[-1] += 1
+            self._dirty = True
+        if multiproc_dir() and self._flush_pid != os.getpid():
+            self._schedule_flush()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {key: (list(value) if isinstance(value, list) else value)
+                    for key, value in self._values.items()}
+
+    # Multiprocess files
+
+    def _schedule_flush(self):
+        with self._flush_lock:
+            if self._flush_pid == os.getpid():
+                return
+            self._flush_pid = os.getpid()
+        timer = threading.Timer(_setting('METRICS_FLUSH_INTERVAL', 1), self._scheduled_flush)
+        timer.daemon = True
+        timer.start()
+
+    def _scheduled_flush(self):
+        self._flush_pid = None
+        self.flush()
+
+    def flush(self, directory=None):
+        """Write this process's values to its file (atomically)"""
+        directory = directory or multiproc_dir()
+        if not directory or not self._dirty:
+            return
+        with self._lock:
+            rows = [[name, list(labels), value] for (name, labels), value in self._values.items()]
+            self._dirty = False
+        path = os.path.join(directory, f'metrics_{os.getpid()}.json')
+        tmp = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(rows, f)
+        os.replace(tmp, path)
+
+    def merged(self) -> dict:
+        """Values of every process (file-backed mode) or of this one"""
+        directory = multiproc_dir()
+        if not directory:
+            return self.snapshot()
+        values = {}
+        own = os.path.join(directory, f'metrics_{os.getpid()}.json')
+        for path in glob.glob(os.path.join(directory, 'metrics_*.json')):
+            if path == own:
+                continue
+            try:
+                with open(path) as f:
+                    rows = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, labels, value in rows:
+                _merge(values, (name, tuple(labels)), value)
+        for key, value in self.snapshot().items():
+            _merge(values, key, value)
+        return values
+
+    # Exposition
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format (version 0.0.4)"""
+        values = self.merged()
+        by_metric = {}
+        for (name, labels), value in values.items():
+            by_metric.setdefault(name, []).append((labels, value))
+
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for labels, value in sorted(by_metric.get(name, [])):
+                pairs = list(zip(metric.labelnames, labels))
+                if metric.kind == 'counter':
+                    lines.append(f'{name}{_format_labels(pairs)} {_number(value)}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets, value):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_format_labels(pairs + [("le", _number(bound))])} {cumulative}')
+                lines.append(f'{name}_bucket{_format_labels(pairs + [("le", "+Inf")])} {value[-1]}')
+                lines.append(f'{name}_sum{_format_labels(pairs)} {_number(value[-2])}')
+                lines.append(f'{name}_count{_format_labels(pairs)} {value[-1]}')
+
+        for collect in self.collectors:
+            for name, documentation, samples in collect():
+                name = PREFIX + name
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} gauge')
+                for labels, value in samples:
+                    lines.append(f'{name}{_format_labels(sorted(labels.items()))} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _merge(values: dict, key, value):
+    current = values.get(key)
+    if current is None:
+        values[key] = list(value) if isinstance(value, list) else value
+    elif isinstance(current, list):
+        for i, item in enumerate(value):
+            current[i] += item
+    else:
+        values[key] = current + value
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_labels(pairs) -> str:
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def multiproc_dir() -> str:
+    return _setting('METRICS_MULTIPROC_DIR', '')
+
+
+registry = Registry()
+counter = registry.counter
+histogram = registry.histogram
+collector = registry.collector
+
+atexit.register(registry.flush)
+
+
+# =============================================================================
+# APPLICATION METRICS
+# =============================================================================
+
+REQUEST_LATENCY = histogram(
+    'http_request_duration_seconds', 'Time to produce the response, per URL name',
+    ['view', 'method'],
+)
+REQUESTS = counter('http_requests_total', 'Responses, per URL name and status code', ['view', 'method', 'status'])
+DB_QUERIES = counter('db_queries_total', 'SQL queries run while handling requests', ['view'])
+DB_SECONDS = counter('db_query_seconds_total', 'Time spent in SQL queries while handling requests', ['view'])
+CACHE_REQUESTS = counter('cache_requests_total', 'Cache lookups during requests, by result', ['result'])
+EXTERNAL_SECONDS = histogram(
+    'external_call_duration_seconds', 'Time requests waited on external services', ['service'],
+)
+TRANSLATION_CACHE = counter('translation_cache_total', 'Translation cache lookups, by result', ['result'])
+DEEPL_CHARACTERS = counter('deepl_characters_total', 'Characters sent to DeepL for translation')
+WEBHOOK_LAG = histogram(
+    'webhook_lag_seconds', 'Delay between a provider event and its processing', ['provider'],
+    buckets=(1, 2, 5, 10, 30, 60, 120, 300, 900, 3600, 21600, 86400),
+)
+PROVIDER_CALLS = counter('payment_provider_calls_total', 'Payment provider calls, by outcome',
+                         ['provider', 'outcome'])
+
+
+def observe_request(request, response, profile):
+    """Record a finished request from its RequestProfile (apps/core/profiling.py)"""
+    match = getattr(request, 'resolver_match', None)
+    view = match.view_name if match else 'unresolved'
+    REQUEST_LATENCY.observe(profile.total_seconds(), view=view, method=request.method)
+    REQUESTS.inc(view=view, method=request.method, status=response.status_code)
+    if profile.queries:
+        DB_QUERIES.inc(profile.queries, view=view)
+        DB_SECONDS.inc(profile.sql_seconds, view=view)
+    if profile.cache_hits:
+        CACHE_REQUESTS.inc(profile.cache_hits, result='hit')
+    if profile.cache_misses:
+        CACHE_REQUESTS.inc(profile.cache_misses, result='miss')
+    for service, (_, seconds) in profile.external.items():
+        EXTERNAL_SECONDS.observe(seconds, service=service)
+
+
+# =============================================================================
+# BUSINESS COLLECTORS (evaluated at scrape time)
+# =============================================================================
+
+@collector
+def pending_donations():
+    from apps.donations.models import Donation
+    from django.db.models import Count
+
+    rows = (Donation.objects.filter(status__in=['pending', 'processing'])
+            .values_list('payment_method', 'status').annotate(count=Count('pk')).order_by())
+    return [('donations_pending', 'Donations waiting for payment confirmation',
+             [({'payment_method': method, 'status': status}, count) for method, status, count in rows])]
+
+
+@collector
+def payment_circuits():
+    from django.core.cache import cache
+    from apps.donations.services.gateway import DEFAULT_PROVIDERS
+
+    providers = list(getattr(settings, 'PAYMENT_PROVIDERS', None) or DEFAULT_PROVIDERS)
+    open_keys = cache.get_many([f'payments:circuit_open:{name}' for name in providers])
+    return [('payment_provider_circuit_open', 'Whether a worker opened the provider circuit',
+             [({'provider': name}, int(f'payments:circuit_open:{name}' in open_keys)) for name in providers])]
+
+
+@collector
+def deepl_usage():
+    """DeepL account usage, fetched at most every METRICS_DEEPL_USAGE_INTERVAL seconds"""
+    from django.core.cache import cache
+    from .translation_service import get_translation_service
+
+    usage = cache.get('metrics:deepl_usage')
+    if usage is None:
+        usage = get_translation_service().get_usage()
+        cache.set('metrics:deepl_usage', usage, _setting('METRICS_DEEPL_USAGE_INTERVAL', 300))
+    if 'error' in usage:
+        return []
+    return [
+        ('deepl_character_count', 'Characters translated this DeepL billing period',
+         [({}, usage['character_count'])]),
+        ('deepl_character_limit', 'DeepL character limit for the billing period',
+         [({}, usage['character_limit'])]),
+    ]
@@ -3,6 +3,14 @@ SEO Middleware
 Adds security headers and SEO-related headers.
 """
 
+import random
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from . import db_router, metrics, nplusone, profiling
+
+
 class SecurityHeadersMiddleware:
     """Add security headers to all responses"""
     
@@ -36,3 +44,97 @@ class LocaleMiddleware:
         
         response = self.get_response(request)
         return response
+
+
+class ProfilingMiddleware:
+    """
+    Profile sampled and staff requests (see apps/core/profiling.py), and
+    every request when METRICS_ENABLED (apps/core/metrics.py).
+    Staff responses get a Server-Timing header; sampled requests are logged.
+    Place after AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+        self.server_timing = getattr(settings, 'PROFILING_SERVER_TIMING', True)
+        self.metrics = getattr(settings, 'METRICS_ENABLED', False)
+        profiling.install()
+
+    def __call__(self, request):
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        # Only staff log in, so requests without a session cookie are never staff
+        maybe_staff = self.server_timing and settings.SESSION_COOKIE_NAME in request.COOKIES
+        if not (self.metrics or sampled or maybe_staff):
+            return self.get_response(request)
+
+        profile, token = profiling.start_profile()
+        try:
+            with db_router.execute_wrapper(profile):
+                response = self.get_response(request)
+        finally:
+            profiling.stop_profile(token)
+
+        if maybe_staff and getattr(request, 'user', None) is not None and request.user.is_staff:
+            response['Server-Timing'] = profile.server_timing()
+        if sampled:
+            profiling.log_profile(request, response, profile)
+        if self.metrics:
+            metrics.observe_request(request, response, profile)
+        return response
+
+
+class NPlusOneMiddleware:
+    """
+    Report repeated per-row queries in each request (see apps/core/nplusone.py).
+    Removed from the stack unless NPLUSONE_ENABLED.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'NPLUSONE_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.strict = getattr(settings, 'NPLUSONE_STRICT', False)
+
+    def __call__(self, request):
+        with nplusone.detect(strict=self.strict, label=f'{request.method} {request.path}'):
+            return self.get_response(request)
+
+
+class ReplicaPinMiddleware:
+    """
+    Read-your-writes for the replica router (see apps/core/db_router.py).
+    Unsafe requests and the admin read from the primary; a request that
+    writes pins the browser to the primary for REPLICA_STICKY_SECONDS with
+    a cookie. Removed from the stack when no replica is configured.
+    """
+
+    COOKIE_NAME = 'fdtm_primary'
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        if not db_router.replica_aliases():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Worker threads are reused: start every request from the cookie only
+        try:
+            remaining = float(request.COOKIES.get(self.COOKIE_NAME, 0)) - time.time()
+        except ValueError:
+            remaining = 0
+        if request.method not in self.SAFE_METHODS:
+            remaining = max(remaining, 3600)
+        db_router.reset_pin(remaining)
+
+        response = self.get_response(request)
+
+        if db_router.has_written():
+            seconds = db_router.sticky_seconds()
+            response.set_cookie(self.COOKIE_NAME, str(time.time() + seconds), max_age=seconds,
+                                httponly=True, samesite='Lax', secure=request.is_secure())
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if view_func.__module__.startswith('django.contrib.admin'):
+            db_router.pin_primary(3600)
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_add_home_chapter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboundEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('to_email', models.EmailField(max_length=254, verbose_name='Destinataire')),
+                ('from_email', models.CharField(blank=True, max_length=254, verbose_name='Expéditeur')),
+                ('reply_to', models.EmailField(blank=True, max_length=254, verbose_name='Répondre à')),
+                ('subject', models.CharField(max_length=255, verbose_name='Sujet')),
+                ('body_text', models.TextField(verbose_name='Texte')),
+                ('body_html', models.TextField(blank=True, verbose_name='HTML')),
+                ('attachments', models.JSONField(blank=True, default=list, help_text='Chemins dans le stockage média', verbose_name='Pièces jointes')),
+                ('category', models.CharField(choices=[('contact', 'Contact'), ('newsletter', 'Newsletter'), ('donation', 'Don'), ('receipt', 'Reçu fiscal'), ('other', 'Autre')], default='other', max_length=20, verbose_name='Catégorie')),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('sending', "En cours d'envoi"), ('sent', 'Envoyé'), ('failed', 'Échoué')], default='pending', max_length=20, verbose_name='Statut')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Tentatives')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Prochaine tentative')),
+                ('last_error', models.TextField(blank=True, verbose_name='Dernière erreur')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Envoyé le')),
+            ],
+            options={
+                'verbose_name': 'Email sortant',
+                'verbose_name_plural': 'Emails sortants',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_due_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_outbound_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsletterCampaign',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=200, verbose_name='Sujet')),
+                ('body', models.TextField(help_text='Rédigé en français, traduit automatiquement', verbose_name='Contenu')),
+                ('status', models.CharField(choices=[('draft', 'Brouillon'), ('sending', "En cours d'envoi"), ('paused', 'En pause'), ('sent', 'Envoyée')], default='draft', max_length=20, verbose_name='Statut')),
+                ('translations', models.JSONField(blank=True, default=dict, help_text='Sujet et contenu par langue', verbose_name='Traductions')),
+                ('progress', models.JSONField(blank=True, default=dict, help_text='Dernier abonné traité par langue', verbose_name='Progression')),
+                ('sent_count', models.PositiveIntegerField(default=0, verbose_name='Envoyés')),
+                ('failed_count', models.PositiveIntegerField(default=0, verbose_name='Échecs')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Démarré le')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Terminé le')),
+            ],
+            options={
+                'verbose_name': 'Campagne newsletter',
+                'verbose_name_plural': 'Campagnes newsletter',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_newsletter_campaign'),
+        ('projects', '0003_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['event_date'], name='event_published_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='galleryimage',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-is_featured', '-created_at'], name='gallery_listing_idx'),
+        ),
+    ]
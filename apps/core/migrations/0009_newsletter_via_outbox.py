@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='newslettercampaign',
+            name='failed_count',
+        ),
+        migrations.AddField(
+            model_name='outboundemail',
+            name='headers',
+            field=models.JSONField(blank=True, default=dict, help_text='En-têtes supplémentaires (ex. List-Unsubscribe)', verbose_name='En-têtes'),
+        ),
+        migrations.AlterField(
+            model_name='newslettercampaign',
+            name='sent_count',
+            field=models.PositiveIntegerField(default=0, help_text='Le suivi de livraison est dans les emails sortants', verbose_name="Mis en file d'envoi"),
+        ),
+    ]
@@ -3,9 +3,13 @@ Core App Models
 Site-wide settings, team members, testimonials, and partners.
 """
 
+from django.core.cache import cache
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .cache import bump_version, versioned_key
+
 
 class SiteSettings(models.Model):
     """
@@ -49,15 +53,22 @@ class SiteSettings(models.Model):
     def __str__(self):
         return self.site_name
     
+    CACHE_NAMESPACE = 'site_settings'
+    
     def save(self, *args, **kwargs):
         # Ensure only one instance exists
         self.pk = 1
         super().save(*args, **kwargs)
+        bump_version(self.CACHE_NAMESPACE)
     
     @classmethod
     def get_settings(cls):
-        """Get or create the singleton instance"""
-        settings, _ = cls.objects.get_or_create(pk=1)
+        """Get or create the singleton instance (cached; read on every page)"""
+        key = versioned_key(cls.CACHE_NAMESPACE, 'instance')
+        settings = cache.get(key)
+        if settings is None:
+            settings, _ = cls.objects.get_or_create(pk=1)
+            cache.set(key, settings, None)
         return settings
 
 
@@ -296,6 +307,12 @@ class Event(models.Model):
         verbose_name = _("Événement")
         verbose_name_plural = _("Événements")
         ordering = ['event_date']
+        indexes = [
+            # Partial: SQLite only uses a boolean column of an index for `= 1`,
+            # not for the bare `WHERE is_published` Django generates
+            models.Index(fields=['event_date'], name='event_published_date_idx',
+                         condition=models.Q(is_published=True)),
+        ]
     
     def __str__(self):
         return self.title
@@ -354,6 +371,10 @@ class GalleryImage(models.Model):
         verbose_name = _("Image de galerie")
         verbose_name_plural = _("Images de galerie")
         ordering = ['-is_featured', '-created_at']
+        indexes = [
+            models.Index(fields=['-is_featured', '-created_at'], name='gallery_listing_idx',
+                         condition=models.Q(is_published=True)),
+        ]
     
     def __str__(self):
         if self.title:
@@ -447,3 +468,97 @@ class HomeChapter(models.Model):
         return None
 
 
+class OutboundEmail(models.Model):
+    """
+    Outbox for transactional email.
+    Requests only enqueue rows; `python manage.py send_queued_email` delivers
+    them in batches over a reused SMTP connection, with throttling and retries.
+    """
+    
+    class Status(models.TextChoices):
+        PENDING = 'pending', _('En attente')
+        SENDING = 'sending', _('En cours d\'envoi')
+        SENT = 'sent', _('Envoyé')
+        FAILED = 'failed', _('Échoué')
+    
+    class Category(models.TextChoices):
+        CONTACT = 'contact', _('Contact')
+        NEWSLETTER = 'newsletter', _('Newsletter')
+        DONATION = 'donation', _('Don')
+        RECEIPT = 'receipt', _('Reçu fiscal')
+        OTHER = 'other', _('Autre')
+    
+    to_email = models.EmailField(_("Destinataire"))
+    from_email = models.CharField(_("Expéditeur"), max_length=254, blank=True)
+    reply_to = models.EmailField(_("Répondre à"), blank=True)
+    subject = models.CharField(_("Sujet"), max_length=255)
+    body_text = models.TextField(_("Texte"))
+    body_html = models.TextField(_("HTML"), blank=True)
+    attachments = models.JSONField(_("Pièces jointes"), default=list, blank=True,
+                                   help_text=_("Chemins dans le stockage média"))
+    category = models.CharField(_("Catégorie"), max_length=20, choices=Category.choices,
+                                default=Category.OTHER)
+    headers = models.JSONField(_("En-têtes"), default=dict, blank=True,
+                               help_text=_("En-têtes supplémentaires (ex. List-Unsubscribe)"))
+    
+    # Delivery state
+    status = models.CharField(_("Statut"), max_length=20, choices=Status.choices,
+                              default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(_("Tentatives"), default=0)
+    next_attempt_at = models.DateTimeField(_("Prochaine tentative"), default=timezone.now)
+    last_error = models.TextField(_("Dernière erreur"), blank=True)
+    
+    # Timestamps
+    created_at = models.DateTimeField(_("Créé le"), auto_now_add=True)
+    sent_at = models.DateTimeField(_("Envoyé le"), null=True, blank=True)
+    
+    class Meta:
+        verbose_name = _("Email sortant")
+        verbose_name_plural = _("Emails sortants")
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_due_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.to_email} - {self.subject}"
+
+
+class NewsletterCampaign(models.Model):
+    """
+    Newsletter campaign sent to all active subscribers, segmented by language.
+    Written once in French; translated once per language when sending starts.
+    Messages are queued in the outbox (delivered by send_queued_email);
+    queueing progress is stored per language so an interrupted send resumes
+    where it stopped (`python manage.py send_newsletter_campaign <id>`).
+    """
+    
+    class Status(models.TextChoices):
+        DRAFT = 'draft', _('Brouillon')
+        SENDING = 'sending', _('En cours d\'envoi')
+        PAUSED = 'paused', _('En pause')
+        SENT = 'sent', _('Envoyée')
+    
+    subject = models.CharField(_("Sujet"), max_length=200)
+    body = models.TextField(_("Contenu"), help_text=_("Rédigé en français, traduit automatiquement"))
+    
+    status = models.CharField(_("Statut"), max_length=20, choices=Status.choices,
+                              default=Status.DRAFT)
+    translations = models.JSONField(_("Traductions"), default=dict, blank=True,
+                                    help_text=_("Sujet et contenu par langue"))
+    progress = models.JSONField(_("Progression"), default=dict, blank=True,
+                                help_text=_("Dernier abonné traité par langue"))
+    sent_count = models.PositiveIntegerField(_("Mis en file d'envoi"), default=0,
+                                             help_text=_("Le suivi de livraison est dans les emails sortants"))
+    
+    created_at = models.DateTimeField(_("Créé le"), auto_now_add=True)
+    started_at = models.DateTimeField(_("Démarré le"), null=True, blank=True)
+    finished_at = models.DateTimeField(_("Terminé le"), null=True, blank=True)
+    
+    class Meta:
+        verbose_name = _("Campagne newsletter")
+        verbose_name_plural = _("Campagnes newsletter")
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return self.subject
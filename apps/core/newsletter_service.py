@@ -0,0 +1,215 @@
+"""
+Newsletter Service
+Segmented bulk delivery of newsletter campaigns.
+
+A campaign is translated once per language (one `translate_batch` call) and
+rendered once per language; each recipient only gets the unsubscribe link
+substituted in. Subscribers are streamed in keyset batches (pk > last_pk),
+so memory stays flat whatever the list size; each batch is queued in the
+outbox together with the saved cursor, so sends are resumable and delivery
+gets the outbox retries and throttling (`send_queued_email`).
+
+A send claims the campaign (draft or paused -> sending) and stamps its run
+id into `progress`; a second click finds it already sending and returns. A
+run stops at the next batch once the campaign is paused or claimed by
+another run, so a run that died while sending is taken over by pausing the
+campaign and sending it again. Pausing stops the queueing; messages already
+in the outbox are still delivered.
+
+Unsubscribe links are signed tokens valid for NEWSLETTER_UNSUBSCRIBE_MAX_AGE
+and only act on POST: a GET shows a confirmation form, and mail clients use
+RFC 8058 one-click (`List-Unsubscribe-Post`), so link scanners that prefetch
+URLs cannot unsubscribe anyone.
+"""
+
+import logging
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce, Now
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone, translation
+
+from .email_service import enqueue_many
+from .translation_service import get_translation_service
+
+logger = logging.getLogger(__name__)
+
+UNSUBSCRIBE_SALT = 'newsletter-unsubscribe'
+UNSUBSCRIBE_PLACEHOLDER = '__FDTM_UNSUBSCRIBE_URL__'
+
+
+def unsubscribe_token(email: str) -> str:
+    return signing.dumps(email, salt=UNSUBSCRIBE_SALT)
+
+
+def email_from_token(token: str):
+    """Return the email encoded in an unsubscribe token, or None if invalid or expired"""
+    max_age = getattr(settings, 'NEWSLETTER_UNSUBSCRIBE_MAX_AGE', 60 * 60 * 24 * 180)
+    try:
+        return signing.loads(token, salt=UNSUBSCRIBE_SALT, max_age=max_age)
+    except signing.BadSignature:
+        return None
+
+
+def unsubscribe_url(email: str, language: str) -> str:
+    with translation.override(language):
+        path = reverse('core:newsletter_unsubscribe', args=[unsubscribe_token(email)])
+    return settings.SITE_URL.rstrip('/') + path
+
+
+def unsubscribe(emails) -> int:
+    """Opt out subscribers in bulk (one UPDATE)"""
+    from .models import Newsletter
+
+    return Newsletter.objects.filter(email__in=list(emails), is_active=True).update(
+        is_active=False,
+        unsubscribed_at=timezone.now(),
+    )
+
+
+def campaign_languages():
+    """Languages that currently have active subscribers"""
+    from .models import Newsletter
+
+    known = {code for code, _ in settings.LANGUAGES}
+    found = (Newsletter.objects.filter(is_active=True)
+             .order_by().values_list('language', flat=True).distinct())
+    # Unknown language codes fall back to the default language segment
+    return sorted({code if code in known else settings.LANGUAGE_CODE for code in found})
+
+
+def prepare_translations(campaign) -> dict:
+    """Translate subject and body once per language and store them on the campaign"""
+    service = get_translation_service()
+    translations = dict(campaign.translations or {})
+    for language in campaign_languages():
+        if language in translations:
+            continue
+        subject, body = service.translate_batch([campaign.subject, campaign.body], language)
+        translations[language] = {'subject': subject, 'body': body}
+    campaign.translations = translations
+    campaign.save(update_fields=['translations'])
+    return translations
+
+
+def render_campaign(campaign, language: str) -> tuple:
+    """Render (subject, text, html) once for a language, with an unsubscribe placeholder"""
+    from .models import SiteSettings
+
+    content = campaign.translations.get(language) or {
+        'subject': campaign.subject, 'body': campaign.body,
+    }
+    context = {
+        'subject': content['subject'],
+        'body': content['body'],
+        'language': language,
+        'site_name': SiteSettings.get_settings().site_name,
+        'unsubscribe_url': UNSUBSCRIBE_PLACEHOLDER,
+    }
+    with translation.override(language):
+        text = render_to_string('emails/newsletter_campaign.txt', context)
+        html = render_to_string('emails/newsletter_campaign.html', context)
+    return content['subject'], text, html
+
+
+def iter_subscriber_batches(language: str, after_pk: int = 0, batch_size: int = 500):
+    """
+    Yield lists of (pk, email) for active subscribers of a language segment,
+    using keyset pagination on the primary key.
+    """
+    from .models import Newsletter
+
+    subscribers = Newsletter.objects.filter(is_active=True)
+    if language == settings.LANGUAGE_CODE:
+        # Default segment also collects unknown language codes
+        others = [code for code, _ in settings.LANGUAGES if code != language]
+        subscribers = subscribers.exclude(language__in=others)
+    else:
+        subscribers = subscribers.filter(language=language)
+
+    last_pk = after_pk
+    while True:
+        batch = list(subscribers.filter(pk__gt=last_pk)
+                     .order_by('pk')
+                     .values_list('pk', 'email')[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1][0]
+
+
+def send_campaign(campaign, batch_size: int = None) -> dict:
+    """
+    Queue (or resume queueing) a campaign in the outbox.
+
+    Args:
+        campaign: NewsletterCampaign instance
+        batch_size: Subscribers per keyset batch
+
+    Returns:
+        dict with the queued count for this run
+    """
+    from .models import NewsletterCampaign, OutboundEmail
+
+    batch_size = batch_size or getattr(settings, 'NEWSLETTER_BATCH_SIZE', 500)
+    stats = {'queued': 0}
+
+    claimed = NewsletterCampaign.objects.filter(
+        pk=campaign.pk,
+        status__in=[NewsletterCampaign.Status.DRAFT, NewsletterCampaign.Status.PAUSED],
+    ).update(status=NewsletterCampaign.Status.SENDING, started_at=Coalesce(F('started_at'), Now()))
+    if not claimed:
+        logger.info("Campaign %s is already sending or sent", campaign.pk)
+        return stats
+
+    # Only this run moves the cursor from now on
+    run = uuid.uuid4().hex
+    progress = dict(NewsletterCampaign.objects.values_list('progress', flat=True).get(pk=campaign.pk) or {})
+    progress['run'] = run
+    NewsletterCampaign.objects.filter(pk=campaign.pk).update(progress=progress)
+    owned = NewsletterCampaign.objects.filter(
+        pk=campaign.pk, status=NewsletterCampaign.Status.SENDING, progress__run=run,
+    )
+    prepare_translations(campaign)
+
+    for language in campaign_languages():
+        subject, text, html = render_campaign(campaign, language)
+
+        for batch in iter_subscriber_batches(language, progress.get(language, 0), batch_size):
+            messages = []
+            for pk, email in batch:
+                url = unsubscribe_url(email, language)
+                messages.append({
+                    'to_email': email,
+                    'subject': subject,
+                    'body_text': text.replace(UNSUBSCRIBE_PLACEHOLDER, url),
+                    'body_html': html.replace(UNSUBSCRIBE_PLACEHOLDER, url),
+                    'category': OutboundEmail.Category.NEWSLETTER,
+                    # RFC 8058 one-click: mail clients POST to the link
+                    'headers': {
+                        'List-Unsubscribe': f'<{url}>',
+                        'List-Unsubscribe-Post': 'List-Unsubscribe=One-Click',
+                    },
+                })
+
+            # Move the keyset cursor and queue the batch together, so a
+            # restart resumes after it without queueing anyone twice. Staff
+            # can pause between batches.
+            progress[language] = batch[-1][0]
+            with transaction.atomic():
+                moved = owned.update(progress=progress, sent_count=F('sent_count') + len(messages))
+                if not moved:
+                    logger.info("Campaign %s paused or taken over", campaign.pk)
+                    return stats
+                stats['queued'] += enqueue_many(messages)
+
+    owned.update(
+        status=NewsletterCampaign.Status.SENT,
+        finished_at=timezone.now(),
+    )
+    return stats
@@ -0,0 +1,135 @@
+"""
+N+1 Query Detection
+Groups the SQL executed during a request (or a block of code) by normalized
+statement and call site, and flags statements repeated once per row: the
+same query shape, issued from the same line, NPLUSONE_THRESHOLD times or
+more.
+
+Each finding points at the first frame in project code that issued the
+query (e.g. the `total_donors` property) and, when the query came from a
+template, at the template line that triggered it.
+
+    with nplusone.detect(strict=True):   # raises NPlusOneError on exit
+        client.get(url)
+
+NPlusOneMiddleware runs the detector on every request when NPLUSONE_ENABLED
+(on in development settings); findings are logged as warnings, or raised in strict mode
+(NPLUSONE_STRICT).
+"""
+
+import logging
+import re
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+
+from . import db_router
+
+logger = logging.getLogger(__name__)
+
+_PROJECT_ROOT = str(Path(settings.BASE_DIR).resolve()) + '/'
+# Instrumentation wrapping queries or rendering is never the call site
+_SKIPPED = {_PROJECT_ROOT + name for name in (
+    'apps/core/nplusone.py', 'apps/core/profiling.py', 'apps/core/benchmarking.py', 'apps/core/middleware.py',
+)}
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+_SPACES = re.compile(r'\s+')
+
+
+class NPlusOneError(AssertionError):
+    """Raised in strict mode when repeated per-row queries are found"""
+
+
+def normalize_sql(sql: str) -> str:
+    """Query shape: literals and IN lists replaced by placeholders"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('(...)', sql.replace('%s', '?'))
+    return _SPACES.sub(' ', sql).strip()
+
+
+def _in_project(filename: str) -> bool:
+    return (filename.startswith(_PROJECT_ROOT) and filename not in _SKIPPED
+            and '/site-packages/' not in filename and '/.venv/' not in filename)
+
+
+def call_site(frame=None) -> tuple:
+    """
+    (code location, template location) of the current query.
+    Code location is the innermost frame in project code; template location
+    is the innermost template node being rendered ('' outside templates).
+    """
+    frame = frame or sys._getframe(1)
+    code = template = ''
+    while frame is not None and not (code and template):
+        co = frame.f_code
+        if not code and _in_project(co.co_filename):
+            code = f'{co.co_filename[len(_PROJECT_ROOT):]}:{frame.f_lineno} in {co.co_name}'
+        elif not template and co.co_name == 'render_annotated' and 'django/template' in co.co_filename:
+            node = frame.f_locals.get('self')
+            origin = getattr(node, 'origin', None)
+            token = getattr(node, 'token', None)
+            if origin is not None and token is not None:
+                name = getattr(origin, 'template_name', None) or origin.name
+                template = f'{name}:{token.lineno} {token.contents[:60]}'
+        frame = frame.f_back
+    return code, template
+
+
+class Finding:
+    def __init__(self, sql: str, code: str, template: str, count: int):
+        self.sql = sql
+        self.code = code
+        self.template = template
+        self.count = count
+
+    def __str__(self):
+        where = self.code or '?'
+        if self.template:
+            where += f' (template {self.template})'
+        return f'{self.count}x at {where}: {self.sql[:200]}'
+
+
+class Detector:
+    """connection.execute_wrapper that groups queries by (shape, call site)"""
+
+    def __init__(self, threshold: int = None):
+        self.threshold = threshold or getattr(settings, 'NPLUSONE_THRESHOLD', 3)
+        self.groups = {}  # (shape, code, template) -> count
+
+    def __call__(self, execute, sql, params, many, context):
+        key = (normalize_sql(sql),) + call_site(sys._getframe(1))
+        self.groups[key] = self.groups.get(key, 0) + 1
+        return execute(sql, params, many, context)
+
+    def findings(self) -> list:
+        """Repeated queries, most frequent first"""
+        return sorted(
+            (Finding(sql, code, template, count)
+             for (sql, code, template), count in self.groups.items() if count >= self.threshold),
+            key=lambda finding: -finding.count,
+        )
+
+
+def report(findings, label: str = '', strict: bool = False):
+    """Log findings; raise NPlusOneError in strict mode"""
+    if not findings:
+        return
+    message = f'N+1 queries{" in " + label if label else ""}:\n' + '\n'.join(f'  {f}' for f in findings)
+    if strict:
+        raise NPlusOneError(message)
+    logger.warning(message)
+
+
+@contextmanager
+def detect(threshold: int = None, strict: bool = False, label: str = ''):
+    """Detect N+1 queries in a block; yields the Detector"""
+    detector = Detector(threshold)
+    with db_router.execute_wrapper(detector):
+        yield detector
+    report(detector.findings(), label, strict)
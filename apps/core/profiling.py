@@ -0,0 +1,205 @@
+"""
+Request Profiling
+Per-request breakdown of where time goes: database queries, template
+rendering, cache hits/misses and calls to external APIs (DeepL, Stripe,
+Fapshi).
+
+ProfilingMiddleware (apps/core/middleware.py) starts a RequestProfile for a
+request when it is sampled (PROFILING_SAMPLE_RATE) or may come from staff
+(it carries a session cookie and PROFILING_SERVER_TIMING is on). Staff get
+the numbers in a `Server-Timing` header, visible in the browser's network
+panel; sampled requests are logged as one JSON line on the `fdtm.profiling`
+logger.
+
+Instrumentation reads the current profile from a context variable: when a
+request is not profiled, every hook costs one ContextVar lookup.
+
+Code calling an external service wraps the call with `timed()`:
+
+    with profiling.timed('deepl'):
+        result = translator.translate_text(...)
+"""
+
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.template.backends.django import Template as BackendTemplate
+
+logger = logging.getLogger('fdtm.profiling')
+
+_current = ContextVar('request_profile', default=None)
+_installed = False
+_MISSING = object()
+
+
+class RequestProfile:
+    """Counters for one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.render_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.external = {}  # name -> [calls, seconds]
+        self._render_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """connection.execute_wrapper hook"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_seconds += time.perf_counter() - start
+            self.queries += 1
+
+    def add_external(self, name: str, seconds: float):
+        entry = self.external.setdefault(name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def total_seconds(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Value of the Server-Timing header"""
+        metrics = [
+            f'total;dur={self.total_seconds() * 1000:.1f}',
+            f'db;dur={self.sql_seconds * 1000:.1f};desc="{self.queries} queries"',
+            f'render;dur={self.render_seconds * 1000:.1f}',
+            f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+        ]
+        for name, (calls, seconds) in sorted(self.external.items()):
+            metrics.append(f'{name};dur={seconds * 1000:.1f};desc="{calls} calls"')
+        return ', '.join(metrics)
+
+    def as_dict(self) -> dict:
+        return {
+            'total_ms': round(self.total_seconds() * 1000, 1),
+            'db_queries': self.queries,
+            'db_ms': round(self.sql_seconds * 1000, 1),
+            'render_ms': round(self.render_seconds * 1000, 1),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'external': {
+                name: {'calls': calls, 'ms': round(seconds * 1000, 1)}
+                for name, (calls, seconds) in sorted(self.external.items())
+            },
+        }
+
+
+def current_profile():
+    """The profile of the request being handled, or None"""
+    return _current.get()
+
+
+def start_profile() -> tuple:
+    """Start profiling the current context; returns (profile, token) for stop_profile()"""
+    profile = RequestProfile()
+    return profile, _current.set(profile)
+
+
+def stop_profile(token):
+    _current.reset(token)
+
+
+@contextmanager
+def timed(name: str):
+    """Attribute the duration of the block to external service `name`"""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_external(name, time.perf_counter() - start)
+
+
+def log_profile(request, response, profile: RequestProfile):
+    """One structured log line per sampled request"""
+    match = getattr(request, 'resolver_match', None)
+    record = {
+        'method': request.method,
+        'path': request.path,
+        'view': match.view_name if match else None,
+        'status': response.status_code,
+        **profile.as_dict(),
+    }
+    logger.info(json.dumps(record))
+
+
+# -----------------------------------------------------------------------------
+# Hooks
+
+def _wrap_render(original):
+    def render(template, context=None, request=None):
+        profile = _current.get()
+        if profile is None:
+            return original(template, context, request)
+        profile._render_depth += 1
+        start = time.perf_counter()
+        try:
+            return original(template, context, request)
+        finally:
+            profile._render_depth -= 1
+            if not profile._render_depth:
+                profile.render_seconds += time.perf_counter() - start
+    return render
+
+
+def _wrap_cache_get(original):
+    def get(self, key, default=None, version=None):
+        profile = _current.get()
+        if profile is None:
+            return original(self, key, default, version)
+        value = original(self, key, _MISSING, version)
+        if value is _MISSING:
+            profile.cache_misses += 1
+            return default
+        profile.cache_hits += 1
+        return value
+    return get
+
+
+def _wrap_cache_get_many(original):
+    def get_many(self, keys, version=None):
+        profile = _current.get()
+        if profile is None:
+            return original(self, keys, version)
+        keys = list(keys)
+        found = original(self, keys, version)
+        profile.cache_hits += len(found)
+        profile.cache_misses += len(keys) - len(found)
+        return found
+    return get_many
+
+
+def install():
+    """Patch template rendering and the configured cache backends (once per process)"""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    BackendTemplate.render = _wrap_render(BackendTemplate.render)
+
+    # Shared tiers behind a TwoTierCache are counted by the front cache
+    shared = {getattr(caches[alias], '_shared_alias', None) for alias in caches.settings}
+    patched = set()
+    for alias in caches.settings:
+        backend_class = type(caches[alias])
+        if alias in shared or backend_class in patched:
+            continue
+        patched.add(backend_class)
+        backend_class.get = _wrap_cache_get(backend_class.get)
+        # BaseCache.get_many calls get(), which is already counted
+        if backend_class.get_many is not BaseCache.get_many:
+            backend_class.get_many = _wrap_cache_get_many(backend_class.get_many)
@@ -0,0 +1,172 @@
+"""
+Rate Limiting
+Token buckets per client IP and endpoint, for public POST endpoints.
+
+Bucket state lives in the default cache so every worker enforces the same
+limit. Once a client is out of tokens, the process also remembers it
+locally until the next token is due, so a flood is turned away without
+touching the cache, the session or the database.
+
+Usage:
+    @ratelimit('contact')
+    def contact(request): ...
+
+Limits come from settings.RATE_LIMITS ({'contact': '5/m'}) or the decorator's
+`rate`; the bucket holds up to `burst` tokens (default: the rate's count).
+`allow` is an optional callable(request) -> bool for requests that bypass the
+limit, e.g. provider webhooks with a valid signature.
+"""
+
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+from django.utils.translation import gettext as _
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate: str) -> tuple:
+    """'5/m' -> (5, 60)"""
+    count, _, period = rate.partition('/')
+    return int(count), PERIODS[period[0].lower()] if period else 1
+
+
+def client_ip(request) -> str:
+    """Client address; trusts X-Forwarded-For only behind RATE_LIMIT_PROXY_COUNT proxies"""
+    proxies = getattr(settings, 'RATE_LIMIT_PROXY_COUNT', 0)
+    if proxies:
+        forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+class RateLimiter:
+    """Token bucket limiter with a process-local block list in front of the cache"""
+
+    MAX_LOCAL_KEYS = 10000
+
+    def __init__(self):
+        self._blocked = OrderedDict()  # key -> monotonic time the next token is due
+        self._lock = threading.Lock()
+
+    def blocked_for(self, key: str) -> float:
+        """Seconds this process already knows the key must wait (0 = ask the cache)"""
+        until = self._blocked.get(key)
+        if until is None:
+            return 0
+        remaining = until - time.monotonic()
+        if remaining <= 0:
+            with self._lock:
+                self._blocked.pop(key, None)
+            return 0
+        return remaining
+
+    def _block(self, key: str, seconds: float):
+        with self._lock:
+            self._blocked[key] = time.monotonic() + seconds
+            self._blocked.move_to_end(key)
+            while len(self._blocked) > self.MAX_LOCAL_KEYS:
+                self._blocked.popitem(last=False)
+
+    def hit(self, key: str, rate: str, burst: int = None) -> float:
+        """
+        Take one token for `key`.
+
+        Returns:
+            0 if allowed, otherwise seconds until a token is available
+        """
+        wait = self.blocked_for(key)
+        if wait:
+            return wait
+
+        count, period = parse_rate(rate)
+        capacity = burst or count
+        refill = count / period  # tokens per second
+
+        now = time.time()
+        # Read-modify-write is not atomic across workers; a race lets through
+        # at most one extra request per worker, which is fine for shedding.
+        tokens, updated = cache.get(key) or (capacity, now)
+        tokens = min(capacity, tokens + (now - updated) * refill)
+        if tokens < 1:
+            wait = (1 - tokens) / refill
+            self._block(key, wait)
+            return wait
+        cache.set(key, (tokens - 1, now), int(capacity / refill) + 1)
+        return 0
+
+    def reset(self, key: str = None):
+        with self._lock:
+            if key is None:
+                self._blocked.clear()
+            else:
+                self._blocked.pop(key, None)
+        if key:
+            cache.delete(key)
+
+
+limiter = RateLimiter()
+
+
+def _rejected(request, retry_after: float):
+    message = _("Trop de requêtes. Veuillez réessayer dans quelques instants.")
+    if request.content_type == 'application/json' or request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        response = JsonResponse({'error': message}, status=429)
+    else:
+        response = HttpResponse(message, status=429, content_type='text/plain; charset=utf-8')
+    response['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+    return response
+
+
+def ratelimit(scope: str, rate: str = '10/m', burst: int = None, methods=('POST',), allow=None):
+    """
+    Limit a view per client IP. See the module docstring.
+
+    Args:
+        scope: Name of the limit (key in settings.RATE_LIMITS)
+        rate: Default rate, 'count/period' with period s, m, h or d
+        burst: Bucket size (default: count)
+        methods: HTTP methods that consume tokens
+        allow: Optional callable(request) -> bool; True bypasses the limit
+    """
+    def decorator(view):
+        def check(request):
+            """Returns (key, rate, wait); wait is None when the request is exempt"""
+            if not getattr(settings, 'RATE_LIMIT_ENABLED', True) or request.method not in methods:
+                return None, None, None
+            ip = client_ip(request)
+            if ip in getattr(settings, 'RATE_LIMIT_TRUSTED_IPS', ()):
+                return None, None, None
+            if allow is not None and allow(request):
+                return None, None, None
+            key = f'ratelimit:{scope}:{ip}'
+            view_rate = getattr(settings, 'RATE_LIMITS', {}).get(scope, rate)
+            return key, view_rate, limiter.blocked_for(key)
+
+        if iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def wrapped(request, *args, **kwargs):
+                key, view_rate, wait = check(request)
+                if key:
+                    wait = wait or await sync_to_async(limiter.hit, thread_sensitive=False)(key, view_rate, burst)
+                    if wait:
+                        return _rejected(request, wait)
+                return await view(request, *args, **kwargs)
+        else:
+            @functools.wraps(view)
+            def wrapped(request, *args, **kwargs):
+                key, view_rate, wait = check(request)
+                if key:
+                    wait = wait or limiter.hit(key, view_rate, burst)
+                    if wait:
+                        return _rejected(request, wait)
+                return view(request, *args, **kwargs)
+        return wrapped
+    return decorator
@@ -0,0 +1,120 @@
+"""
+Service Registry
+Process-wide clients for external services (Stripe, Fapshi, DeepL, Backblaze
+B2), built on first use instead of when their module is imported.
+
+Factories are registered by dotted path, so registering a service imports
+nothing: a worker that never translates never loads the DeepL SDK. Each
+client is built once per process, under a per-service lock.
+
+    from apps.core import services
+
+    translator = services.get('deepl')   # None when DeepL is not configured
+
+warmup() builds clients ahead of the first request (each gunicorn worker
+does it before accepting connections).
+
+`python manage.py report_import_time` tracks what importing the project
+costs, and flags the SDKs that were loaded although their service was not
+used.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class Service:
+    """A lazily built client"""
+
+    def __init__(self, name: str, factory: str, modules=()):
+        self.name = name
+        self.factory = factory  # dotted path of a callable returning the client
+        self.modules = tuple(modules)  # top-level modules only this client needs
+        self.instance = _MISSING
+        self.lock = threading.Lock()
+
+    @property
+    def built(self) -> bool:
+        return self.instance is not _MISSING
+
+    def get(self):
+        if self.instance is _MISSING:
+            with self.lock:
+                if self.instance is _MISSING:
+                    self.instance = import_string(self.factory)()
+        return self.instance
+
+    def reset(self):
+        with self.lock:
+            self.instance = _MISSING
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def register(name: str, factory: str, modules=()):
+    """Register (or replace) the factory of service `name`"""
+    with _registry_lock:
+        _registry[name] = Service(name, factory, modules)
+
+
+def registered() -> dict:
+    """{name: Service}, defaults and SERVICE_FACTORIES included"""
+    return dict(_registry)
+
+
+def get(name: str):
+    """The client of service `name`, built on first call"""
+    try:
+        service = _registry[name]
+    except KeyError:
+        raise LookupError(f'Unknown service: {name}') from None
+    return service.get()
+
+
+def reset(name: str = None):
+    """Drop one (or every) client so the next get() rebuilds it from settings (tests)"""
+    for service in ([_registry[name]] if name else list(_registry.values())):
+        service.reset()
+
+
+def warmup(names=None) -> dict:
+    """
+    Build clients now, e.g. in a gunicorn worker before its first request.
+
+    Args:
+        names: Services to build (default: settings.SERVICES_WARMUP)
+
+    Returns:
+        {name: seconds spent building}; failures are logged, not raised
+    """
+    if names is None:
+        names = getattr(settings, 'SERVICES_WARMUP', list(_registry))
+    timings = {}
+    for name in names:
+        start = time.perf_counter()
+        try:
+            get(name)
+        except Exception:
+            logger.exception('Could not build service %s', name)
+            continue
+        timings[name] = time.perf_counter() - start
+    return timings
+
+
+register('stripe', 'apps.donations.services.stripe_service.build_client', modules=['stripe'])
+register('fapshi', 'apps.donations.services.fapshi_service.build_client', modules=['requests', 'httpx'])
+register('deepl', 'apps.core.translation_service.build_translator', modules=['deepl'])
+register('b2_storage', 'apps.core.storage.get_b2_storage', modules=['boto3', 'botocore', 'storages'])
+
+for _name, _factory in getattr(settings, 'SERVICE_FACTORIES', {}).items():
+    register(_name, _factory)
@@ -11,21 +11,9 @@ class BackblazeB2Storage(S3Boto3Storage):
     """
     Custom storage backend for Backblaze B2.
     Uses S3-compatible API provided by Backblaze.
+    Settings are read when the storage is created, not when this module is imported.
     """
     
-    # Override bucket name from settings
-    bucket_name = settings.B2_BUCKET_NAME
-    
-    # Use custom domain if set
-    custom_domain = settings.B2_BUCKET_URL.replace('https://', '') if settings.B2_BUCKET_URL else None
-    
-    # B2 S3-compatible endpoint
-    endpoint_url = f"https://s3.{getattr(settings, 'B2_REGION', 'us-west-004')}.backblazeb2.com"
-    
-    # Access keys
-    access_key = settings.B2_APPLICATION_KEY_ID
-    secret_key = settings.B2_APPLICATION_KEY
-    
     # File settings
     file_overwrite = False
     default_acl = 'public-read'
@@ -34,6 +22,19 @@ class BackblazeB2Storage(S3Boto3Storage):
     object_parameters = {
         'CacheControl': 'max-age=86400',
     }
+    
+    def __init__(self, **kwargs):
+        kwargs.setdefault('bucket_name', settings.B2_BUCKET_NAME)
+        # Use custom domain if set
+        kwargs.setdefault('custom_domain',
+                          settings.B2_BUCKET_URL.replace('https://', '') if settings.B2_BUCKET_URL else None)
+        # B2 S3-compatible endpoint
+        kwargs.setdefault('endpoint_url',
+                          f"https://s3.{getattr(settings, 'B2_REGION', 'us-west-004')}.backblazeb2.com")
+        # Access keys
+        kwargs.setdefault('access_key', settings.B2_APPLICATION_KEY_ID)
+        kwargs.setdefault('secret_key', settings.B2_APPLICATION_KEY)
+        super().__init__(**kwargs)
 
 
 class BackblazeB2MediaStorage(BackblazeB2Storage):
@@ -47,7 +48,10 @@ class BackblazeB2StaticStorage(BackblazeB2Storage):
 
 
 def get_b2_storage():
-    """Helper function to get configured B2 storage or fall back to local storage"""
+    """
+    Helper function to get configured B2 storage or fall back to local storage.
+    Use services.get('b2_storage') for the process-wide instance.
+    """
     if all([
         settings.B2_APPLICATION_KEY_ID,
         settings.B2_APPLICATION_KEY,
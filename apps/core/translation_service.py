@@ -3,16 +3,28 @@ Translation Service
 Auto-translation using DeepL API for French-first content.
 """
 
-try:
-    import deepl
-    DEEPL_AVAILABLE = True
-except ImportError:
-    DEEPL_AVAILABLE = False
-    deepl = None
+import hashlib
+import importlib.util
 
 from django.conf import settings
 from django.core.cache import cache
-import hashlib
+
+from . import metrics, profiling, services
+
+# The SDK (and requests) is imported by build_translator(), on first translation
+DEEPL_AVAILABLE = importlib.util.find_spec('deepl') is not None
+
+
+def build_translator():
+    """DeepL client (services.get('deepl')); None when not configured"""
+    api_key = getattr(settings, 'DEEPL_API_KEY', '')
+    if not (api_key and DEEPL_AVAILABLE):
+        return None
+    import deepl
+    try:
+        return deepl.Translator(api_key)
+    except Exception:
+        return None
 
 
 class TranslationService:
@@ -33,15 +45,9 @@ class TranslationService:
     # Cache timeout (1 week)
     CACHE_TIMEOUT = 60 * 60 * 24 * 7
     
-    def __init__(self):
-        self.api_key = getattr(settings, 'DEEPL_API_KEY', '')
-        self.translator = None
-        
-        if self.api_key and DEEPL_AVAILABLE:
-            try:
-                self.translator = deepl.Translator(self.api_key)
-            except Exception:
-                pass
+    @property
+    def translator(self):
+        return services.get('deepl')
     
     def _get_cache_key(self, text: str, source_lang: str, target_lang: str) -> str:
         """Generate a unique cache key for a translation"""
@@ -84,15 +90,19 @@ class TranslationService:
             cache_key = self._get_cache_key(text, source_lang, target_lang)
             cached = cache.get(cache_key)
             if cached:
+                metrics.TRANSLATION_CACHE.inc(result='hit')
                 return cached
+            metrics.TRANSLATION_CACHE.inc(result='miss')
         
         try:
-            result = self.translator.translate_text(
-                text,
-                source_lang=deepl_source,
-                target_lang=deepl_target,
-                preserve_formatting=True,
-            )
+            metrics.DEEPL_CHARACTERS.inc(len(text))
+            with profiling.timed('deepl'):
+                result = self.translator.translate_text(
+                    text,
+                    source_lang=deepl_source,
+                    target_lang=deepl_target,
+                    preserve_formatting=True,
+                )
             
             translated = result.text
             
@@ -138,12 +148,14 @@ class TranslationService:
         deepl_target = self.LANGUAGE_MAP.get(target_lang, 'EN-US')
         
         try:
-            results = self.translator.translate_text(
-                texts,
-                source_lang=deepl_source,
-                target_lang=deepl_target,
-                preserve_formatting=True,
-            )
+            metrics.DEEPL_CHARACTERS.inc(sum(len(text) for text in texts))
+            with profiling.timed('deepl'):
+                results = self.translator.translate_text(
+                    texts,
+                    source_lang=deepl_source,
+                    target_lang=deepl_target,
+                    preserve_formatting=True,
+                )
             
             return [r.text for r in results]
             
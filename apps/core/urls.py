@@ -12,6 +12,7 @@ urlpatterns = [
     path('confidentialite/', views.privacy, name='privacy'),
     path('mentions-legales/', views.terms, name='terms'),
     path('newsletter/', views.newsletter_subscribe, name='newsletter_subscribe'),
+    path('newsletter/desinscription/<str:token>/', views.newsletter_unsubscribe, name='newsletter_unsubscribe'),
     path('evenements/', views.events_list, name='events'),
     path('galerie/', views.gallery, name='gallery'),
 ]
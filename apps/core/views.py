@@ -3,22 +3,33 @@ Core App Views
 Homepage, about, contact, and legal pages.
 """
 
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse
 from django.shortcuts import render, redirect
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
 from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
-from .models import SiteSettings, TeamMember, Testimonial, Partner, ImpactStat, FAQ, ContactMessage, Newsletter, Event, HomeChapter
+from .models import SiteSettings, TeamMember, Testimonial, Partner, ImpactStat, FAQ, ContactMessage, Newsletter, Event, HomeChapter, OutboundEmail
+from .email_service import enqueue_template
+from . import metrics
+from .ratelimit import client_ip, ratelimit
+from .newsletter_service import email_from_token, unsubscribe
 from apps.projects.models import Project
 from apps.articles.models import Article
+from apps.donations.services.aggregates import prefetch_total_donors
 
 
 def home(request):
     """Homepage with featured content"""
     context = {
-        'featured_projects': Project.objects.filter(
+        'featured_projects': prefetch_total_donors(Project.objects.filter(
             status='active', 
             is_featured=True
-        ).select_related('category')[:3],
+        ).select_related('category')[:3]),
         'recent_articles': Article.objects.filter(
             status='published'
         ).select_related('category')[:3],
@@ -32,7 +43,7 @@ def home(request):
             is_published=True,
             event_date__gt=timezone.now()
         )[:3],
-        'home_chapters': HomeChapter.objects.filter(is_published=True),
+        'home_chapters': HomeChapter.objects.filter(is_published=True).select_related('gallery_image'),
     }
     return render(request, 'core/home.html', context)
 
@@ -48,6 +59,7 @@ def about(request):
     return render(request, 'core/about.html', context)
 
 
+@ratelimit('contact')
 def contact(request):
     """Contact page with form"""
     if request.method == 'POST':
@@ -67,6 +79,17 @@ def contact(request):
                 message=message,
                 ip_address=request.META.get('REMOTE_ADDR')
             )
+            
+            # Queue acknowledgement + staff notification (delivered by send_queued_email)
+            site = SiteSettings.get_settings()
+            email_context = {
+                'name': name, 'email': email, 'phone': phone,
+                'subject': subject, 'message': message, 'site_name': site.site_name,
+            }
+            enqueue_template(email, _("Nous avons bien reçu votre message"), 'contact_ack',
+                             email_context, category=OutboundEmail.Category.CONTACT)
+            enqueue_template(site.contact_email, f"[Contact] {subject}", 'contact_notification',
+                             email_context, category=OutboundEmail.Category.CONTACT, reply_to=email)
             messages.success(request, _("Votre message a été envoyé avec succès. Nous vous répondrons bientôt."))
             return redirect('core:contact')
         else:
@@ -89,6 +112,7 @@ def terms(request):
     return render(request, 'core/terms.html')
 
 
+@ratelimit('newsletter')
 def newsletter_subscribe(request):
     """Newsletter subscription handler"""
     if request.method == 'POST':
@@ -101,6 +125,12 @@ def newsletter_subscribe(request):
                 defaults={'name': name, 'language': request.LANGUAGE_CODE}
             )
             if created:
+                enqueue_template(
+                    email, _("Bienvenue dans la newsletter FDTM"), 'newsletter_welcome',
+                    {'name': name, 'site_name': SiteSettings.get_settings().site_name},
+                    language=newsletter.language,
+                    category=OutboundEmail.Category.NEWSLETTER,
+                )
                 messages.success(request, _("Merci pour votre inscription à notre newsletter !"))
             else:
                 messages.info(request, _("Vous êtes déjà inscrit à notre newsletter."))
@@ -108,6 +138,29 @@ def newsletter_subscribe(request):
     return redirect(request.META.get('HTTP_REFERER', 'core:home'))
 
 
+@csrf_exempt  # the signed token authorizes the POST; one-click clients send no CSRF token
+@require_http_methods(['GET', 'POST'])
+def newsletter_unsubscribe(request, token):
+    """
+    Unsubscribe link from newsletter emails.
+    GET only shows a confirmation form (link scanners prefetch URLs); the
+    form and RFC 8058 one-click clients POST to unsubscribe.
+    """
+    email = email_from_token(token)
+    if not email:
+        messages.error(request, _("Ce lien de désinscription n'est pas valide ou a expiré."))
+        return redirect('core:home')
+    
+    if request.method == 'GET':
+        return render(request, 'core/newsletter_unsubscribe.html', {'email': email})
+    
+    unsubscribe([email])
+    if request.POST.get('List-Unsubscribe') == 'One-Click':
+        return HttpResponse(status=200)
+    messages.success(request, _("Vous avez été désinscrit de notre newsletter."))
+    return redirect('core:home')
+
+
 def events_list(request):
     """Events page with animated timeline"""
     upcoming_events = Event.objects.filter(
@@ -134,7 +187,7 @@ def gallery(request):
     # Get filter by project if specified
     project_slug = request.GET.get('project')
     
-    images = GalleryImage.objects.filter(is_published=True)
+    images = GalleryImage.objects.filter(is_published=True).select_related('project')
     
     if project_slug:
         images = images.filter(project__slug=project_slug)
@@ -153,3 +206,18 @@ def gallery(request):
     return render(request, 'core/gallery.html', context)
 
 
+def metrics_endpoint(request):
+    """
+    Prometheus scrape endpoint.
+    Requires `Authorization: Bearer <METRICS_TOKEN>` when a token is set,
+    otherwise a client address in METRICS_ALLOWED_IPS (none by default in
+    production, so that /metrics is closed until a token is configured).
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        allowed = hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}')
+    else:
+        allowed = client_ip(request) in getattr(settings, 'METRICS_ALLOWED_IPS', ['127.0.0.1', '::1'])
+    if not allowed:
+        return HttpResponse(status=403)
+    return HttpResponse(metrics.registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
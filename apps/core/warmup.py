@@ -0,0 +1,162 @@
+"""
+Worker Warmup
+Pays the first-request costs of a process before it serves traffic:
+compiled templates, populated URL resolvers and gettext catalogs for every
+language, external service clients, and the cached SiteSettings, donate
+page bundles and funding snapshots.
+
+Run by every gunicorn worker once it has loaded the application
+(gunicorn.conf.py, `post_worker_init`) and before it accepts a connection,
+so a new worker's first request is as fast as its hundredth. The master
+never imports the project: a reload (SIGHUP) forks workers that load and
+warm the new code.
+
+The cache entries are shared, so they are warmed once per deploy by
+`python manage.py warmup` rather than by each worker (SHARED_STEPS).
+
+Translations: the gettext catalogs are loaded by the 'catalogs' step. The
+DeepL cache (translation_service) is not warmed: no page translates at
+render time (the auto_translate tags are not used by any template, and
+campaigns translate once per send), so warming it would only spend DeepL
+characters on text nobody reads.
+"""
+
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.urls import URLPattern, URLResolver, get_resolver, resolve, reverse
+from django.urls.exceptions import NoReverseMatch, Resolver404
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_EXTENSIONS = ('.html', '.txt', '.xml')
+
+
+def compile_templates() -> int:
+    """Compile every project template into the cached loader; returns the count"""
+    base_dir = str(settings.BASE_DIR)
+    count = 0
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        # Project templates only: the admin's stay lazy
+        for directory in engine.template_dirs:
+            directory = str(directory)
+            if not directory.startswith(base_dir):
+                continue
+            for root, _, files in os.walk(directory):
+                for filename in files:
+                    if not filename.endswith(TEMPLATE_EXTENSIONS):
+                        continue
+                    name = os.path.relpath(os.path.join(root, filename), directory)
+                    try:
+                        engine.get_template(name)
+                    except Exception as e:
+                        logger.warning('Template %s does not compile: %s', name, e)
+                        continue
+                    count += 1
+    return count
+
+
+def _url_names(patterns, namespace=''):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            prefix = f'{namespace}{pattern.namespace}:' if pattern.namespace else namespace
+            yield from _url_names(pattern.url_patterns, prefix)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield namespace + pattern.name
+
+
+def resolve_urls() -> int:
+    """Populate the resolvers of every language by reversing and resolving each named URL"""
+    names = sorted(set(_url_names(get_resolver().url_patterns)))
+    count = 0
+    for code, _ in settings.LANGUAGES:
+        with translation.override(code):
+            for name in names:
+                try:
+                    resolve(reverse(name))
+                except (NoReverseMatch, Resolver404):
+                    continue  # needs arguments; its resolver is populated anyway
+                count += 1
+    return count
+
+
+def load_catalogs() -> int:
+    """Load the gettext catalog of every language"""
+    for code, _ in settings.LANGUAGES:
+        with translation.override(code):
+            translation.gettext('Faire un don')
+    return len(settings.LANGUAGES)
+
+
+def preload_singletons() -> int:
+    """Build the external service clients (SERVICES_WARMUP) and the translation service"""
+    from . import services
+    from .translation_service import get_translation_service
+
+    get_translation_service()
+    return len(services.warmup())
+
+
+def warm_caches() -> int:
+    """SiteSettings, donate page bundles per language and funding snapshots"""
+    from apps.core.models import SiteSettings
+    from apps.donations.services.page_cache import get_donate_context, get_project_donate_context
+    from apps.projects.models import Project
+    from apps.projects.progress import VISIBLE_STATUSES, get_progress
+
+    SiteSettings.get_settings()
+    active = list(Project.objects.filter(status='active').values_list('slug', flat=True))
+    count = 1
+    for code, _ in settings.LANGUAGES:
+        with translation.override(code):
+            get_donate_context()
+            for slug in active:
+                get_project_donate_context(slug)
+            count += 1 + len(active)
+    for slug in Project.objects.filter(status__in=VISIBLE_STATUSES).values_list('slug', flat=True):
+        get_progress(slug)
+        count += 1
+    return count
+
+
+STEPS = {
+    'templates': compile_templates,
+    'urls': resolve_urls,
+    'catalogs': load_catalogs,
+    'singletons': preload_singletons,
+    'caches': warm_caches,
+}
+
+# Steps whose result lives in process memory, run by every worker
+PROCESS_STEPS = ('templates', 'urls', 'catalogs', 'singletons')
+# Steps filling the shared caches, run once per deploy
+SHARED_STEPS = ('caches',)
+
+
+def warmup(steps=None, log=None) -> dict:
+    """
+    Run warmup steps (default: all). A failing step is logged and skipped,
+    so a warmup problem never keeps the server from starting.
+
+    Returns:
+        {step: (items warmed, seconds)} for the steps that succeeded
+    """
+    log = log or logger.info
+    results = {}
+    for name in steps or STEPS:
+        start = time.perf_counter()
+        try:
+            count = STEPS[name]()
+        except Exception:
+            logger.exception('Warmup step %s failed', name)
+            continue
+        results[name] = (count, time.perf_counter() - start)
+        log(f'Warmup {name}: {count} in {results[name][1] * 1000:.0f}ms')
+    return results
@@ -2,21 +2,29 @@
 Donations Admin Configuration
 """
 
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
-from .models import Donation, MaterialContribution, DonationImpact
+from apps.core.exports import ExportMixin
+from .models import (Donation, MaterialContribution, DonationImpact, DailyDonationAggregate, ExchangeRate,
+                     FundingRollup)
+from .services.aggregates import funding_summary
+from .services.materials import deliver_contributions
+from .services.notifications import queue_thank_you_emails
+from .services.receipts import queue_receipts
 
 
 @admin.register(Donation)
-class DonationAdmin(admin.ModelAdmin):
+class DonationAdmin(ExportMixin, admin.ModelAdmin):
     list_display = ['reference_short', 'donor_display', 'formatted_amount', 'project_display', 
                     'payment_method', 'status_badge', 'created_at']
     list_filter = ['status', 'payment_method', 'currency', 'is_anonymous', 'created_at']
     search_fields = ['donor_name', 'donor_email', 'reference']
+    list_select_related = ['project']
     date_hierarchy = 'created_at'
     readonly_fields = ['reference', 'stripe_payment_intent_id', 'stripe_session_id', 
-                       'fapshi_transaction_id', 'created_at', 'completed_at']
+                       'fapshi_transaction_id', 'created_at', 'completed_at',
+                       'converted_amount', 'converted_currency', 'exchange_rate', 'receipt_file']
     
     fieldsets = (
         (_('Référence'), {
@@ -28,12 +36,16 @@ class DonationAdmin(admin.ModelAdmin):
         (_('Don'), {
             'fields': ('amount', 'currency', 'project', 'project_need', 'message')
         }),
+        (_('Conversion'), {
+            'fields': ('converted_amount', 'converted_currency', 'exchange_rate'),
+            'classes': ('collapse',)
+        }),
         (_('Paiement'), {
             'fields': ('payment_method', 'status', 'stripe_payment_intent_id', 
                       'stripe_session_id', 'fapshi_transaction_id')
         }),
         (_('Suivi'), {
-            'fields': ('receipt_sent', 'thank_you_sent', 'created_at', 'completed_at'),
+            'fields': ('receipt_sent', 'receipt_file', 'thank_you_sent', 'created_at', 'completed_at'),
             'classes': ('collapse',)
         }),
     )
@@ -66,7 +78,15 @@ class DonationAdmin(admin.ModelAdmin):
         )
     status_badge.short_description = _("Statut")
     
-    actions = ['mark_completed', 'send_receipt', 'send_thank_you']
+    export_columns = [
+        'reference', 'created_at', 'completed_at', 'status', 'donor_name', 'donor_email',
+        'is_anonymous', 'amount', 'currency', 'converted_amount', 'converted_currency',
+        'payment_method', (_("Projet"), 'project__title'), (_("Besoin"), 'project_need__title'),
+        'receipt_sent',
+    ]
+    export_select_related = ['project', 'project_need']
+    
+    actions = ['mark_completed', 'send_receipt', 'send_thank_you', 'export_csv', 'export_xlsx']
     
     @admin.action(description=_("Marquer comme complété"))
     def mark_completed(self, request, queryset):
@@ -76,17 +96,31 @@ class DonationAdmin(admin.ModelAdmin):
     
     @admin.action(description=_("Envoyer le reçu"))
     def send_receipt(self, request, queryset):
-        # TODO: Implement receipt sending
-        self.message_user(request, _("Fonctionnalité à implémenter"))
+        ids = list(queryset.filter(status='completed', receipt_sent=False).values_list('pk', flat=True))
+        if not ids:
+            self.message_user(request, _("Aucun don complété sans reçu dans la sélection."), messages.WARNING)
+            return
+        # Rendered by `manage.py generate_receipts --queued`, never in the web worker
+        count = queue_receipts(ids)
+        self.message_user(
+            request,
+            _("%(count)s reçus mis en file d'attente de génération.") % {'count': count}
+        )
     
     @admin.action(description=_("Envoyer le remerciement"))
     def send_thank_you(self, request, queryset):
-        # TODO: Implement thank you email
-        self.message_user(request, _("Fonctionnalité à implémenter"))
+        donations = queryset.filter(status='completed', thank_you_sent=False).select_related('project')
+        # Emails are queued in the outbox and delivered by send_queued_email
+        queued = queue_thank_you_emails(donations)
+        Donation.objects.filter(pk__in=queued).update(thank_you_sent=True)
+        self.message_user(
+            request,
+            _("%(count)s remerciements mis en file d'envoi.") % {'count': len(queued)}
+        )
 
 
 @admin.register(MaterialContribution)
-class MaterialContributionAdmin(admin.ModelAdmin):
+class MaterialContributionAdmin(ExportMixin, admin.ModelAdmin):
     list_display = ['reference_short', 'contributor_name', 'project_need', 'quantity', 
                     'status', 'delivery_date']
     list_filter = ['status', 'created_at']
@@ -98,13 +132,23 @@ class MaterialContributionAdmin(admin.ModelAdmin):
         return str(obj.reference)[:8]
     reference_short.short_description = _("Réf.")
     
-    actions = ['mark_delivered']
+    export_columns = [
+        'reference', 'created_at', 'status', 'contributor_name', 'contributor_email',
+        'contributor_phone', (_("Projet"), 'project_need__project__title'),
+        (_("Besoin"), 'project_need__title'), 'description', 'quantity', 'estimated_value',
+        'delivery_date',
+    ]
+    export_select_related = ['project_need__project']
+    
+    actions = ['mark_delivered', 'export_csv', 'export_xlsx']
     
     @admin.action(description=_("Marquer comme livré"))
     def mark_delivered(self, request, queryset):
-        for contribution in queryset.filter(status='confirmed'):
-            contribution.mark_delivered()
-        self.message_user(request, _("Les contributions sélectionnées ont été marquées comme livrées."))
+        count = deliver_contributions(queryset.filter(status='confirmed'))
+        self.message_user(
+            request,
+            _("%(count)s contributions marquées comme livrées.") % {'count': count}
+        )
 
 
 @admin.register(DonationImpact)
@@ -116,3 +160,77 @@ class DonationImpactAdmin(admin.ModelAdmin):
     def description_short(self, obj):
         return obj.description[:50] + '...' if len(obj.description) > 50 else obj.description
     description_short.short_description = _("Description")
+
+
+@admin.register(ExchangeRate)
+class ExchangeRateAdmin(admin.ModelAdmin):
+    list_display = ['currency', 'rate', 'effective_date', 'source']
+    list_filter = ['currency', 'source']
+    date_hierarchy = 'effective_date'
+
+
+@admin.register(DailyDonationAggregate)
+class DailyDonationAggregateAdmin(admin.ModelAdmin):
+    """Read-only reporting dashboard backed by the materialized aggregates"""
+    list_display = ['date', 'project', 'project_need', 'currency', 'payment_method',
+                    'status', 'total_amount', 'converted_total', 'donation_count', 'donor_estimate']
+    list_filter = ['status', 'currency', 'payment_method', 'project', 'date']
+    list_select_related = ['project', 'project_need']
+    date_hierarchy = 'date'
+    exclude = ['donor_sketch']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def changelist_view(self, request, extra_context=None):
+        response = super().changelist_view(request, extra_context=extra_context)
+        try:
+            queryset = response.context_data['cl'].queryset
+        except (AttributeError, KeyError):
+            return response
+        
+        # Summary over the filtered buckets (status filter applies if set)
+        status = request.GET.get('status__exact', 'completed')
+        summary = funding_summary(status=status, pk__in=queryset.values('pk'))
+        totals = ', '.join(f"{amount:,.2f} {currency}" for currency, amount in summary['totals'].items())
+        self.message_user(
+            request,
+            _("Total (%(status)s) : %(totals)s — %(count)s dons, ~%(donors)s donateurs distincts") % {
+                'status': status,
+                'totals': totals or '0',
+                'count': summary['donation_count'],
+                'donors': summary['donor_count'],
+            },
+        )
+        return response
+
+
+@admin.register(FundingRollup)
+class FundingRollupAdmin(admin.ModelAdmin):
+    """Read-only funding time series (hourly/daily/weekly buckets)"""
+    list_display = ['bucket_start', 'resolution', 'project', 'project_need', 'amount',
+                    'cumulative', 'goal_share', 'donation_count']
+    list_filter = ['resolution', 'project']
+    list_select_related = ['project', 'project_need']
+    date_hierarchy = 'bucket_start'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def goal_share(self, obj):
+        goal = obj.project_need.target_amount if obj.project_need_id else obj.project.goal_amount
+        if not goal:
+            return '-'
+        percentage = min(float(obj.cumulative / goal) * 100, 100)
+        return format_html(
+            '<div style="width:120px;background:#eee;border-radius:4px">'
+            '<div style="width:{}%;background:#2d6a4f;height:8px;border-radius:4px"></div></div>',
+            f'{percentage:.0f}'
+        )
+    goal_share.short_description = _("Objectif")
@@ -0,0 +1,115 @@
+"""
+Management command to load-test checkout creation against a running server.
+
+Compare WSGI and ASGI with stubbed providers (no real payment calls):
+
+    export PAYMENT_FAKE_LATENCY=0.3 RATE_LIMIT_ENABLED=False
+    gunicorn fdtm.wsgi -w 4 -b 127.0.0.1:8001
+    uvicorn fdtm.asgi:application --workers 4 --port 8002
+
+    python manage.py benchmark_checkout --base-url http://127.0.0.1:8001
+    python manage.py benchmark_checkout --base-url http://127.0.0.1:8002 --async-view
+
+Every request creates a pending donation; run it against a scratch database.
+The load comes from one IP, so the checkout rate limit must be off.
+"""
+
+import asyncio
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+    httpx = None
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class Command(BaseCommand):
+    help = 'Measure checkout throughput and latency of a running server (sync or async view)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--async-view', action='store_true', help='Target create_checkout_async')
+        parser.add_argument('--requests', type=int, default=1000, help='Total checkouts to create')
+        parser.add_argument('--concurrency', type=int, default=100, help='Requests in flight')
+        parser.add_argument('--method', default='stripe', choices=['stripe', 'fapshi'])
+        parser.add_argument('--timeout', type=float, default=30)
+
+    def handle(self, *args, **options):
+        if not HTTPX_AVAILABLE:
+            raise CommandError('httpx is required: pip install httpx')
+
+        view = 'donations:create_checkout_async' if options['async_view'] else 'donations:create_checkout'
+        url = options['base_url'].rstrip('/') + reverse(view)
+        self.stdout.write(f"POST {url} x{options['requests']} (concurrency {options['concurrency']})")
+
+        results = asyncio.run(self.run(url, options))
+        self.report(*results)
+
+    async def run(self, url, options):
+        limits = httpx.Limits(max_connections=options['concurrency'])
+        async with httpx.AsyncClient(timeout=options['timeout'], limits=limits) as client:
+            # CSRF cookie from the donate page
+            response = await client.get(options['base_url'].rstrip('/') + reverse('donations:donate'))
+            token = response.cookies.get('csrftoken') or client.cookies.get('csrftoken', '')
+            headers = {
+                'X-CSRFToken': token,
+                'Referer': url,
+                'Content-Type': 'application/json',
+            }
+
+            latencies, statuses = [], {}
+            queue = asyncio.Queue()
+            for i in range(options['requests']):
+                queue.put_nowait(i)
+
+            async def worker():
+                while True:
+                    try:
+                        i = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    body = json.dumps({
+                        'amount': 25,
+                        'name': f'Load {i}',
+                        'email': f'load{i}@example.org',
+                        'phone': '+237600000000',
+                        'payment_method': options['method'],
+                    })
+                    start = time.perf_counter()
+                    try:
+                        response = await client.post(url, content=body, headers=headers)
+                        status = response.status_code
+                    except httpx.HTTPError as e:
+                        status = type(e).__name__
+                    latencies.append(time.perf_counter() - start)
+                    statuses[status] = statuses.get(status, 0) + 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(options['concurrency'])))
+            return latencies, statuses, time.perf_counter() - started
+
+    def report(self, latencies, statuses, elapsed):
+        ok = statuses.get(200, 0)
+        self.stdout.write(f'Completed in {elapsed:.2f}s: {len(latencies) / elapsed:.1f} req/s, '
+                          f'{ok / elapsed:.1f} successful checkouts/s')
+        self.stdout.write('Latency: ' + ', '.join(
+            f'p{pct}={percentile(latencies, pct) * 1000:.0f}ms' for pct in (50, 95, 99)
+        ))
+        self.stdout.write('Responses: ' + ', '.join(f'{k}: {v}' for k, v in sorted(statuses.items(), key=str)))
+        if ok == len(latencies):
+            self.stdout.write(self.style.SUCCESS('✅ All checkouts created'))
+        else:
+            self.stdout.write(self.style.WARNING(f'⚠️ {len(latencies) - ok} requests failed'))
@@ -0,0 +1,65 @@
+"""
+Management command to generate tax receipts, e.g. for year-end campaigns.
+With --queued it renders the receipts queued from the admin; run it from
+cron, or as a long-lived worker with --loop.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.donations.models import Donation
+from apps.donations.services.receipts import generate_receipts, queued_receipt_ids
+
+
+class Command(BaseCommand):
+    help = 'Render and store tax receipts for completed donations using a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help='Only donations completed in this year')
+        parser.add_argument('--workers', type=int, help='Number of worker processes')
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate receipts that were already issued',
+        )
+        parser.add_argument('--queued', action='store_true',
+                            help='Only donations queued from the admin "Envoyer le reçu" action')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for queued donations (with --queued)')
+        parser.add_argument('--interval', type=float, default=30.0,
+                            help='Seconds to sleep when nothing is queued (with --loop)')
+
+    def handle(self, *args, **options):
+        if options['queued']:
+            return self.handle_queued(options)
+
+        donations = Donation.objects.filter(status=Donation.Status.COMPLETED)
+        if options['year']:
+            donations = donations.filter(completed_at__year=options['year'])
+        if not options['force']:
+            donations = donations.filter(receipt_sent=False)
+
+        ids = list(donations.values_list('pk', flat=True))
+        self.stdout.write(f'Generating {len(ids)} receipts...')
+        count = generate_receipts(
+            ids,
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+            force=options['force'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'✅ {count} receipts generated'))
+
+    def handle_queued(self, options):
+        total = 0
+        while True:
+            ids = queued_receipt_ids()
+            count = generate_receipts(ids, workers=options['workers'], batch_size=options['batch_size'])
+            if count:
+                total += count
+                self.stdout.write(f'  ✓ {count} queued receipts generated')
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f'✅ {total} receipts generated'))
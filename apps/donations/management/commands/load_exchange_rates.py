@@ -0,0 +1,33 @@
+"""
+Management command to load exchange rates from a local JSON or CSV file,
+then credit the donations that were waiting for a rate.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.donations.services.currency import credit_pending_donations, load_rates_file
+
+
+class Command(BaseCommand):
+    help = 'Load exchange rates (currency, rate, effective_date) into the ExchangeRate table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            help='JSON or CSV file with rates (default: settings.FX_RATES_FILE)',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path'] or settings.FX_RATES_FILE
+        try:
+            count = load_rates_file(path)
+        except FileNotFoundError:
+            raise CommandError(f'Rates file not found: {path}')
+        except (KeyError, ValueError) as e:
+            raise CommandError(f'Invalid rates file {path}: {e}')
+        credited = credit_pending_donations()
+        if credited:
+            self.stdout.write(f'  ✓ Credited {credited} donations that were waiting for a rate')
+        self.stdout.write(self.style.SUCCESS(f'✅ {count} exchange rates loaded from {path}'))
@@ -0,0 +1,37 @@
+"""
+Management command to rebuild the daily donation aggregates from raw donations.
+"""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.donations.services.aggregates import rebuild_aggregates
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the DailyDonationAggregate table from raw Donation rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help='Only rebuild buckets from this date on (YYYY-MM-DD)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Number of donations fetched per database round trip',
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError('--since must be a date in YYYY-MM-DD format')
+
+        self.stdout.write('Rebuilding daily donation aggregates...')
+        count = rebuild_aggregates(since=since, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'✅ {count} aggregate rows written'))
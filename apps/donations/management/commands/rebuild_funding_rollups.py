@@ -0,0 +1,32 @@
+"""
+Management command to rebuild the funding time series from completed donations.
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.donations.services.timeseries import prune_hourly, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the FundingRollup table (hourly/daily/weekly charts) from completed donations'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Only delete hourly buckets older than FUNDING_HOURLY_RETENTION_DAYS',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Number of donations fetched per database round trip',
+        )
+
+    def handle(self, *args, **options):
+        if not options['prune']:
+            self.stdout.write('Rebuilding funding time series...')
+            count = rebuild_rollups(chunk_size=options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(f'✅ {count} rollup rows written'))
+        deleted = prune_hourly()
+        self.stdout.write(self.style.SUCCESS(f'✅ {deleted} old hourly rows pruned'))
@@ -0,0 +1,49 @@
+"""
+Management command to re-convert historical donations into project currencies.
+Project and need totals, daily aggregates and funding rollups are derived
+from the converted amounts, so they are always recomputed afterwards.
+"""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.donations.services.aggregates import rebuild_aggregates
+from apps.donations.services.currency import reconvert_donations, recompute_funding_totals
+from apps.donations.services.timeseries import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = ('Recompute converted amounts of completed donations from the ExchangeRate table, '
+            'then project/need totals (overwrites manual adjustments), aggregates and rollups')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help='Only re-convert donations completed from this date on (YYYY-MM-DD)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError('--since must be a date in YYYY-MM-DD format')
+
+        count = reconvert_donations(since=since, batch_size=options['batch_size'])
+        self.stdout.write(f'  ✓ Re-converted {count} donations')
+
+        recompute_funding_totals()
+        self.stdout.write('  ✓ Recomputed project and need totals')
+        rows = rebuild_aggregates()
+        self.stdout.write(f'  ✓ Rebuilt {rows} aggregate rows')
+        rows = rebuild_rollups()
+        self.stdout.write(f'  ✓ Rebuilt {rows} funding rollup rows')
+
+        self.stdout.write(self.style.SUCCESS('✅ Done'))
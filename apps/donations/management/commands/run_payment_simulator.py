@@ -0,0 +1,62 @@
+"""
+Management command to run the local Stripe/Fapshi simulator.
+
+    python manage.py run_payment_simulator --port 12111 --latency 0.2 --error-rate 0.05 \
+        --complete-after 1 --site-url http://127.0.0.1:8000
+
+    STRIPE_API_BASE=http://127.0.0.1:12111 FAPSHI_API_BASE=http://127.0.0.1:12111 \
+        STRIPE_SECRET_KEY=sk_test_simulator STRIPE_WEBHOOK_SECRET=whsec_simulator \
+        python manage.py runserver
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.donations.simulators import SimulatorConfig, make_server
+
+
+class Command(BaseCommand):
+    help = 'Serve simulated Stripe Checkout and Fapshi APIs that send signed webhooks back to the site'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=12111)
+        parser.add_argument('--site-url', default=settings.SITE_URL,
+                            help='Where webhooks are delivered')
+        parser.add_argument('--latency', type=float, default=0.0, help='Base API latency (seconds)')
+        parser.add_argument('--jitter', type=float, default=0.0, help='Extra random latency (seconds)')
+        parser.add_argument('--error-rate', type=float, default=0.0,
+                            help='Fraction of API calls answered with a 503')
+        parser.add_argument('--decline-rate', type=float, default=0.0,
+                            help='Fraction of payments that fail')
+        parser.add_argument('--complete-after', type=float,
+                            help='Settle payments automatically after N seconds '
+                                 '(default: when the hosted page is visited)')
+        parser.add_argument('--webhook-delay', type=float, default=0.0)
+        parser.add_argument('--stripe-webhook-secret', default=settings.STRIPE_WEBHOOK_SECRET)
+        parser.add_argument('--fapshi-secret',
+                            default=settings.FAPSHI_WEBHOOK_SECRET or settings.FAPSHI_API_SECRET)
+
+    def handle(self, *args, **options):
+        base_url = f"http://{options['host']}:{options['port']}"
+        config = SimulatorConfig(
+            base_url=base_url,
+            site_url=options['site_url'],
+            latency=options['latency'],
+            jitter=options['jitter'],
+            error_rate=options['error_rate'],
+            decline_rate=options['decline_rate'],
+            complete_after=options['complete_after'],
+            webhook_delay=options['webhook_delay'],
+            stripe_webhook_secret=options['stripe_webhook_secret'],
+            fapshi_secret=options['fapshi_secret'],
+        )
+        server = make_server(options['host'], options['port'], config)
+        self.stdout.write(self.style.SUCCESS(f'Payment simulator listening on {base_url}'))
+        self.stdout.write(f"Webhooks -> {config.site_url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0002_donationimpact_image_donationimpact_is_featured_and_more'),
+        ('projects', '0002_project_featured_image_url_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyDonationAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('currency', models.CharField(choices=[('EUR', 'Euro (€)'), ('USD', 'US Dollar ($)'), ('XAF', 'CFA Franc (FCFA)'), ('GBP', 'British Pound (£)')], max_length=3, verbose_name='Devise')),
+                ('payment_method', models.CharField(choices=[('stripe', 'Stripe'), ('fapshi', 'Fapshi'), ('bank', 'Virement bancaire'), ('other', 'Autre')], max_length=20, verbose_name='Méthode de paiement')),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('processing', 'En cours'), ('completed', 'Complété'), ('failed', 'Échoué'), ('refunded', 'Remboursé'), ('cancelled', 'Annulé')], max_length=20, verbose_name='Statut')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Montant total')),
+                ('donation_count', models.PositiveIntegerField(default=0, verbose_name='Nombre de dons')),
+                ('donor_estimate', models.PositiveIntegerField(default=0, verbose_name='Donateurs distincts (estimation)')),
+                ('donor_sketch', models.BinaryField(blank=True, default=b'', help_text='Sketch HyperLogLog pour fusionner les estimations', verbose_name='Empreinte des donateurs')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Modifié le')),
+                ('project', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='donation_aggregates', to='projects.project', verbose_name='Projet')),
+                ('project_need', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='donation_aggregates', to='projects.projectneed', verbose_name='Besoin spécifique')),
+            ],
+            options={
+                'verbose_name': 'Agrégat journalier des dons',
+                'verbose_name_plural': 'Agrégats journaliers des dons',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date', 'status'], name='donagg_date_status_idx'), models.Index(fields=['project', 'status', 'date'], name='donagg_project_status_idx')],
+            },
+        ),
+    ]
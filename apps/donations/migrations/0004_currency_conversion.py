@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0003_daily_donation_aggregate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailydonationaggregate',
+            name='converted_total',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Somme dans la devise du projet', max_digits=14, verbose_name='Total converti'),
+        ),
+        migrations.AddField(
+            model_name='donation',
+            name='converted_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Montant dans la devise du projet', max_digits=12, null=True, verbose_name='Montant converti'),
+        ),
+        migrations.AddField(
+            model_name='donation',
+            name='converted_currency',
+            field=models.CharField(blank=True, max_length=3, verbose_name='Devise de conversion'),
+        ),
+        migrations.AddField(
+            model_name='donation',
+            name='exchange_rate',
+            field=models.DecimalField(blank=True, decimal_places=8, max_digits=18, null=True, verbose_name='Taux de change appliqué'),
+        ),
+        migrations.CreateModel(
+            name='ExchangeRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(choices=[('EUR', 'Euro (€)'), ('USD', 'US Dollar ($)'), ('XAF', 'CFA Franc (FCFA)'), ('GBP', 'British Pound (£)')], max_length=3, verbose_name='Devise')),
+                ('rate', models.DecimalField(decimal_places=8, help_text='Unités de la devise pour 1 unité de la devise de base', max_digits=18, verbose_name='Taux')),
+                ('effective_date', models.DateField(verbose_name="Date d'effet")),
+                ('source', models.CharField(blank=True, max_length=100, verbose_name='Source')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+            ],
+            options={
+                'verbose_name': 'Taux de change',
+                'verbose_name_plural': 'Taux de change',
+                'ordering': ['currency', '-effective_date'],
+                'unique_together': {('currency', 'effective_date')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0004_currency_conversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='donation',
+            name='receipt_file',
+            field=models.FileField(blank=True, upload_to='donations/receipts/', verbose_name='Reçu fiscal'),
+        ),
+    ]
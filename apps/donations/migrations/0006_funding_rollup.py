@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0005_donation_receipt_file'),
+        ('projects', '0002_project_featured_image_url_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FundingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('series', models.CharField(max_length=20, verbose_name='Série')),
+                ('resolution', models.CharField(choices=[('hour', 'Heure'), ('day', 'Jour'), ('week', 'Semaine')], max_length=10, verbose_name='Résolution')),
+                ('bucket_start', models.DateTimeField(verbose_name='Début de la période')),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Montant crédité')),
+                ('cumulative', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total cumulé')),
+                ('donation_count', models.IntegerField(default=0, verbose_name='Nombre de dons')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='funding_rollups', to='projects.project', verbose_name='Projet')),
+                ('project_need', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='funding_rollups', to='projects.projectneed', verbose_name='Besoin spécifique')),
+            ],
+            options={
+                'verbose_name': 'Série de financement',
+                'verbose_name_plural': 'Séries de financement',
+                'ordering': ['series', 'resolution', '-bucket_start'],
+                'constraints': [models.UniqueConstraint(fields=('series', 'resolution', 'bucket_start'), name='fundingrollup_bucket_unique')],
+            },
+        ),
+    ]
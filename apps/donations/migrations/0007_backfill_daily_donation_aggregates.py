@@ -0,0 +1,86 @@
+"""
+Fill DailyDonationAggregate from the donations made before it existed:
+Project.total_donors and the dashboards read the aggregates only.
+Same buckets as services.aggregates.rebuild_aggregates(), with the models
+of this migration state.
+"""
+
+import hashlib
+import math
+from decimal import Decimal
+
+from django.db import migrations
+from django.utils import timezone
+
+
+class DonorSketch:
+    """services.aggregates.DonorSketch as of this migration (HyperLogLog, 256 registers)"""
+
+    PRECISION = 8
+    SIZE = 1 << PRECISION
+
+    def __init__(self):
+        self.registers = bytearray(self.SIZE)
+
+    def add(self, value: str):
+        digest = hashlib.sha1(value.strip().lower().encode()).digest()
+        hashed = int.from_bytes(digest[:8], 'big')
+        index = hashed >> (64 - self.PRECISION)
+        remaining = hashed & ((1 << (64 - self.PRECISION)) - 1)
+        rank = (64 - self.PRECISION) - remaining.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def estimate(self) -> int:
+        m = self.SIZE
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.registers)
+
+
+def backfill_aggregates(apps, schema_editor):
+    Donation = apps.get_model('donations', 'Donation')
+    DailyDonationAggregate = apps.get_model('donations', 'DailyDonationAggregate')
+
+    buckets = {}
+    fields = ('created_at', 'project_id', 'project_need_id', 'currency',
+              'payment_method', 'status', 'amount', 'converted_amount', 'donor_email')
+    for (created_at, project_id, need_id, currency, method, status,
+         amount, converted, email) in Donation.objects.values_list(*fields).iterator(chunk_size=2000):
+        key = (timezone.localdate(created_at), project_id, need_id, currency, method, status)
+        entry = buckets.get(key)
+        if entry is None:
+            entry = buckets[key] = [Decimal('0'), Decimal('0'), 0, DonorSketch()]
+        entry[0] += amount
+        entry[1] += converted or Decimal('0')
+        entry[2] += 1
+        if email:
+            entry[3].add(email)
+
+    DailyDonationAggregate.objects.all().delete()
+    DailyDonationAggregate.objects.bulk_create([
+        DailyDonationAggregate(
+            date=key[0], project_id=key[1], project_need_id=key[2],
+            currency=key[3], payment_method=key[4], status=key[5],
+            total_amount=total, converted_total=converted, donation_count=count,
+            donor_sketch=sketch.to_bytes(), donor_estimate=sketch.estimate(),
+        )
+        for key, (total, converted, count, sketch) in buckets.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0006_funding_rollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,100 @@
+"""
+Fill FundingRollup from the donations completed before it existed, so the
+funding charts of existing projects do not start empty. Same series as
+services.timeseries.rebuild_rollups(), written against the models of this
+migration state; hourly buckets past the retention period are left out, as
+`rebuild_funding_rollups` prunes them.
+
+Donations completed before conversion existed have no converted amount:
+those in the project currency count as is, the others wait for
+`reconvert_donations` and `rebuild_funding_rollups`.
+"""
+
+from collections import OrderedDict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import migrations
+from django.utils import timezone
+
+RESOLUTIONS = ('hour', 'day', 'week')
+
+
+def series_key(project_id, need_id=None):
+    return f'n{need_id}' if need_id else f'p{project_id}'
+
+
+def bucket_start(moment, resolution):
+    local = timezone.localtime(moment)
+    if resolution == 'hour':
+        return local.replace(minute=0, second=0, microsecond=0)
+    day = local.date()
+    if resolution == 'week':
+        day -= timedelta(days=day.weekday())
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def backfill_rollups(apps, schema_editor):
+    Donation = apps.get_model('donations', 'Donation')
+    FundingRollup = apps.get_model('donations', 'FundingRollup')
+    Project = apps.get_model('projects', 'Project')
+    ProjectNeed = apps.get_model('projects', 'ProjectNeed')
+
+    donations = (
+        Donation.objects
+        .filter(status='completed', project__isnull=False)
+        .order_by('completed_at', 'pk')
+        .values_list('completed_at', 'created_at', 'project_id', 'project_need_id', 'converted_amount',
+                     'amount', 'currency', 'project__currency')
+    )
+    buckets = OrderedDict()
+    running = {}
+    for (completed_at, created_at, project_id, need_id, converted,
+         amount, currency, project_currency) in donations.iterator(chunk_size=2000):
+        if converted is None:
+            if currency != project_currency:
+                continue
+            converted = amount
+        moment = completed_at or created_at
+        for target_need in ([None, need_id] if need_id else [None]):
+            series = series_key(project_id, target_need)
+            running[series] = running.get(series, Decimal('0')) + converted
+            for resolution in RESOLUTIONS:
+                key = (series, resolution, bucket_start(moment, resolution))
+                entry = buckets.get(key)
+                if entry is None:
+                    entry = buckets[key] = [project_id, target_need, Decimal('0'), 0, Decimal('0')]
+                entry[2] += converted
+                entry[3] += 1
+                entry[4] = running[series]
+
+    # Cumulative values end at the current totals (manual adjustments, refunds)
+    current = {series_key(pk, None): amount for pk, amount in Project.objects.values_list('pk', 'current_amount')}
+    current.update({series_key(None, pk): amount
+                    for pk, amount in ProjectNeed.objects.values_list('pk', 'current_amount')})
+    offsets = {series: current.get(series, total) - total for series, total in running.items()}
+    cutoff = timezone.now() - timedelta(days=getattr(settings, 'FUNDING_HOURLY_RETENTION_DAYS', 90))
+
+    FundingRollup.objects.all().delete()
+    FundingRollup.objects.bulk_create([
+        FundingRollup(
+            series=series, resolution=resolution, bucket_start=start,
+            project_id=project_id, project_need_id=need_id,
+            amount=amount, donation_count=count, cumulative=cumulative + offsets[series],
+        )
+        for (series, resolution, start), (project_id, need_id, amount, count, cumulative) in buckets.items()
+        if resolution != 'hour' or start >= cutoff
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0007_backfill_daily_donation_aggregates'),
+        ('projects', '0003_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:59
+
+import math
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+# Registers and estimate of services.aggregates.DonorSketch (256 one-byte
+# HyperLogLog registers), as of this migration
+PRECISION = 8
+SIZE = 1 << PRECISION
+
+
+def estimate(registers) -> int:
+    alpha = 0.7213 / (1 + 1.079 / SIZE)
+    raw = alpha * SIZE * SIZE / sum(2.0 ** -r for r in registers)
+    zeros = registers.count(0)
+    if raw <= 2.5 * SIZE and zeros:
+        return int(round(SIZE * math.log(SIZE / zeros)))
+    return int(round(raw))
+
+
+def merge_duplicate_buckets(apps, schema_editor):
+    """Concurrent completions could insert a bucket twice: merge the copies, drop empty buckets"""
+    DailyDonationAggregate = apps.get_model('donations', 'DailyDonationAggregate')
+
+    DailyDonationAggregate.objects.filter(donation_count=0).delete()
+    kept = {}
+    for row in DailyDonationAggregate.objects.order_by('pk'):
+        key = (row.date, row.project_id, row.project_need_id, row.currency, row.payment_method, row.status)
+        first = kept.get(key)
+        if first is None:
+            kept[key] = row
+            continue
+        registers = bytearray(first.donor_sketch or bytes(SIZE))
+        for i, value in enumerate(row.donor_sketch or b''):
+            registers[i] = max(registers[i], value)
+        first.total_amount += row.total_amount
+        first.converted_total += row.converted_total
+        first.donation_count += row.donation_count
+        first.donor_sketch = bytes(registers)
+        first.donor_estimate = estimate(registers)
+        first.save()
+        row.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0008_backfill_funding_rollups'),
+        ('projects', '0003_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_buckets, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='dailydonationaggregate',
+            constraint=models.UniqueConstraint(models.F('date'), django.db.models.functions.comparison.Coalesce('project', models.Value(0)), django.db.models.functions.comparison.Coalesce('project_need', models.Value(0)), models.F('currency'), models.F('payment_method'), models.F('status'), name='donagg_bucket_unique'),
+        ),
+    ]
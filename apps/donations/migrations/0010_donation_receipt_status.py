@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:02
+
+from django.db import migrations, models
+
+
+def mark_issued_receipts(apps, schema_editor):
+    Donation = apps.get_model('donations', 'Donation')
+    Donation.objects.filter(receipt_sent=True).update(receipt_status='issued')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0009_daily_donation_aggregate_unique_bucket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='donation',
+            name='receipt_claimed_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name="Reçu réservé jusqu'au"),
+        ),
+        migrations.AddField(
+            model_name='donation',
+            name='receipt_status',
+            field=models.CharField(blank=True, choices=[('', 'Aucun'), ('queued', 'En attente'), ('rendering', 'En cours'), ('issued', 'Émis')], default='', max_length=20, verbose_name='État du reçu'),
+        ),
+        migrations.RunPython(mark_issued_receipts, migrations.RunPython.noop),
+    ]
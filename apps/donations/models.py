@@ -5,6 +5,7 @@ Supports multiple payment methods (Stripe, Fapshi) and tracks donation status.
 """
 
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 import uuid
@@ -36,6 +37,12 @@ class Donation(models.Model):
         XAF = 'XAF', 'CFA Franc (FCFA)'
         GBP = 'GBP', 'British Pound (£)'
     
+    class ReceiptStatus(models.TextChoices):
+        NONE = '', _('Aucun')
+        QUEUED = 'queued', _('En attente')
+        RENDERING = 'rendering', _('En cours')
+        ISSUED = 'issued', _('Émis')
+    
     # Unique identifier
     reference = models.UUIDField(_("Référence"), default=uuid.uuid4, unique=True, editable=False)
     
@@ -50,6 +57,15 @@ class Donation(models.Model):
     amount = models.DecimalField(_("Montant"), max_digits=12, decimal_places=2)
     currency = models.CharField(_("Devise"), max_length=3, choices=Currency.choices, default=Currency.EUR)
     
+    # Amount converted into the project currency at completion time. No amount
+    # with a currency: no rate was known, not credited yet (see services/currency.py)
+    converted_amount = models.DecimalField(_("Montant converti"), max_digits=12, decimal_places=2,
+                                           null=True, blank=True,
+                                           help_text=_("Montant dans la devise du projet"))
+    converted_currency = models.CharField(_("Devise de conversion"), max_length=3, blank=True)
+    exchange_rate = models.DecimalField(_("Taux de change appliqué"), max_digits=18, decimal_places=8,
+                                        null=True, blank=True)
+    
     # Project Association
     project = models.ForeignKey(
         'projects.Project',
@@ -96,6 +112,12 @@ class Donation(models.Model):
     # Email flags
     receipt_sent = models.BooleanField(_("Reçu envoyé"), default=False)
     thank_you_sent = models.BooleanField(_("Remerciement envoyé"), default=False)
+    receipt_file = models.FileField(_("Reçu fiscal"), upload_to='donations/receipts/', blank=True)
+    # Receipt job state: rows are claimed (RENDERING until the lease expires)
+    # before rendering, so two runs never issue the same receipt
+    receipt_status = models.CharField(_("État du reçu"), max_length=20, choices=ReceiptStatus.choices,
+                                      default=ReceiptStatus.NONE, blank=True)
+    receipt_claimed_until = models.DateTimeField(_("Reçu réservé jusqu'au"), null=True, blank=True)
     
     class Meta:
         verbose_name = _("Don")
@@ -107,20 +129,16 @@ class Donation(models.Model):
         return f"{self.donor_name} - {self.amount} {self.currency} - {project_name}"
     
     def mark_completed(self):
-        """Mark donation as completed and update project funding"""
+        """
+        Mark donation as completed.
+        Project funding is credited (in the project currency) by the
+        post_save signal, so completing twice never double-counts.
+        """
+        if self.status == self.Status.COMPLETED:
+            return
         self.status = self.Status.COMPLETED
         self.completed_at = timezone.now()
         self.save()
-        
-        # Update project current_amount
-        if self.project:
-            self.project.current_amount += self.amount
-            self.project.save(update_fields=['current_amount'])
-            
-            # Update specific need if applicable
-            if self.project_need:
-                self.project_need.current_amount += self.amount
-                self.project_need.save(update_fields=['current_amount'])
     
     @property
     def display_name(self):
@@ -137,6 +155,32 @@ class Donation(models.Model):
         return f"{self.amount:,.2f} {symbol}"
 
 
+class ExchangeRate(models.Model):
+    """
+    Exchange rate table with effective dates.
+    `rate` is the number of units of `currency` for one unit of the base
+    currency (settings.FX_BASE_CURRENCY, EUR by default). Load rates with
+    `python manage.py load_exchange_rates`.
+    """
+    
+    currency = models.CharField(_("Devise"), max_length=3, choices=Donation.Currency.choices)
+    rate = models.DecimalField(_("Taux"), max_digits=18, decimal_places=8,
+                               help_text=_("Unités de la devise pour 1 unité de la devise de base"))
+    effective_date = models.DateField(_("Date d'effet"))
+    source = models.CharField(_("Source"), max_length=100, blank=True)
+    
+    created_at = models.DateTimeField(_("Créé le"), auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _("Taux de change")
+        verbose_name_plural = _("Taux de change")
+        ordering = ['currency', '-effective_date']
+        unique_together = [('currency', 'effective_date')]
+    
+    def __str__(self):
+        return f"{self.currency} {self.rate} ({self.effective_date})"
+
+
 class MaterialContribution(models.Model):
     """
     Material/in-kind contribution pledges.
@@ -192,13 +236,11 @@ class MaterialContribution(models.Model):
         return f"{self.contributor_name} - {self.project_need.title}"
     
     def mark_delivered(self):
-        """Mark contribution as delivered and update project need"""
-        self.status = self.Status.DELIVERED
-        self.save()
+        """Mark contribution as delivered and credit the project need (once)"""
+        from .services.materials import deliver_contributions
         
-        # Update the project need quantity received
-        self.project_need.quantity_received += self.quantity
-        self.project_need.save(update_fields=['quantity_received'])
+        deliver_contributions(MaterialContribution.objects.filter(pk=self.pk))
+        self.status = self.Status.DELIVERED
 
 
 class DonationImpact(models.Model):
@@ -239,3 +281,117 @@ class DonationImpact(models.Model):
     def __str__(self):
         return f"{self.amount} {self.currency} - {self.description[:50]}"
 
+
+
+class DailyDonationAggregate(models.Model):
+    """
+    Materialized daily donation totals for dashboards and reporting.
+    One row per (date, project, need, currency, payment method, status) bucket;
+    NULL project or need count as one value in the unique key.
+    Maintained incrementally by signals; rebuild with
+    `python manage.py rebuild_donation_aggregates`.
+    """
+    
+    date = models.DateField(_("Date"))
+    project = models.ForeignKey(
+        'projects.Project',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name=_("Projet"),
+        related_name='donation_aggregates'
+    )
+    project_need = models.ForeignKey(
+        'projects.ProjectNeed',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name=_("Besoin spécifique"),
+        related_name='donation_aggregates'
+    )
+    currency = models.CharField(_("Devise"), max_length=3, choices=Donation.Currency.choices)
+    payment_method = models.CharField(_("Méthode de paiement"), max_length=20,
+                                      choices=Donation.PaymentMethod.choices)
+    status = models.CharField(_("Statut"), max_length=20, choices=Donation.Status.choices)
+    
+    # Measures
+    total_amount = models.DecimalField(_("Montant total"), max_digits=14, decimal_places=2, default=0)
+    converted_total = models.DecimalField(_("Total converti"), max_digits=14, decimal_places=2, default=0,
+                                          help_text=_("Somme dans la devise du projet"))
+    donation_count = models.PositiveIntegerField(_("Nombre de dons"), default=0)
+    donor_estimate = models.PositiveIntegerField(_("Donateurs distincts (estimation)"), default=0)
+    donor_sketch = models.BinaryField(_("Empreinte des donateurs"), blank=True, default=b'',
+                                      help_text=_("Sketch HyperLogLog pour fusionner les estimations"))
+    
+    updated_at = models.DateTimeField(_("Modifié le"), auto_now=True)
+    
+    class Meta:
+        verbose_name = _("Agrégat journalier des dons")
+        verbose_name_plural = _("Agrégats journaliers des dons")
+        ordering = ['-date']
+        indexes = [
+            models.Index(fields=['date', 'status'], name='donagg_date_status_idx'),
+            models.Index(fields=['project', 'status', 'date'], name='donagg_project_status_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                models.F('date'), Coalesce('project', models.Value(0)), Coalesce('project_need', models.Value(0)),
+                models.F('currency'), models.F('payment_method'), models.F('status'),
+                name='donagg_bucket_unique',
+            ),
+        ]
+    
+    def __str__(self):
+        project_name = self.project.title if self.project else _("Général")
+        return f"{self.date} - {project_name} - {self.total_amount} {self.currency} ({self.get_status_display()})"
+
+
+class FundingRollup(models.Model):
+    """
+    Funding time series for charts, in hourly, daily and weekly buckets.
+    One row per (series, resolution, bucket): the amount credited during the
+    bucket and the cumulative total at its last completion. A series is a
+    project (`p<id>`) or one of its needs (`n<id>`).
+    Maintained by signals on completion and refund; rebuild with
+    `python manage.py rebuild_funding_rollups`.
+    """
+    
+    class Resolution(models.TextChoices):
+        HOUR = 'hour', _('Heure')
+        DAY = 'day', _('Jour')
+        WEEK = 'week', _('Semaine')
+    
+    series = models.CharField(_("Série"), max_length=20)
+    project = models.ForeignKey(
+        'projects.Project',
+        on_delete=models.CASCADE,
+        verbose_name=_("Projet"),
+        related_name='funding_rollups'
+    )
+    project_need = models.ForeignKey(
+        'projects.ProjectNeed',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        verbose_name=_("Besoin spécifique"),
+        related_name='funding_rollups'
+    )
+    resolution = models.CharField(_("Résolution"), max_length=10, choices=Resolution.choices)
+    bucket_start = models.DateTimeField(_("Début de la période"))
+    
+    # Measures (in the project currency)
+    amount = models.DecimalField(_("Montant crédité"), max_digits=14, decimal_places=2, default=0)
+    cumulative = models.DecimalField(_("Total cumulé"), max_digits=14, decimal_places=2, default=0)
+    donation_count = models.IntegerField(_("Nombre de dons"), default=0)
+    
+    class Meta:
+        verbose_name = _("Série de financement")
+        verbose_name_plural = _("Séries de financement")
+        ordering = ['series', 'resolution', '-bucket_start']
+        constraints = [
+            models.UniqueConstraint(fields=['series', 'resolution', 'bucket_start'],
+                                    name='fundingrollup_bucket_unique'),
+        ]
+    
+    def __str__(self):
+        return f"{self.series} {self.resolution} {self.bucket_start:%Y-%m-%d %H:%M} - {self.cumulative}"
@@ -0,0 +1,321 @@
+"""
+Currency Conversion Service
+Converts donation amounts into project currencies using the ExchangeRate table.
+
+Rates are loaded once per process into an in-memory table (refreshed every
+FX_CACHE_TIMEOUT seconds and whenever a rate is saved in this process), so
+converting a donation never costs a query.
+
+A donation completed while no rate was known keeps its target currency
+without an amount and is not credited; credit_pending_donations() credits
+it once rates are loaded (load_exchange_rates and reconvert_donations call
+it).
+"""
+
+import bisect
+import csv
+import json
+import logging
+import threading
+import time
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from apps.projects.progress import forget_progress
+
+logger = logging.getLogger(__name__)
+
+CENTS = Decimal('0.01')
+
+
+class ExchangeRateUnavailable(Exception):
+    """Raised when no rate is known for a currency"""
+
+
+class RateTable:
+    """In-process cache of the ExchangeRate table"""
+
+    def __init__(self):
+        self._rates = None
+        self._loaded_at = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._rates = None
+
+    def _load(self):
+        from apps.donations.models import ExchangeRate
+
+        rates = {}
+        for currency, effective_date, rate in (ExchangeRate.objects
+                                               .order_by('currency', 'effective_date')
+                                               .values_list('currency', 'effective_date', 'rate')):
+            dates, values = rates.setdefault(currency, ([], []))
+            dates.append(effective_date)
+            values.append(rate)
+        return rates
+
+    def _get_rates(self):
+        timeout = getattr(settings, 'FX_CACHE_TIMEOUT', 300)
+        rates = self._rates
+        if rates is None or time.monotonic() - self._loaded_at > timeout:
+            with self._lock:
+                if self._rates is None or time.monotonic() - self._loaded_at > timeout:
+                    self._rates = self._load()
+                    self._loaded_at = time.monotonic()
+                rates = self._rates
+        return rates
+
+    def rate(self, currency: str, on_date: date = None) -> Decimal:
+        """
+        Units of `currency` per unit of the base currency on a given date.
+        Uses the latest rate effective on or before `on_date`, then the
+        earliest known rate, then settings.FX_DEFAULT_RATES.
+        """
+        currency = currency.upper()
+        if currency == base_currency():
+            return Decimal('1')
+
+        entry = self._get_rates().get(currency)
+        if entry:
+            dates, values = entry
+            if on_date is None:
+                return values[-1]
+            index = bisect.bisect_right(dates, on_date) - 1
+            return values[max(index, 0)]
+
+        default = getattr(settings, 'FX_DEFAULT_RATES', {}).get(currency)
+        if default is not None:
+            return Decimal(str(default))
+        raise ExchangeRateUnavailable(f"No exchange rate for {currency}")
+
+
+_rate_table = RateTable()
+
+
+def base_currency() -> str:
+    return getattr(settings, 'FX_BASE_CURRENCY', 'EUR').upper()
+
+
+def get_rate_table() -> RateTable:
+    """Get the process-wide rate table"""
+    return _rate_table
+
+
+def exchange_rate(from_currency: str, to_currency: str, on_date: date = None) -> Decimal:
+    """Return how many `to_currency` units one `from_currency` unit buys"""
+    if from_currency.upper() == to_currency.upper():
+        return Decimal('1')
+    table = get_rate_table()
+    return table.rate(to_currency, on_date) / table.rate(from_currency, on_date)
+
+
+def convert(amount: Decimal, from_currency: str, to_currency: str, on_date: date = None) -> Decimal:
+    """
+    Convert an amount between currencies.
+
+    Args:
+        amount: Amount in `from_currency`
+        from_currency: 3-letter source currency code
+        to_currency: 3-letter target currency code
+        on_date: Date whose rate applies (default: latest rate)
+
+    Returns:
+        Converted amount rounded to cents
+    """
+    rate = exchange_rate(from_currency, to_currency, on_date)
+    return (Decimal(amount) * rate).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def apply_conversion(donation) -> bool:
+    """
+    Set converted_amount/converted_currency/exchange_rate on a donation
+    from the rate effective at its completion date. Does not save.
+
+    Returns:
+        True if the donation could be converted; otherwise converted_amount
+        is None and converted_currency the target, awaiting a rate
+    """
+    target = donation.project.currency if donation.project_id else base_currency()
+    when = timezone.localdate(donation.completed_at or timezone.now())
+    try:
+        rate = exchange_rate(donation.currency, target, when)
+    except ExchangeRateUnavailable as e:
+        logger.error("Cannot convert donation %s: %s", donation.reference, e)
+        donation.converted_amount = None
+        donation.converted_currency = target
+        donation.exchange_rate = None
+        return False
+
+    donation.converted_amount = (donation.amount * rate).quantize(CENTS, rounding=ROUND_HALF_UP)
+    donation.converted_currency = target
+    donation.exchange_rate = rate.quantize(Decimal('0.00000001'))
+    return True
+
+
+def load_rates_file(path) -> int:
+    """
+    Load rates from a JSON or CSV file into the ExchangeRate table.
+
+    JSON: [{"currency": "USD", "rate": "1.08", "effective_date": "2025-01-01"}, ...]
+    CSV:  currency,rate,effective_date[,source]
+
+    Returns:
+        Number of rates written
+    """
+    from apps.donations.models import ExchangeRate
+
+    path = str(path)
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith('.json'):
+            rows = json.load(f)
+        else:
+            rows = list(csv.DictReader(f))
+
+    count = 0
+    with transaction.atomic():
+        for row in rows:
+            ExchangeRate.objects.update_or_create(
+                currency=row['currency'].upper(),
+                effective_date=date.fromisoformat(row['effective_date']),
+                defaults={
+                    'rate': Decimal(str(row['rate'])),
+                    'source': row.get('source') or path.rsplit('/', 1)[-1],
+                },
+            )
+            count += 1
+    get_rate_table().invalidate()
+    return count
+
+
+def reconvert_donations(since: date = None, batch_size: int = 1000) -> int:
+    """
+    Recompute converted amounts for completed donations (historical data).
+
+    Donations awaiting a rate are credited first (credit_pending_donations()).
+
+    Returns:
+        Number of donations updated
+    """
+    from apps.donations.models import Donation
+
+    credit_pending_donations()
+    donations = (Donation.objects
+                 .filter(status=Donation.Status.COMPLETED)
+                 .select_related('project')
+                 .order_by('pk'))
+    if since:
+        donations = donations.filter(completed_at__date__gte=since)
+
+    fields = ['converted_amount', 'converted_currency', 'exchange_rate']
+    batch = []
+    updated = 0
+    for donation in donations.iterator(chunk_size=batch_size):
+        apply_conversion(donation)
+        batch.append(donation)
+        if len(batch) >= batch_size:
+            Donation.objects.bulk_update(batch, fields)
+            updated += len(batch)
+            batch = []
+    if batch:
+        Donation.objects.bulk_update(batch, fields)
+        updated += len(batch)
+    return updated
+
+
+def credit_pending_donations() -> int:
+    """
+    Convert and credit the completed donations that were left uncredited
+    because no rate was known when they completed.
+
+    Returns:
+        Number of donations credited
+    """
+    from apps.donations.models import Donation
+    from apps.donations.services.timeseries import record_funding
+
+    pending = (Donation.objects
+               .filter(status=Donation.Status.COMPLETED, converted_amount__isnull=True)
+               .exclude(converted_currency='')
+               .select_related('project'))
+    credited = 0
+    for donation in pending:
+        if not apply_conversion(donation):
+            continue
+        with transaction.atomic():
+            # Only the first of two concurrent runs credits it
+            if not Donation.objects.filter(pk=donation.pk, converted_amount__isnull=True).update(
+                    converted_amount=donation.converted_amount,
+                    converted_currency=donation.converted_currency,
+                    exchange_rate=donation.exchange_rate):
+                continue
+            credit_project(donation)
+            record_funding(donation)
+        credited += 1
+    return credited
+
+
+def recompute_funding_totals():
+    """
+    Reset Project.current_amount and ProjectNeed.current_amount to the sum of
+    converted completed donations. Overwrites manual adjustments.
+    """
+    from apps.donations.models import Donation
+    from apps.projects.models import Project, ProjectNeed
+
+    completed = Donation.objects.filter(status=Donation.Status.COMPLETED)
+
+    def total_for(field):
+        return Coalesce(
+            Subquery(
+                completed.filter(**{field: OuterRef('pk')})
+                .order_by()
+                .values(field)
+                .annotate(total=Sum('converted_amount'))
+                .values('total')[:1]
+            ),
+            Value(Decimal('0')),
+        )
+
+    with transaction.atomic():
+        Project.objects.update(current_amount=total_for('project'))
+        ProjectNeed.objects.update(current_amount=total_for('project_need'))
+    forget_progress(Project.objects.values_list('slug', flat=True))
+
+
+def credit_project(donation, sign: int = 1):
+    """
+    Add (sign=1) or remove (sign=-1) a donation's converted amount from its
+    project and need with atomic F() updates.
+
+    A donation completed before conversion existed was credited its amount
+    as is, and that amount is what a refund removes; one still awaiting a
+    rate was never credited.
+    """
+    from apps.projects.models import Project, ProjectNeed
+
+    if not donation.project_id:
+        return
+    amount = donation.converted_amount
+    if amount is None:
+        if sign > 0 or donation.converted_currency:
+            return
+        amount = donation.amount
+
+    def new_total():
+        # Refunds never push a total below zero
+        return Greatest(
+            F('current_amount') + amount * sign,
+            Value(Decimal('0')),
+            output_field=DecimalField(),
+        )
+
+    Project.objects.filter(pk=donation.project_id).update(current_amount=new_total())
+    if donation.project_need_id:
+        ProjectNeed.objects.filter(pk=donation.project_need_id).update(current_amount=new_total())
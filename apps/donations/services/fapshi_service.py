@@ -4,23 +4,30 @@ Handles Fapshi mobile money payments for African users.
 Fapshi supports MTN Mobile Money, Orange Money, and other local payment methods.
 """
 
-import requests
 import hmac
 import hashlib
+import importlib.util
 import json
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from decimal import Decimal
 from datetime import datetime
 
+# requests and httpx are imported on first call, not with the URLconf
+HTTPX_AVAILABLE = importlib.util.find_spec('httpx') is not None
+
 
 class FapshiPaymentService:
     """Service class for Fapshi payment operations"""
     
     BASE_URL = "https://live.fapshi.com"  # Use sandbox.fapshi.com for testing
     
-    def __init__(self):
+    def __init__(self, timeout: float = 30):
+        # FAPSHI_API_BASE points at the sandbox or a local simulator
+        self.BASE_URL = (getattr(settings, 'FAPSHI_API_BASE', '') or self.BASE_URL).rstrip('/')
         self.api_key = settings.FAPSHI_API_KEY
         self.api_secret = settings.FAPSHI_API_SECRET
+        self.timeout = timeout
     
     def _get_headers(self):
         """Get headers for Fapshi API requests"""
@@ -40,6 +47,7 @@ class FapshiPaymentService:
         project_need_id: int = None,
         message: str = "",
         redirect_url: str = None,
+        external_id: str = None,
     ) -> dict:
         """
         Initiate a Fapshi payment.
@@ -53,15 +61,63 @@ class FapshiPaymentService:
             project_need_id: Optional project need ID
             message: Optional donation message
             redirect_url: URL to redirect after payment
+            external_id: Our reference for the payment (default: generated)
             
         Returns:
             dict with transaction details
         """
+        import requests
+
+        payload = self._payment_payload(
+            amount, donor_email, donor_phone, donor_name, project_id, redirect_url, external_id,
+        )
+        try:
+            response = requests.post(
+                f"{self.BASE_URL}/initiate-pay",
+                headers=self._get_headers(),
+                json=payload,
+                timeout=self.timeout
+            )
+            return self._payment_result(response, payload['externalId'])
+                
+        except requests.exceptions.RequestException as e:
+            return {
+                'success': False,
+                'error': str(e),
+            }
+    
+    async def initiate_payment_async(self, amount: Decimal, donor_email: str, donor_phone: str,
+                                     donor_name: str = "", project_id: int = None,
+                                     redirect_url: str = None, external_id: str = None,
+                                     **kwargs) -> dict:
+        """Async variant of initiate_payment (same arguments and result), over httpx"""
+        import httpx
+
+        payload = self._payment_payload(
+            amount, donor_email, donor_phone, donor_name, project_id, redirect_url, external_id,
+        )
+        try:
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                response = await client.post(
+                    f"{self.BASE_URL}/initiate-pay",
+                    headers=self._get_headers(),
+                    json=payload,
+                )
+            return self._payment_result(response, payload['externalId'])
+        
+        except httpx.HTTPError as e:
+            return {
+                'success': False,
+                'error': str(e),
+            }
+    
+    def _payment_payload(self, amount, donor_email, donor_phone, donor_name, project_id,
+                         redirect_url, external_id) -> dict:
         # Fapshi uses XAF (CFA Francs)
         amount_xaf = int(amount)
         
         # External ID for tracking
-        external_id = f"FDTM-{datetime.now().strftime('%Y%m%d%H%M%S')}-{donor_phone[-4:]}"
+        external_id = external_id or f"FDTM-{datetime.now().strftime('%Y%m%d%H%M%S')}-{donor_phone[-4:]}"
         
         payload = {
             'amount': amount_xaf,
@@ -75,36 +131,24 @@ class FapshiPaymentService:
         # Add metadata
         if project_id:
             payload['userId'] = str(project_id)  # Using userId field for project tracking
-        
-        try:
-            response = requests.post(
-                f"{self.BASE_URL}/initiate-pay",
-                headers=self._get_headers(),
-                json=payload,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    'success': True,
-                    'transaction_id': data.get('transId'),
-                    'external_id': external_id,
-                    'payment_link': data.get('link'),
-                    'status': data.get('status'),
-                }
-            else:
-                return {
-                    'success': False,
-                    'error': response.text,
-                    'status_code': response.status_code,
-                }
-                
-        except requests.exceptions.RequestException as e:
+        return payload
+    
+    @staticmethod
+    def _payment_result(response, external_id: str) -> dict:
+        if response.status_code == 200:
+            data = response.json()
             return {
-                'success': False,
-                'error': str(e),
+                'success': True,
+                'transaction_id': data.get('transId'),
+                'external_id': external_id,
+                'payment_link': data.get('link'),
+                'status': data.get('status'),
             }
+        return {
+            'success': False,
+            'error': response.text,
+            'status_code': response.status_code,
+        }
     
     def check_payment_status(self, transaction_id: str) -> dict:
         """
@@ -116,11 +160,13 @@ class FapshiPaymentService:
         Returns:
             dict with payment status
         """
+        import requests
+
         try:
             response = requests.get(
                 f"{self.BASE_URL}/payment-status/{transaction_id}",
                 headers=self._get_headers(),
-                timeout=30
+                timeout=self.timeout
             )
             
             if response.status_code == 200:
@@ -155,10 +201,14 @@ class FapshiPaymentService:
             signature: Signature from webhook header
             
         Returns:
-            bool indicating if signature is valid
+            bool indicating if signature is valid (never without a secret:
+            anyone can sign with an empty key)
         """
+        secret = settings.FAPSHI_WEBHOOK_SECRET or self.api_secret
+        if not secret:
+            return False
         expected_signature = hmac.new(
-            self.api_secret.encode(),
+            secret.encode(),
             payload,
             hashlib.sha256
         ).hexdigest()
@@ -166,6 +216,12 @@ class FapshiPaymentService:
         return hmac.compare_digest(signature, expected_signature)
 
 
+def build_client() -> FapshiPaymentService:
+    """Client used by the payment gateway (services.get('fapshi'))"""
+    from .gateway import deadline
+    return FapshiPaymentService(timeout=deadline())
+
+
 def process_fapshi_webhook(payload: dict):
     """
     Process Fapshi webhook notifications.
@@ -185,10 +241,16 @@ def process_fapshi_webhook(payload: dict):
     if not transaction_id:
         return None
     
-    # Check if donation exists
-    try:
-        donation = Donation.objects.get(fapshi_transaction_id=transaction_id)
-    except Donation.DoesNotExist:
+    # Check if donation exists (the webhook can beat the checkout view storing transId)
+    donation = Donation.objects.filter(fapshi_transaction_id=transaction_id).first()
+    if donation is None and payload.get('externalId'):
+        try:
+            donation = Donation.objects.filter(reference=payload['externalId']).first()
+        except ValidationError:
+            pass  # externalId from before references were used
+        if donation:
+            donation.fapshi_transaction_id = transaction_id
+    if donation is None:
         # Create new donation from webhook data
         project = None
         project_id = payload.get('userId')  # We stored project_id in userId field
@@ -0,0 +1,73 @@
+"""
+Material Contribution Service
+Delivery of material contributions and the matching project need updates.
+
+Delivering a batch is a fixed number of queries whatever its size: one
+SELECT of the contributions, one UPDATE of their status, one F() increment
+per project need, and one UPDATE flagging needs that are now fulfilled.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .page_cache import invalidate_donate_pages
+
+
+def credit_needs(quantities: dict):
+    """
+    Add delivered quantities to project needs ({need_id: quantity}) and mark
+    the needs that reached their target as fulfilled.
+    """
+    from apps.projects.models import ProjectNeed
+
+    quantities = {need_id: qty for need_id, qty in quantities.items() if need_id and qty}
+    if not quantities:
+        return
+    with transaction.atomic():
+        for need_id, quantity in quantities.items():
+            ProjectNeed.objects.filter(pk=need_id).update(
+                quantity_received=F('quantity_received') + quantity
+            )
+        ProjectNeed.objects.filter(
+            pk__in=quantities, is_fulfilled=False, quantity_needed__gt=0,
+            quantity_received__gte=F('quantity_needed'),
+        ).update(is_fulfilled=True)
+    # Queryset updates bypass the model signals
+    transaction.on_commit(invalidate_donate_pages)
+
+
+def deliver_contributions(contributions) -> int:
+    """
+    Mark contributions as delivered and credit their project needs.
+
+    Args:
+        contributions: MaterialContribution queryset; contributions already
+            delivered or cancelled are skipped, so repeating a delivery
+            never counts twice.
+
+    Returns:
+        Number of contributions delivered
+    """
+    from ..models import MaterialContribution
+
+    excluded = [MaterialContribution.Status.DELIVERED, MaterialContribution.Status.CANCELLED]
+    with transaction.atomic():
+        rows = list(
+            contributions.exclude(status__in=excluded)
+            .select_for_update()
+            .values_list('pk', 'project_need_id', 'quantity')
+        )
+        if not rows:
+            return 0
+
+        MaterialContribution.objects.filter(pk__in=[pk for pk, _, _ in rows]).update(
+            status=MaterialContribution.Status.DELIVERED, updated_at=timezone.now()
+        )
+        quantities = defaultdict(int)
+        for _, need_id, quantity in rows:
+            quantities[need_id] += quantity
+        credit_needs(quantities)
+    return len(rows)
@@ -0,0 +1,72 @@
+"""
+Donation Notifications
+Builds donor emails (thank-you notes, receipts) and queues them in the outbox.
+"""
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils import translation
+from django.utils.translation import gettext as _
+
+from apps.core.email_service import enqueue_many
+
+
+def _site_name():
+    from apps.core.models import SiteSettings
+    return SiteSettings.get_settings().site_name
+
+
+def _message(donation, subject, template_name, site_name, category, **extra):
+    context = {
+        'name': donation.donor_name,
+        'amount': donation.formatted_amount,
+        'project': donation.project.title if donation.project else '',
+        'site_name': site_name,
+    }
+    context.update(extra.pop('context', {}))
+    return {
+        'to_email': donation.donor_email,
+        'subject': subject,
+        'body_text': render_to_string(f'emails/{template_name}.txt', context),
+        'category': category,
+        **extra,
+    }
+
+
+def queue_thank_you_emails(donations) -> list:
+    """
+    Queue thank-you emails for donations.
+
+    Returns:
+        Primary keys of the donations that were queued
+    """
+    site_name = _site_name()
+    messages, queued = [], []
+    with translation.override(settings.LANGUAGE_CODE):
+        subject = _("Merci pour votre don !")
+        for donation in donations:
+            if not donation.donor_email:
+                continue
+            messages.append(_message(donation, subject, 'donation_thank_you', site_name, 'donation'))
+            queued.append(donation.pk)
+    enqueue_many(messages)
+    return queued
+
+
+def queue_receipt_emails(donations) -> int:
+    """Queue receipt emails with the stored receipt attached"""
+    from apps.donations.services.receipts import receipt_number
+
+    site_name = _site_name()
+    messages = []
+    with translation.override(settings.LANGUAGE_CODE):
+        subject = _("Votre reçu fiscal")
+        for donation in donations:
+            if not donation.donor_email or not donation.receipt_file:
+                continue
+            messages.append(_message(
+                donation, subject, 'donation_receipt', site_name, 'receipt',
+                attachments=[donation.receipt_file.name],
+                context={'receipt_number': receipt_number(donation)},
+            ))
+    return enqueue_many(messages)
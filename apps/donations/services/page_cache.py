@@ -0,0 +1,81 @@
+"""
+Donate Page Cache
+Cached, per-language context bundles for the donate pages.
+
+The bundles only hold database content (projects, needs, impacts, FAQs);
+the CSRF token, messages and anything else request-specific are still
+added by the view and the template at render time.
+
+All bundles share a versioned namespace (apps/core/cache.py). Any change to
+a Project, ProjectNeed, DonationImpact or FAQ bumps it (see signals.py),
+which invalidates every language and every project page at once; bundles
+themselves never change, so workers can serve them from process memory.
+The donate pages show no funding amounts, so completed donations and
+refunds leave the bundles alone (progress is in apps/projects/progress.py).
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import translation
+
+from apps.core.cache import bump_version, versioned_key
+
+NAMESPACE = 'donate_page'
+
+
+def _timeout() -> int:
+    return getattr(settings, 'DONATE_PAGE_CACHE_TIMEOUT', 600)
+
+
+def _key(*parts) -> str:
+    language = translation.get_language() or settings.LANGUAGE_CODE
+    return versioned_key(NAMESPACE, language, *parts)
+
+
+def invalidate_donate_pages():
+    """Drop every cached donate page bundle"""
+    bump_version(NAMESPACE)
+
+
+def _build_donate_context() -> dict:
+    from apps.core.models import FAQ
+    from apps.donations.models import DonationImpact
+    from apps.projects.models import Project, ProjectNeed
+
+    return {
+        'projects': list(Project.objects.filter(status='active')),
+        'impact_examples': list(DonationImpact.objects.all()[:6]),
+        'featured_impacts': list(DonationImpact.objects.filter(is_featured=True)[:3]),
+        'faqs': list(FAQ.objects.filter(is_active=True)[:10]),
+        # Material needs for the in-kind donation form
+        'material_needs': list(ProjectNeed.objects.filter(
+            need_type='material',
+            is_fulfilled=False
+        ).select_related('project')),
+    }
+
+
+def get_donate_context() -> dict:
+    """Context bundle for the general donate page in the active language"""
+    return cache.get_or_set(_key('index'), _build_donate_context, _timeout())
+
+
+def get_project_donate_context(project_slug: str):
+    """
+    Context bundle for a project's donate page in the active language.
+
+    Returns:
+        dict, or None if there is no active project with that slug (not
+        cached: any slug in a URL would otherwise take a cache entry)
+    """
+    from apps.projects.models import Project
+
+    key = _key('project', project_slug)
+    bundle = cache.get(key)
+    if bundle is None:
+        project = Project.objects.filter(slug=project_slug, status='active').first()
+        if project is None:
+            return None
+        bundle = {'project': project, 'needs': list(project.needs.filter(is_fulfilled=False))}
+        cache.set(key, bundle, _timeout())
+    return bundle
@@ -0,0 +1,235 @@
+"""
+Receipt Service
+Renders per-donation tax receipts in a process pool and stores them in media storage.
+
+Rendering is CPU-bound (template rendering, optional PDF conversion), so it
+runs in worker processes; the parent process only claims donations, writes
+files, batches the `receipt_sent` updates and queues the receipt emails.
+
+Web requests never render: the admin action only queues donations
+(`queue_receipts`), and `python manage.py generate_receipts --queued` (from
+cron, or with --loop) renders them. Each batch is claimed with a conditional
+UPDATE before rendering, so concurrent runs never issue a receipt twice and a
+run that dies leaves its batch reclaimable once RECEIPT_CLAIM_LEASE expires.
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models import Q
+from django.utils import timezone
+
+from .notifications import queue_receipt_emails
+
+try:
+    from weasyprint import HTML as WeasyHTML
+    WEASYPRINT_AVAILABLE = True
+except ImportError:
+    WEASYPRINT_AVAILABLE = False
+    WeasyHTML = None
+
+logger = logging.getLogger(__name__)
+
+# A claimed batch is reclaimable after this long (run died mid-batch)
+RECEIPT_CLAIM_LEASE = timedelta(minutes=10)
+
+
+def receipt_format() -> str:
+    """'pdf' when requested and weasyprint is installed, otherwise 'html'"""
+    wanted = getattr(settings, 'RECEIPT_FORMAT', 'html')
+    return 'pdf' if wanted == 'pdf' and WEASYPRINT_AVAILABLE else 'html'
+
+
+def receipt_number(donation) -> str:
+    year = (donation.completed_at or donation.created_at).year
+    return f"FDTM-{year}-{donation.pk:06d}"
+
+
+def receipt_context(donation, organization: dict) -> dict:
+    """Build a picklable rendering context for a donation"""
+    completed_at = donation.completed_at or donation.created_at
+    return {
+        'pk': donation.pk,
+        'reference': str(donation.reference),
+        'receipt_number': receipt_number(donation),
+        'year': completed_at.year,
+        'date': completed_at.date().isoformat(),
+        'donor_name': donation.donor_name,
+        'donor_email': donation.donor_email,
+        'amount': f"{donation.amount:,.2f}",
+        'currency': donation.currency,
+        'formatted_amount': donation.formatted_amount,
+        'payment_method': donation.get_payment_method_display(),
+        'project': donation.project.title if donation.project else '',
+        'organization': organization,
+        'language': settings.LANGUAGE_CODE,
+        'format': receipt_format(),
+    }
+
+
+def _init_worker(settings_module: str):
+    """Process pool initializer: boot Django in the worker"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def render_receipt(context: dict):
+    """
+    Render one receipt (runs in a worker process).
+
+    Returns:
+        (pk, filename, content bytes)
+    """
+    from django.template.loader import render_to_string
+    from django.utils import translation
+
+    with translation.override(context['language']):
+        html = render_to_string('donations/receipt.html', context)
+
+    filename = f"{context['year']}/{context['receipt_number']}"
+    if context['format'] == 'pdf':
+        return context['pk'], f"{filename}.pdf", WeasyHTML(string=html).write_pdf()
+    return context['pk'], f"{filename}.html", html.encode('utf-8')
+
+
+def _organization() -> dict:
+    from apps.core.models import SiteSettings
+
+    site = SiteSettings.get_settings()
+    return {
+        'name': site.site_name,
+        'address': site.address,
+        'email': site.contact_email,
+        'phone': site.contact_phone,
+    }
+
+
+def queue_receipts(donation_ids) -> int:
+    """
+    Queue completed donations without a receipt for the next
+    `generate_receipts --queued` run.
+
+    Returns:
+        Number of donations queued (already queued or claimed ones are skipped)
+    """
+    from apps.donations.models import Donation
+
+    return Donation.objects.filter(
+        pk__in=list(donation_ids),
+        status=Donation.Status.COMPLETED,
+        receipt_sent=False,
+        receipt_status=Donation.ReceiptStatus.NONE,
+    ).update(receipt_status=Donation.ReceiptStatus.QUEUED)
+
+
+def queued_receipt_ids() -> list:
+    """Donations queued by the admin, plus claims whose run died"""
+    from apps.donations.models import Donation
+
+    return list(Donation.objects.filter(
+        Q(receipt_status=Donation.ReceiptStatus.QUEUED) |
+        Q(receipt_status=Donation.ReceiptStatus.RENDERING, receipt_claimed_until__lte=timezone.now()),
+        status=Donation.Status.COMPLETED,
+        receipt_sent=False,
+    ).values_list('pk', flat=True))
+
+
+def _claim(ids, force: bool) -> dict:
+    """Atomically claim the completed donations in `ids` for this run"""
+    from apps.donations.models import Donation
+
+    now = timezone.now()
+    claimable = (
+        ~Q(receipt_status=Donation.ReceiptStatus.RENDERING) |
+        Q(receipt_claimed_until__lte=now)  # expired lease
+    )
+    if not force:
+        claimable &= Q(receipt_sent=False)
+
+    lease_until = now + RECEIPT_CLAIM_LEASE
+    # Only rows still unclaimed are taken; a concurrent run gets the rest
+    Donation.objects.filter(claimable, pk__in=ids, status=Donation.Status.COMPLETED).update(
+        receipt_status=Donation.ReceiptStatus.RENDERING,
+        receipt_claimed_until=lease_until,
+    )
+    donations = (Donation.objects
+                 .filter(pk__in=ids,
+                         receipt_status=Donation.ReceiptStatus.RENDERING,
+                         receipt_claimed_until=lease_until)
+                 .select_related('project'))
+    return {donation.pk: donation for donation in donations}
+
+
+def generate_receipts(donation_ids, workers: int = None, batch_size: int = 200,
+                      force: bool = False) -> int:
+    """
+    Render and store receipts for completed donations.
+
+    Args:
+        donation_ids: Iterable of Donation primary keys
+        workers: Process pool size (default: settings.RECEIPT_WORKERS)
+        batch_size: Donations rendered and flagged per batch
+        force: Regenerate receipts that were already issued
+
+    Returns:
+        Number of receipts generated
+    """
+    from apps.donations.models import Donation
+
+    ids = sorted(set(donation_ids))
+    if not ids:
+        return 0
+
+    workers = workers or getattr(settings, 'RECEIPT_WORKERS', None) or os.cpu_count()
+    organization = _organization()
+    generated = 0
+
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'fdtm.settings'),),
+    )
+    with executor:
+        for start in range(0, len(ids), batch_size):
+            by_pk = _claim(ids[start:start + batch_size], force)
+            if not by_pk:
+                continue
+
+            try:
+                contexts = [receipt_context(donation, organization) for donation in by_pk.values()]
+                chunksize = max(1, len(contexts) // (workers * 4))
+                for pk, filename, content in executor.map(render_receipt, contexts, chunksize=chunksize):
+                    donation = by_pk[pk]
+                    if donation.receipt_file:
+                        donation.receipt_file.delete(save=False)
+                    donation.receipt_file.save(filename, ContentFile(content), save=False)
+                    donation.receipt_sent = True
+                    donation.receipt_status = Donation.ReceiptStatus.ISSUED
+                    donation.receipt_claimed_until = None
+            except Exception:
+                # Hand the batch back for the next run (forced reissues keep their receipt)
+                claimed = Donation.objects.filter(pk__in=list(by_pk))
+                claimed.filter(receipt_sent=False).update(
+                    receipt_status=Donation.ReceiptStatus.QUEUED, receipt_claimed_until=None,
+                )
+                claimed.filter(receipt_sent=True).update(
+                    receipt_status=Donation.ReceiptStatus.ISSUED, receipt_claimed_until=None,
+                )
+                raise
+
+            Donation.objects.bulk_update(
+                by_pk.values(), ['receipt_file', 'receipt_sent', 'receipt_status', 'receipt_claimed_until'],
+            )
+            queue_receipt_emails(by_pk.values())
+            generated += len(by_pk)
+            logger.info("Generated %s receipts (%s/%s)", generated, start + len(by_pk), len(ids))
+
+    return generated
+
@@ -3,14 +3,30 @@ Stripe Payment Service
 Handles Stripe checkout sessions and payment processing.
 """
 
-import stripe
 from django.conf import settings
 from django.urls import reverse
 from decimal import Decimal
 
+from apps.core import services
 
-# Initialize Stripe
-stripe.api_key = settings.STRIPE_SECRET_KEY
+
+def build_client():
+    """Configure the Stripe SDK on first use (services.get('stripe'))"""
+    import stripe
+    from .fapshi_service import HTTPX_AVAILABLE
+    from .gateway import deadline
+
+    stripe.api_key = settings.STRIPE_SECRET_KEY
+    if getattr(settings, 'STRIPE_API_BASE', ''):
+        # Local simulator (apps/donations/simulators.py) or a recording proxy
+        stripe.api_base = settings.STRIPE_API_BASE
+    # Never let the SDK wait longer than the gateway deadline
+    stripe.default_http_client = stripe.RequestsClient(
+        timeout=deadline(),
+        async_fallback_client=stripe.HTTPXClient(timeout=deadline()) if HTTPX_AVAILABLE else None,
+    )
+    stripe.max_network_retries = 0
+    return stripe
 
 
 class StripePaymentService:
@@ -27,7 +43,8 @@ class StripePaymentService:
         message: str = "",
         success_url: str = None,
         cancel_url: str = None,
-        metadata: dict = None
+        metadata: dict = None,
+        idempotency_key: str = None
     ) -> dict:
         """
         Create a Stripe Checkout Session for a donation.
@@ -43,10 +60,45 @@ class StripePaymentService:
             success_url: URL to redirect after successful payment
             cancel_url: URL to redirect after cancelled payment
             metadata: Additional metadata to store
+            idempotency_key: Makes retried/hedged requests return the same session
             
         Returns:
             dict with session_id and checkout_url
         """
+        stripe = services.get('stripe')
+        params = StripePaymentService._session_params(
+            amount, currency, donor_email, project_id, project_need_id,
+            donor_name, message, success_url, cancel_url, metadata,
+        )
+        try:
+            session = stripe.checkout.Session.create(**params, idempotency_key=idempotency_key)
+            return StripePaymentService._session_result(session)
+        except stripe.error.StripeError as e:
+            return {
+                'success': False,
+                'error': str(e),
+            }
+    
+    @staticmethod
+    async def create_checkout_session_async(amount: Decimal, currency: str, donor_email: str,
+                                            idempotency_key: str = None, **kwargs) -> dict:
+        """Async variant of create_checkout_session (same arguments and result)"""
+        stripe = services.get('stripe')
+        params = StripePaymentService._session_params(amount, currency, donor_email, **kwargs)
+        try:
+            session = await stripe.checkout.Session.create_async(**params, idempotency_key=idempotency_key)
+            return StripePaymentService._session_result(session)
+        except stripe.error.StripeError as e:
+            return {
+                'success': False,
+                'error': str(e),
+            }
+    
+    @staticmethod
+    def _session_params(amount, currency, donor_email, project_id=None, project_need_id=None,
+                        donor_name="", message="", success_url=None, cancel_url=None,
+                        metadata=None) -> dict:
+        """Build the Checkout Session parameters for a donation"""
         # Convert amount to cents
         amount_cents = int(amount * 100)
         
@@ -64,44 +116,41 @@ class StripePaymentService:
         if metadata:
             session_metadata.update(metadata)
         
-        # Create checkout session
-        try:
-            session = stripe.checkout.Session.create(
-                payment_method_types=['card'],
-                line_items=[{
-                    'price_data': {
-                        'currency': currency.lower(),
-                        'unit_amount': amount_cents,
-                        'product_data': {
-                            'name': 'Don à la Fondation FDTM',
-                            'description': f'Don de {amount} {currency}' + 
-                                          (f' pour le projet' if project_id else ' - Fonds général'),
-                        },
+        return {
+            'payment_method_types': ['card'],
+            'line_items': [{
+                'price_data': {
+                    'currency': currency.lower(),
+                    'unit_amount': amount_cents,
+                    'product_data': {
+                        'name': 'Don à la Fondation FDTM',
+                        'description': f'Don de {amount} {currency}' + 
+                                      (f' pour le projet' if project_id else ' - Fonds général'),
                     },
-                    'quantity': 1,
-                }],
-                mode='payment',
-                customer_email=donor_email,
-                success_url=success_url or settings.SITE_URL + reverse('donations:success') + '?session_id={CHECKOUT_SESSION_ID}',
-                cancel_url=cancel_url or settings.SITE_URL + reverse('donations:cancelled'),
-                metadata=session_metadata,
-            )
-            
-            return {
-                'success': True,
-                'session_id': session.id,
-                'checkout_url': session.url,
-            }
-            
-        except stripe.error.StripeError as e:
-            return {
-                'success': False,
-                'error': str(e),
-            }
+                },
+                'quantity': 1,
+            }],
+            'mode': 'payment',
+            'customer_email': donor_email,
+            'success_url': success_url or settings.SITE_URL + reverse('donations:success') + '?session_id={CHECKOUT_SESSION_ID}',
+            'cancel_url': cancel_url or settings.SITE_URL + reverse('donations:cancelled'),
+            'metadata': session_metadata,
+            # Copied to the PaymentIntent so payment_failed events can be matched
+            'payment_intent_data': {'metadata': session_metadata},
+        }
+    
+    @staticmethod
+    def _session_result(session) -> dict:
+        return {
+            'success': True,
+            'session_id': session.id,
+            'checkout_url': session.url,
+        }
     
     @staticmethod
     def retrieve_session(session_id: str) -> dict:
         """Retrieve a checkout session by ID"""
+        stripe = services.get('stripe')
         try:
             session = stripe.checkout.Session.retrieve(session_id)
             return {
@@ -122,6 +171,7 @@ class StripePaymentService:
     @staticmethod
     def construct_webhook_event(payload: bytes, sig_header: str) -> dict:
         """Construct and verify a webhook event"""
+        stripe = services.get('stripe')
         try:
             event = stripe.Webhook.construct_event(
                 payload, sig_header, settings.STRIPE_WEBHOOK_SECRET
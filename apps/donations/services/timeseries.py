@@ -0,0 +1,186 @@
+"""
+Funding Time Series
+Hourly, daily and weekly funding rollups per project and per need, for the
+funding-over-time charts.
+
+Every completion (or refund) adds the converted amount to the bucket it
+falls in, at each resolution, and records the project's (or need's) total
+right after the credit as the bucket's cumulative value. A chart reads at
+most FUNDING_CHART_POINTS rows from the unique (series, resolution,
+bucket_start) index, however many donations the project has.
+
+Hourly rows are only useful for recent activity and are pruned after
+FUNDING_HOURLY_RETENTION_DAYS (`rebuild_funding_rollups --prune`).
+"""
+
+from collections import OrderedDict
+from datetime import datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+RESOLUTIONS = ('hour', 'day', 'week')
+
+DEFAULT_CHART_POINTS = {'hour': 168, 'day': 90, 'week': 104}
+
+
+def series_key(project_id: int, need_id: int = None) -> str:
+    return f'n{need_id}' if need_id else f'p{project_id}'
+
+
+def bucket_start(moment: datetime, resolution: str) -> datetime:
+    """Start of the bucket holding `moment`, in the site timezone"""
+    local = timezone.localtime(moment)
+    if resolution == 'hour':
+        return local.replace(minute=0, second=0, microsecond=0)
+    day = local.date()
+    if resolution == 'week':
+        day -= timedelta(days=day.weekday())
+    return timezone.make_aware(datetime.combine(day, dt_time.min))
+
+
+def _add_point(series, project_id, need_id, resolution, start, amount, count, cumulative):
+    from apps.donations.models import FundingRollup
+
+    rows = FundingRollup.objects.filter(series=series, resolution=resolution, bucket_start=start)
+    updates = {'amount': F('amount') + amount, 'donation_count': F('donation_count') + count,
+               'cumulative': cumulative}
+    if rows.update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            FundingRollup.objects.create(
+                series=series, project_id=project_id, project_need_id=need_id,
+                resolution=resolution, bucket_start=start,
+                amount=amount, donation_count=count, cumulative=cumulative,
+            )
+    except IntegrityError:
+        # Another worker created the bucket first
+        rows.update(**updates)
+
+
+def record_funding(donation, sign: int = 1):
+    """
+    Add (sign=1) or remove (sign=-1) a credited donation to the time series.
+    Call after credit_project() so the cumulative values include it.
+    """
+    from apps.projects.models import Project, ProjectNeed
+
+    if not donation.project_id or donation.converted_amount is None:
+        return
+    moment = donation.completed_at if sign > 0 and donation.completed_at else timezone.now()
+    amount = donation.converted_amount * sign
+
+    targets = [(donation.project_id, None,
+                Project.objects.filter(pk=donation.project_id).values_list('current_amount', flat=True).first())]
+    if donation.project_need_id:
+        targets.append((donation.project_id, donation.project_need_id,
+                        ProjectNeed.objects.filter(pk=donation.project_need_id)
+                        .values_list('current_amount', flat=True).first()))
+
+    for project_id, need_id, cumulative in targets:
+        if cumulative is None:
+            continue
+        series = series_key(project_id, need_id)
+        for resolution in RESOLUTIONS:
+            _add_point(series, project_id, need_id, resolution, bucket_start(moment, resolution),
+                       amount, sign, cumulative)
+
+
+def chart_points(project_id: int, need_id: int = None, resolution: str = 'day', limit: int = None):
+    """
+    Latest buckets of a series, oldest first.
+
+    Returns:
+        [[bucket_start ISO string, cumulative, amount], ...] with amounts as floats
+    """
+    from apps.donations.models import FundingRollup
+
+    if limit is None:
+        points = getattr(settings, 'FUNDING_CHART_POINTS', DEFAULT_CHART_POINTS)
+        limit = points.get(resolution, 100)
+    rows = (
+        FundingRollup.objects
+        .filter(series=series_key(project_id, need_id), resolution=resolution)
+        .order_by('-bucket_start')
+        .values_list('bucket_start', 'cumulative', 'amount')[:limit]
+    )
+    return [
+        [timezone.localtime(start).isoformat(), float(cumulative), float(amount)]
+        for start, cumulative, amount in reversed(rows)
+    ]
+
+
+def rebuild_rollups(chunk_size: int = 2000) -> int:
+    """
+    Rebuild every series from completed donations in one pass.
+    Cumulative values are running sums of converted donations, shifted so
+    the last bucket matches the current total (which may include manual
+    adjustments or refunds). Donations completed before conversion existed
+    have no converted amount: those in the project currency count as is.
+
+    Returns:
+        Number of rollup rows written
+    """
+    from apps.donations.models import Donation, FundingRollup
+    from apps.projects.models import Project, ProjectNeed
+
+    donations = (
+        Donation.objects
+        .filter(status=Donation.Status.COMPLETED, project__isnull=False)
+        .order_by('completed_at', 'pk')
+        .values_list('completed_at', 'created_at', 'project_id', 'project_need_id', 'converted_amount',
+                     'amount', 'currency', 'project__currency')
+    )
+
+    buckets = OrderedDict()
+    running = {}
+    for (completed_at, created_at, project_id, need_id, converted,
+         amount, currency, project_currency) in donations.iterator(chunk_size=chunk_size):
+        if converted is None:
+            if currency != project_currency:
+                continue
+            converted = amount
+        moment = completed_at or created_at
+        for target_need in ([None, need_id] if need_id else [None]):
+            series = series_key(project_id, target_need)
+            running[series] = running.get(series, Decimal('0')) + converted
+            for resolution in RESOLUTIONS:
+                key = (series, resolution, bucket_start(moment, resolution))
+                entry = buckets.get(key)
+                if entry is None:
+                    entry = buckets[key] = [project_id, target_need, Decimal('0'), 0, Decimal('0')]
+                entry[2] += converted
+                entry[3] += 1
+                entry[4] = running[series]
+
+    current = {series_key(pk, None): amount for pk, amount in Project.objects.values_list('pk', 'current_amount')}
+    current.update({series_key(None, pk): amount
+                    for pk, amount in ProjectNeed.objects.values_list('pk', 'current_amount')})
+    offsets = {series: current.get(series, total) - total for series, total in running.items()}
+
+    objects = [
+        FundingRollup(
+            series=series, resolution=resolution, bucket_start=start,
+            project_id=project_id, project_need_id=need_id,
+            amount=amount, donation_count=count, cumulative=cumulative + offsets[series],
+        )
+        for (series, resolution, start), (project_id, need_id, amount, count, cumulative) in buckets.items()
+    ]
+    with transaction.atomic():
+        FundingRollup.objects.all().delete()
+        FundingRollup.objects.bulk_create(objects, batch_size=1000)
+    return len(objects)
+
+
+def prune_hourly(days: int = None) -> int:
+    """Delete hourly buckets older than `days` (FUNDING_HOURLY_RETENTION_DAYS)"""
+    from apps.donations.models import FundingRollup
+
+    days = days or getattr(settings, 'FUNDING_HOURLY_RETENTION_DAYS', 90)
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = FundingRollup.objects.filter(resolution='hour', bucket_start__lt=cutoff).delete()
+    return deleted
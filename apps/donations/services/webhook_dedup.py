@@ -0,0 +1,90 @@
+"""
+Webhook Deduplication
+Remembers which provider events were already processed, so retried
+deliveries are acknowledged without touching the database.
+
+Stripe redelivers an event until it gets a 2xx, and can send distinct events
+for the same checkout session. Both the event ID and the session ID are
+recorded once an event has been handled:
+
+- a bounded LRU in this process answers repeats in microseconds;
+- the default cache shares the seen-set with the other workers.
+
+Keys are only recorded after successful processing: an event that failed
+half-way is retried normally. Donation.mark_completed() stays idempotent for
+deliveries that get past both layers (e.g. after a cache flush).
+"""
+
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+KEY_PREFIX = 'webhooks:seen:'
+
+
+class SeenSet:
+    """Process-local LRU in front of a cache-backed seen-set"""
+
+    def __init__(self, max_size: int = None):
+        self._max_size = max_size
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size or getattr(settings, 'WEBHOOK_SEEN_LRU_SIZE', 10000)
+
+    def seen(self, *keys) -> bool:
+        """True if any of the keys was already processed"""
+        keys = [key for key in keys if key]
+        with self._lock:
+            for key in keys:
+                if key in self._local:
+                    self._local.move_to_end(key)
+                    return True
+
+        try:
+            found = cache.get_many([KEY_PREFIX + key for key in keys])
+        except Exception:
+            return False
+        if found:
+            self._remember(keys)
+            return True
+        return False
+
+    def mark(self, *keys):
+        """Record keys as processed"""
+        keys = [key for key in keys if key]
+        self._remember(keys)
+        timeout = getattr(settings, 'WEBHOOK_SEEN_TTL', 3 * 24 * 3600)
+        try:
+            cache.set_many({KEY_PREFIX + key: 1 for key in keys}, timeout)
+        except Exception:
+            pass
+
+    def _remember(self, keys):
+        with self._lock:
+            for key in keys:
+                self._local[key] = True
+                self._local.move_to_end(key)
+            while len(self._local) > self.max_size:
+                self._local.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+
+
+stripe_events = SeenSet()
+
+
+def stripe_event_keys(event: dict) -> list:
+    """Dedup keys for a Stripe event: its ID, plus the checkout session it completes"""
+    keys = [f"stripe:event:{event.get('id', '')}"] if event.get('id') else []
+    if event.get('type') == 'checkout.session.completed':
+        session_id = (event.get('data') or {}).get('object', {}).get('id')
+        if session_id:
+            keys.append(f'stripe:session:{session_id}')
+    return keys
@@ -1,12 +1,22 @@
 """
 Donations App Signals
-Handles automatic project amount updates when donations are completed.
+Handles automatic project amount updates when donations are completed,
+and keeps the daily donation aggregates in sync.
 """
 
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save, post_delete, pre_delete
 from django.dispatch import receiver
 from django.utils import timezone
 
+from apps.projects.progress import forget_progress, publish_project_progress
+
+from .services.aggregates import detach_aggregates, snapshot_donation, record_donation_change
+from .services.currency import apply_conversion, credit_project, get_rate_table
+from .services.materials import credit_needs
+from .services.page_cache import invalidate_donate_pages
+from .services.timeseries import record_funding
+
 
 @receiver(pre_save, sender='donations.Donation')
 def track_donation_status_change(sender, instance, **kwargs):
@@ -20,11 +30,14 @@ def track_donation_status_change(sender, instance, **kwargs):
             from .models import Donation
             old_donation = Donation.objects.get(pk=instance.pk)
             instance._old_status = old_donation.status
+            instance._old_aggregate = snapshot_donation(old_donation)
         except sender.DoesNotExist:
             instance._old_status = None
+            instance._old_aggregate = None
     else:
         # New donation
         instance._old_status = None
+        instance._old_aggregate = None
 
 
 @receiver(post_save, sender='donations.Donation')
@@ -34,9 +47,9 @@ def update_project_on_donation_complete(sender, instance, created, **kwargs):
     Handles both:
     - New donations created with status='completed'
     - Existing donations that had their status changed to 'completed'
+    The donation amount is converted into the project currency first, so an
+    XAF gift to a EUR project is credited in EUR.
     """
-    from decimal import Decimal
-    
     old_status = getattr(instance, '_old_status', None)
     new_status = instance.status
     
@@ -50,21 +63,20 @@ def update_project_on_donation_complete(sender, instance, created, **kwargs):
         # Set completed_at if not already set
         if not instance.completed_at:
             instance.completed_at = timezone.now()
-            # Use update to avoid triggering signals again
-            sender.objects.filter(pk=instance.pk).update(completed_at=instance.completed_at)
         
-        # Update project current_amount
-        if instance.project:
-            from apps.projects.models import Project
-            project = instance.project
-            project.current_amount = (project.current_amount or Decimal('0')) + instance.amount
-            project.save(update_fields=['current_amount'])
-            
-            # Update specific project need if applicable
-            if instance.project_need:
-                need = instance.project_need
-                need.current_amount = (need.current_amount or Decimal('0')) + instance.amount
-                need.save(update_fields=['current_amount'])
+        # Freeze the amount in the project currency at completion time
+        apply_conversion(instance)
+        
+        # Use update to avoid triggering signals again
+        sender.objects.filter(pk=instance.pk).update(
+            completed_at=instance.completed_at,
+            converted_amount=instance.converted_amount,
+            converted_currency=instance.converted_currency,
+            exchange_rate=instance.exchange_rate,
+        )
+        
+        credit_project(instance)
+        record_funding(instance)
     
     # Handle refunds - subtract from project amounts
     is_newly_refunded = (
@@ -73,16 +85,50 @@ def update_project_on_donation_complete(sender, instance, created, **kwargs):
     )
     
     if is_newly_refunded:
-        if instance.project:
-            from apps.projects.models import Project
-            project = instance.project
-            project.current_amount = max((project.current_amount or Decimal('0')) - instance.amount, Decimal('0'))
-            project.save(update_fields=['current_amount'])
-            
-            if instance.project_need:
-                need = instance.project_need
-                need.current_amount = max((need.current_amount or Decimal('0')) - instance.amount, Decimal('0'))
-                need.save(update_fields=['current_amount'])
+        credit_project(instance, sign=-1)
+        record_funding(instance, sign=-1)
+
+
+@receiver(post_save, sender='donations.Donation')
+def update_aggregates_on_donation_save(sender, instance, created, **kwargs):
+    """Move the donation into its (possibly new) daily aggregate bucket."""
+    old = None if created else getattr(instance, '_old_aggregate', None)
+    record_donation_change(old=old, new=snapshot_donation(instance))
+    instance._old_aggregate = snapshot_donation(instance)
+
+
+@receiver(post_save, sender='donations.Donation')
+def publish_progress_on_donation_save(sender, instance, created, **kwargs):
+    """
+    Refresh the project's funding progress snapshot once a completion or
+    refund is committed. Registered after the aggregate receiver so the
+    donor count includes this donation.
+    """
+    old_status = None if created else getattr(instance, '_old_status', None)
+    if not instance.project_id or old_status == instance.status:
+        return
+    if 'completed' not in (old_status, instance.status):
+        return
+    project_id = instance.project_id
+    transaction.on_commit(lambda: publish_project_progress(project_id))
+
+
+@receiver(post_delete, sender='donations.Donation')
+def update_aggregates_on_donation_delete(sender, instance, **kwargs):
+    """Remove a deleted donation from its daily aggregate bucket."""
+    record_donation_change(old=snapshot_donation(instance))
+
+
+@receiver(pre_delete, sender='projects.Project')
+def detach_project_aggregates(sender, instance, **kwargs):
+    """Merge a deleted project's aggregate buckets into the general ones."""
+    detach_aggregates(project=instance)
+
+
+@receiver(pre_delete, sender='projects.ProjectNeed')
+def detach_need_aggregates(sender, instance, **kwargs):
+    """Merge a deleted need's aggregate buckets into its project's."""
+    detach_aggregates(project_need=instance)
 
 
 @receiver(post_save, sender='donations.MaterialContribution')
@@ -99,10 +145,8 @@ def update_need_on_material_delivered(sender, instance, created, **kwargs):
         (created or old_status != 'delivered')
     )
     
-    if is_newly_delivered and instance.project_need:
-        need = instance.project_need
-        need.quantity_received = (need.quantity_received or 0) + instance.quantity
-        need.save(update_fields=['quantity_received'])
+    if is_newly_delivered and instance.project_need_id:
+        credit_needs({instance.project_need_id: instance.quantity})
 
 
 @receiver(pre_save, sender='donations.MaterialContribution')
@@ -117,3 +161,24 @@ def track_material_status_change(sender, instance, **kwargs):
             instance._old_status = None
     else:
         instance._old_status = None
+
+
+@receiver([post_save, post_delete], sender='donations.ExchangeRate')
+def invalidate_rate_table(sender, **kwargs):
+    """Reload exchange rates on next use after any rate change."""
+    get_rate_table().invalidate()
+
+
+@receiver([post_save, post_delete], sender='projects.Project')
+@receiver([post_save, post_delete], sender='projects.ProjectNeed')
+@receiver([post_save, post_delete], sender='donations.DonationImpact')
+@receiver([post_save, post_delete], sender='core.FAQ')
+def invalidate_donate_page_cache(sender, **kwargs):
+    """Rebuild the cached donate page bundles after any content change."""
+    invalidate_donate_pages()
+
+
+@receiver([post_save, post_delete], sender='projects.Project')
+def forget_project_progress(sender, instance, **kwargs):
+    """Goal or status changes: rebuild the progress snapshot on next read."""
+    forget_progress([instance.slug])
@@ -0,0 +1,350 @@
+"""
+Payment Provider Simulators
+Local stand-ins for the parts of the Stripe and Fapshi APIs the site uses,
+for load and failure testing without live endpoints.
+
+Stripe:
+    POST /v1/checkout/sessions           (form-encoded, honours Idempotency-Key)
+    GET  /v1/checkout/sessions/<id>
+Fapshi:
+    POST /initiate-pay                   (JSON)
+    GET  /payment-status/<transId>
+Hosted payment page:
+    GET  /pay/<id>                       completes the payment and redirects
+
+Completed (or failed) payments are reported to the site's `stripe_webhook`
+and `fapshi_webhook` endpoints with valid signatures, either when the hosted
+page is visited or automatically after `complete_after` seconds.
+
+Run with `python manage.py run_payment_simulator` and point the site at it
+with STRIPE_API_BASE / FAPSHI_API_BASE.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class SimulatorConfig:
+    """Behaviour knobs shared by all handler threads"""
+
+    def __init__(self, base_url, site_url, latency=0.0, jitter=0.0, error_rate=0.0,
+                 decline_rate=0.0, complete_after=None, webhook_delay=0.0,
+                 stripe_webhook_secret='', fapshi_secret=''):
+        self.base_url = base_url.rstrip('/')
+        self.site_url = site_url.rstrip('/')
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.decline_rate = decline_rate
+        self.complete_after = complete_after
+        self.webhook_delay = webhook_delay
+        self.stripe_webhook_secret = stripe_webhook_secret
+        self.fapshi_secret = fapshi_secret
+
+
+class PaymentStore:
+    """In-memory sessions/transactions"""
+
+    def __init__(self):
+        self.payments = {}
+        self.idempotency = {}
+        self.lock = threading.Lock()
+
+    def add(self, payment, idempotency_key=None):
+        with self.lock:
+            if idempotency_key and idempotency_key in self.idempotency:
+                return self.payments[self.idempotency[idempotency_key]], False
+            self.payments[payment['id']] = payment
+            if idempotency_key:
+                self.idempotency[idempotency_key] = payment['id']
+            return payment, True
+
+    def get(self, payment_id):
+        return self.payments.get(payment_id)
+
+
+def _nested_form(body: str) -> dict:
+    """Decode Stripe's form encoding (a[b][0][c]=v) into nested dicts"""
+    result = {}
+    for key, value in parse_qsl(body, keep_blank_values=True):
+        parts = re.findall(r'[^\[\]]+', key)
+        node = result
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = value
+    return result
+
+
+def stripe_signature(payload: bytes, secret: str, timestamp: int = None) -> str:
+    """Stripe-Signature header value for a webhook payload"""
+    timestamp = timestamp or int(time.time())
+    signed = f"{timestamp}.".encode() + payload
+    digest = hmac.new(secret.encode(), signed, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def fapshi_signature(payload: bytes, secret: str) -> str:
+    return hmac.new(secret.encode(), payload, hashlib.sha256).hexdigest()
+
+
+def stripe_session(config: SimulatorConfig, payment: dict) -> dict:
+    return {
+        'id': payment['id'],
+        'object': 'checkout.session',
+        'url': f"{config.base_url}/pay/{payment['id']}",
+        'mode': 'payment',
+        'status': 'complete' if payment['status'] == 'paid' else 'open',
+        'payment_status': payment['status'] if payment['status'] == 'paid' else 'unpaid',
+        'payment_intent': payment['payment_intent'],
+        'customer_email': payment['email'],
+        'amount_total': payment['amount'],
+        'currency': payment['currency'],
+        'metadata': payment['metadata'],
+        'success_url': payment['success_url'],
+        'cancel_url': payment['cancel_url'],
+        'livemode': False,
+    }
+
+
+def fapshi_status(payment: dict) -> dict:
+    return {
+        'transId': payment['id'],
+        'status': payment['status'],
+        'medium': 'mobile money',
+        'amount': payment['amount'],
+        'email': payment['email'],
+        'phone': payment['phone'],
+        'name': payment['name'],
+        'externalId': payment['external_id'],
+        'userId': payment['user_id'],
+    }
+
+
+class SimulatorHandler(BaseHTTPRequestHandler):
+    config: SimulatorConfig = None
+    store: PaymentStore = None
+
+    # -------------------------------------------------------------------------
+    # Plumbing
+
+    def log_message(self, format, *args):
+        logger.debug("simulator: " + format, *args)
+
+    def _send_json(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self) -> str:
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length).decode() if length else ''
+
+    def _simulate(self) -> bool:
+        """Apply latency and error injection; False if an error was sent"""
+        delay = self.config.latency + random.uniform(0, self.config.jitter)
+        if delay:
+            time.sleep(delay)
+        if random.random() < self.config.error_rate:
+            self._send_json(503, {'error': {'type': 'api_error', 'message': 'Injected failure'}})
+            return False
+        return True
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        routes = [
+            (r'^/v1/checkout/sessions/([\w-]+)$', self.stripe_retrieve_session),
+            (r'^/payment-status/([\w-]+)$', self.fapshi_payment_status),
+            (r'^/pay/([\w-]+)$', self.hosted_page),
+        ]
+        self._dispatch(path, routes)
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        routes = [
+            (r'^/v1/checkout/sessions$', self.stripe_create_session),
+            (r'^/initiate-pay$', self.fapshi_initiate_pay),
+        ]
+        self._dispatch(path, routes)
+
+    def _dispatch(self, path, routes):
+        for pattern, handler in routes:
+            match = re.match(pattern, path)
+            if match:
+                return handler(*match.groups())
+        self._send_json(404, {'error': {'message': f'Unknown route {path}'}})
+
+    # -------------------------------------------------------------------------
+    # Stripe
+
+    def stripe_create_session(self):
+        body = _nested_form(self._body())
+        if not self._simulate():
+            return
+        try:
+            price = body['line_items']['0']['price_data']
+            amount = int(price['unit_amount']) * int(body['line_items']['0'].get('quantity', 1))
+        except (KeyError, ValueError):
+            return self._send_json(400, {'error': {'type': 'invalid_request_error',
+                                                   'message': 'line_items required'}})
+        payment = {
+            'provider': 'stripe',
+            'id': f"cs_test_{uuid.uuid4().hex}",
+            'payment_intent': f"pi_{uuid.uuid4().hex[:24]}",
+            'status': 'unpaid',
+            'amount': amount,
+            'currency': price.get('currency', 'eur'),
+            'email': body.get('customer_email', ''),
+            'metadata': body.get('metadata', {}),
+            'success_url': body.get('success_url', ''),
+            'cancel_url': body.get('cancel_url', ''),
+        }
+        payment, created = self.store.add(payment, self.headers.get('Idempotency-Key'))
+        if created:
+            self._schedule_completion(payment)
+        self._send_json(200, stripe_session(self.config, payment))
+
+    def stripe_retrieve_session(self, session_id):
+        if not self._simulate():
+            return
+        payment = self.store.get(session_id)
+        if not payment or payment['provider'] != 'stripe':
+            return self._send_json(404, {'error': {'type': 'invalid_request_error',
+                                                   'message': f'No such checkout.session: {session_id}'}})
+        self._send_json(200, stripe_session(self.config, payment))
+
+    # -------------------------------------------------------------------------
+    # Fapshi
+
+    def fapshi_initiate_pay(self):
+        try:
+            body = json.loads(self._body() or '{}')
+            amount = int(body['amount'])
+        except (ValueError, KeyError, TypeError):
+            return self._send_json(400, {'message': 'amount required'})
+        if not self._simulate():
+            return
+        if amount < 100:
+            return self._send_json(400, {'message': 'amount cannot be less than 100 XAF'})
+        payment = {
+            'provider': 'fapshi',
+            'id': uuid.uuid4().hex[:10],
+            'status': 'CREATED',
+            'amount': amount,
+            'email': body.get('email', ''),
+            'phone': body.get('phone', ''),
+            'name': body.get('message', ''),
+            'external_id': body.get('externalId', ''),
+            'user_id': body.get('userId', ''),
+            'success_url': body.get('redirectUrl', ''),
+            'cancel_url': body.get('redirectUrl', ''),
+        }
+        self.store.add(payment)
+        self._schedule_completion(payment)
+        self._send_json(200, {
+            'message': 'Request successful',
+            'link': f"{self.config.base_url}/pay/{payment['id']}",
+            'transId': payment['id'],
+            'dateInitiated': time.strftime('%Y-%m-%d'),
+        })
+
+    def fapshi_payment_status(self, trans_id):
+        if not self._simulate():
+            return
+        payment = self.store.get(trans_id)
+        if not payment or payment['provider'] != 'fapshi':
+            return self._send_json(400, {'message': 'invalid transaction id'})
+        self._send_json(200, fapshi_status(payment))
+
+    # -------------------------------------------------------------------------
+    # Hosted page and webhooks
+
+    def hosted_page(self, payment_id):
+        payment = self.store.get(payment_id)
+        if not payment:
+            return self._send_json(404, {'error': {'message': 'Unknown payment'}})
+        succeeded = complete_payment(self.config, payment)
+        location = payment['success_url'] if succeeded else payment['cancel_url']
+        self.send_response(302)
+        self.send_header('Location', location.replace('{CHECKOUT_SESSION_ID}', payment['id']))
+        self.end_headers()
+
+    def _schedule_completion(self, payment):
+        if self.config.complete_after is None:
+            return
+        timer = threading.Timer(self.config.complete_after, complete_payment, (self.config, payment))
+        timer.daemon = True
+        timer.start()
+
+
+def complete_payment(config: SimulatorConfig, payment: dict) -> bool:
+    """Settle a payment (declining some) and send the signed webhook. Idempotent."""
+    if payment.get('settled'):
+        return payment['succeeded']
+    payment['settled'] = True
+    payment['succeeded'] = random.random() >= config.decline_rate
+    if payment['provider'] == 'stripe':
+        payment['status'] = 'paid' if payment['succeeded'] else 'unpaid'
+    else:
+        payment['status'] = 'SUCCESSFUL' if payment['succeeded'] else 'FAILED'
+
+    if config.webhook_delay:
+        threading.Timer(config.webhook_delay, send_webhook, (config, payment)).start()
+    else:
+        send_webhook(config, payment)
+    return payment['succeeded']
+
+
+def send_webhook(config: SimulatorConfig, payment: dict):
+    if payment['provider'] == 'stripe':
+        session = stripe_session(config, payment)
+        if payment['succeeded']:
+            event_type, data = 'checkout.session.completed', session
+        else:
+            event_type = 'payment_intent.payment_failed'
+            data = {'id': payment['payment_intent'], 'object': 'payment_intent',
+                    'metadata': payment['metadata']}
+        event = {
+            'id': f"evt_{uuid.uuid4().hex[:24]}",
+            'object': 'event',
+            'type': event_type,
+            'created': int(time.time()),
+            'livemode': False,
+            'data': {'object': data},
+        }
+        payload = json.dumps(event).encode()
+        url = f"{config.site_url}/dons/webhook/stripe/"
+        headers = {'Stripe-Signature': stripe_signature(payload, config.stripe_webhook_secret)}
+    else:
+        payload = json.dumps(fapshi_status(payment)).encode()
+        url = f"{config.site_url}/dons/webhook/fapshi/"
+        headers = {'X-Fapshi-Signature': fapshi_signature(payload, config.fapshi_secret)}
+
+    headers['Content-Type'] = 'application/json'
+    try:
+        response = requests.post(url, data=payload, headers=headers, timeout=10)
+        logger.info("Webhook %s for %s -> %s", payment['provider'], payment['id'], response.status_code)
+    except requests.RequestException as e:
+        logger.warning("Webhook for %s failed: %s", payment['id'], e)
+
+
+def make_server(host: str, port: int, config: SimulatorConfig) -> ThreadingHTTPServer:
+    handler = type('Handler', (SimulatorHandler,), {'config': config, 'store': PaymentStore()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
@@ -8,6 +8,8 @@ app_name = 'donations'
 urlpatterns = [
     path('', views.donate, name='donate'),
     path('projet/<slug:project_slug>/', views.donate_to_project, name='donate_to_project'),
+    path('paiement/', views.create_checkout, name='create_checkout'),
+    path('paiement/async/', views.create_checkout_async, name='create_checkout_async'),
     path('succes/', views.donation_success, name='success'),
     path('annule/', views.donation_cancelled, name='cancelled'),
     path('contribution-materielle/', views.material_contribution, name='material_contribution'),
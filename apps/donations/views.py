@@ -3,48 +3,197 @@ Donations App Views
 Donation flow, payment processing, and webhooks.
 """
 
+import json
+import logging
+import time
+from decimal import Decimal, InvalidOperation
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import HttpResponse, JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 from django.contrib import messages
+from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from .models import Donation, MaterialContribution, DonationImpact
+from apps.core import metrics, profiling
+from apps.core.ratelimit import ratelimit
 from apps.projects.models import Project, ProjectNeed
+from .services.fapshi_service import FapshiPaymentService, process_fapshi_webhook
+from .services.gateway import PaymentProviderError, checkout_amount, get_payment_gateway
+from .services.page_cache import get_donate_context, get_project_donate_context
+from .services.webhook_dedup import stripe_event_keys, stripe_events
+
+logger = logging.getLogger(__name__)
+
+
+def _donate_page_context():
+    """Context shared by the donate pages"""
+    # Database content comes from the cached per-language bundle
+    return {
+        **get_donate_context(),
+        'stripe_public_key': settings.STRIPE_PUBLIC_KEY,
+        'checkout_url': reverse(
+            'donations:create_checkout_async' if settings.PAYMENT_ASYNC_CHECKOUT else 'donations:create_checkout'
+        ),
+        'payment_health': {
+            name: health['healthy'] for name, health in get_payment_gateway().status().items()
+        },
+    }
 
 
 def donate(request):
     """General donation page"""
-    from apps.core.models import FAQ
-    
-    # Get material needs for in-kind donation form
-    material_needs = ProjectNeed.objects.filter(
-        need_type='material',
-        is_fulfilled=False
-    ).select_related('project')
+    return render(request, 'donations/donate.html', _donate_page_context())
+
+
+def donate_to_project(request, project_slug):
+    """Donation page with a specific project preselected"""
+    bundle = get_project_donate_context(project_slug)
+    if bundle is None:
+        raise Http404
     
     context = {
-        'projects': Project.objects.filter(status='active'),
-        'impact_examples': DonationImpact.objects.all()[:6],
-        'featured_impacts': DonationImpact.objects.filter(is_featured=True)[:3],
-        'stripe_public_key': settings.STRIPE_PUBLIC_KEY,
-        'faqs': FAQ.objects.filter(is_active=True)[:10],
-        'material_needs': material_needs,
+        **_donate_page_context(),
+        'selected_project': bundle['project'],
+        'project_needs': bundle['needs'],
     }
     return render(request, 'donations/donate.html', context)
 
 
-def donate_to_project(request, project_slug):
-    """Donation page for a specific project"""
-    project = get_object_or_404(Project, slug=project_slug, status='active')
+# Donation.amount holds 12 digits; keep room for conversion into XAF
+MAX_CHECKOUT_AMOUNT = Decimal('1000000')
+
+
+def _parse_checkout(request):
+    """
+    Validate a checkout request body.
+
+    Returns:
+        (cleaned data, None) or (None, error JsonResponse)
+    """
+    invalid = JsonResponse({'error': _("Requête invalide.")}, status=400)
+    try:
+        data = json.loads(request.body or '{}')
+        if not isinstance(data, dict):
+            return None, invalid
+        amount = Decimal(str(data.get('amount', 0)))
+        project_id = int(data['project_id']) if data.get('project_id') else None
+    except (ValueError, TypeError, InvalidOperation):
+        return None, invalid
+    if not amount.is_finite() or amount > MAX_CHECKOUT_AMOUNT:
+        return None, invalid
     
-    context = {
-        'project': project,
-        'needs': project.needs.filter(is_fulfilled=False),
-        'stripe_public_key': settings.STRIPE_PUBLIC_KEY,
+    cleaned = {
+        'amount': amount,
+        'method': str(data.get('payment_method', 'stripe')),
+        'name': str(data.get('name') or '').strip(),
+        'email': str(data.get('email') or '').strip(),
+        'phone': str(data.get('phone') or '').strip(),
+        'message': str(data.get('message') or '')[:2000],
+        'anonymous': bool(data.get('anonymous')),
+        'project_id': project_id,
+    }
+    if (amount < 5 or not cleaned['name'] or not cleaned['email']
+            or (cleaned['method'] == 'fapshi' and not cleaned['phone'])):
+        return None, JsonResponse({'error': _("Veuillez compléter tous les champs obligatoires.")}, status=400)
+    if cleaned['method'] not in get_payment_gateway().providers:
+        return None, JsonResponse({'error': _("Mode de paiement inconnu.")}, status=400)
+    return cleaned, None
+
+
+def _create_pending_donation(request, cleaned):
+    """Create the pending donation and the provider checkout payload"""
+    project = None
+    if cleaned['project_id']:
+        project = Project.objects.filter(pk=cleaned['project_id'], status='active').first()
+    
+    amount, currency = checkout_amount(cleaned['amount'], 'EUR', cleaned['method'])
+    donation = Donation.objects.create(
+        donor_name=cleaned['name'],
+        donor_email=cleaned['email'],
+        donor_phone=cleaned['phone'],
+        is_anonymous=cleaned['anonymous'],
+        amount=amount,
+        currency=currency,
+        project=project,
+        payment_method=cleaned['method'],
+        message=cleaned['message'],
+        ip_address=request.META.get('REMOTE_ADDR'),
+        user_agent=request.META.get('HTTP_USER_AGENT', ''),
+    )
+    checkout = {
+        'amount': amount,
+        'currency': currency,
+        'email': donation.donor_email,
+        'name': donation.donor_name,
+        'phone': donation.donor_phone,
+        'message': donation.message,
+        'project_id': donation.project_id,
+        'donation_reference': str(donation.reference),
     }
-    return render(request, 'donations/donate_project.html', context)
+    return donation, checkout
+
+
+def _checkout_succeeded(donation, result):
+    reference_field = 'fapshi_transaction_id' if result['provider'] == 'fapshi' else 'stripe_session_id'
+    Donation.objects.filter(pk=donation.pk).update(**{reference_field: result['reference']})
+    return JsonResponse({'redirect_url': result['redirect_url']})
+
+
+def _checkout_failed(donation, error):
+    logger.warning("Checkout with %s failed: %s", donation.payment_method, error)
+    Donation.objects.filter(pk=donation.pk).update(status=Donation.Status.FAILED)
+    gateway = get_payment_gateway()
+    alternatives = [
+        provider for provider in gateway.available_providers()
+        if provider != donation.payment_method and gateway.health[provider].is_healthy()
+    ]
+    return JsonResponse({
+        'error': _("Ce mode de paiement est momentanément indisponible."),
+        'alternatives': alternatives,
+    }, status=503)
+
+
+@require_POST
+@ratelimit('checkout')
+def create_checkout(request):
+    """
+    Create a pending donation and a hosted checkout with the chosen provider.
+    Returns JSON: {'redirect_url'} or {'error', 'alternatives'}.
+    """
+    cleaned, error = _parse_checkout(request)
+    if error:
+        return error
+    
+    donation, checkout = _create_pending_donation(request, cleaned)
+    try:
+        result = get_payment_gateway().create_checkout(cleaned['method'], checkout)
+    except PaymentProviderError as e:
+        return _checkout_failed(donation, e)
+    return _checkout_succeeded(donation, result)
+
+
+@require_POST
+@ratelimit('checkout')
+async def create_checkout_async(request):
+    """
+    Async variant of create_checkout for ASGI deployments: the provider round
+    trip runs on the event loop, only the ORM writes go through sync_to_async.
+    """
+    cleaned, error = _parse_checkout(request)
+    if error:
+        return error
+    
+    donation, checkout = await sync_to_async(_create_pending_donation)(request, cleaned)
+    try:
+        result = await get_payment_gateway().acreate_checkout(cleaned['method'], checkout)
+    except PaymentProviderError as e:
+        return await sync_to_async(_checkout_failed)(donation, e)
+    return await sync_to_async(_checkout_succeeded)(donation, result)
 
 
 def donation_success(request):
@@ -57,6 +206,7 @@ def donation_cancelled(request):
     return render(request, 'donations/cancelled.html')
 
 
+@ratelimit('material_contribution')
 def material_contribution(request):
     """Material contribution form"""
     if request.method == 'POST':
@@ -98,8 +248,34 @@ def material_contribution(request):
     return render(request, 'donations/material_contribution.html', context)
 
 
+def _stripe_signature_valid(request) -> bool:
+    """Verified Stripe deliveries are never rate limited"""
+    import stripe
+    
+    try:
+        stripe.WebhookSignature.verify_header(
+            request.body.decode('utf-8'),
+            request.META.get('HTTP_STRIPE_SIGNATURE', ''),
+            settings.STRIPE_WEBHOOK_SECRET,
+            stripe.Webhook.DEFAULT_TOLERANCE,
+        )
+    except (stripe.error.SignatureVerificationError, UnicodeDecodeError):
+        return False
+    return True
+
+
+def _fapshi_signature_valid(request) -> bool:
+    """Verified Fapshi deliveries are never rate limited"""
+    # Without a webhook secret deliveries are unsigned (see fapshi_webhook)
+    if not settings.FAPSHI_WEBHOOK_SECRET:
+        return False
+    signature = request.META.get('HTTP_X_FAPSHI_SIGNATURE', '')
+    return bool(signature) and FapshiPaymentService().verify_webhook_signature(request.body, signature)
+
+
 @csrf_exempt
 @require_POST
+@ratelimit('webhook', allow=_stripe_signature_valid)
 def stripe_webhook(request):
     """Handle Stripe webhooks"""
     import stripe
@@ -108,42 +284,91 @@ def stripe_webhook(request):
     sig_header = request.META.get('HTTP_STRIPE_SIGNATURE')
     
     try:
-        event = stripe.Webhook.construct_event(
+        stripe.Webhook.construct_event(
             payload, sig_header, settings.STRIPE_WEBHOOK_SECRET
         )
     except ValueError:
         return HttpResponse(status=400)
     except stripe.error.SignatureVerificationError:
         return HttpResponse(status=400)
+    # Signature verified: work on plain dicts (StripeObject has no .get() in recent SDKs)
+    event = json.loads(payload)
+    if event.get('created'):
+        metrics.WEBHOOK_LAG.observe(max(time.time() - event['created'], 0), provider='stripe')
+    
+    # Retried or duplicate delivery: acknowledge before any query
+    dedup_keys = stripe_event_keys(event)
+    if stripe_events.seen(*dedup_keys):
+        return HttpResponse(status=200)
     
     # Handle the event
+    handled = True
     if event['type'] == 'checkout.session.completed':
         session = event['data']['object']
         
         # Find and update the donation
-        try:
-            donation = Donation.objects.get(stripe_session_id=session['id'])
-            donation.stripe_payment_intent_id = session.get('payment_intent', '')
+        donation = _find_donation(session, stripe_session_id=session['id'])
+        if donation:
+            donation.stripe_session_id = session['id']
+            donation.stripe_payment_intent_id = session.get('payment_intent') or ''
             donation.mark_completed()
-        except Donation.DoesNotExist:
-            pass
+        handled = donation is not None
     
     elif event['type'] == 'payment_intent.payment_failed':
         intent = event['data']['object']
-        try:
-            donation = Donation.objects.get(stripe_payment_intent_id=intent['id'])
+        donation = _find_donation(intent, stripe_payment_intent_id=intent['id'])
+        if donation:
             donation.status = 'failed'
             donation.save()
-        except Donation.DoesNotExist:
-            pass
+        handled = donation is not None
     
+    # Unknown donations stay retryable: Stripe redelivers until it gets a 2xx
+    if not handled:
+        return HttpResponse(status=404)
+    stripe_events.mark(*dedup_keys)
     return HttpResponse(status=200)
 
 
+def _find_donation(stripe_object, **lookup):
+    """
+    Donation for a Stripe object, by provider ID or by the donation reference
+    in its metadata (the webhook can arrive before the checkout view has
+    stored the session ID).
+    """
+    donation = Donation.objects.filter(**lookup).first()
+    reference = (stripe_object.get('metadata') or {}).get('donation_reference')
+    if donation is None and reference:
+        try:
+            donation = Donation.objects.filter(reference=reference).first()
+        except ValidationError:
+            pass
+    return donation
+
+
 @csrf_exempt
 @require_POST
+@ratelimit('webhook', allow=_fapshi_signature_valid)
 def fapshi_webhook(request):
     """Handle Fapshi webhooks"""
-    # TODO: Implement Fapshi webhook handling
-    # Will be implemented when Fapshi integration is added
+    service = FapshiPaymentService()
+    signed = bool(settings.FAPSHI_WEBHOOK_SECRET)
+    if signed and not service.verify_webhook_signature(
+        request.body, request.META.get('HTTP_X_FAPSHI_SIGNATURE', '')
+    ):
+        return HttpResponse(status=400)
+    
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return HttpResponse(status=400)
+    
+    if not signed:
+        # Unsigned notification: only trust the status reported by the API
+        with profiling.timed('fapshi'):
+            result = service.check_payment_status(payload.get('transId', ''))
+        if not result['success']:
+            return HttpResponse(status=400)
+        payload['status'] = result['status']
+    
+    process_fapshi_webhook(payload)
     return HttpResponse(status=200)
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0002_project_featured_image_url_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['status', '-is_featured', '-is_urgent', '-created_at'], name='project_listing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('is_featured', True), ('status', 'active')), fields=['-is_urgent', '-created_at'], name='project_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectneed',
+            index=models.Index(condition=models.Q(('is_fulfilled', False)), fields=['need_type', 'priority', '-created_at'], name='need_open_by_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectneed',
+            index=models.Index(condition=models.Q(('is_fulfilled', False)), fields=['project', 'priority'], name='need_open_by_project_idx'),
+        ),
+    ]
@@ -99,6 +99,14 @@ class Project(models.Model):
         verbose_name = _("Projet")
         verbose_name_plural = _("Projets")
         ordering = ['-is_featured', '-is_urgent', '-created_at']
+        indexes = [
+            # Listings: filter on status, order like Meta.ordering
+            models.Index(fields=['status', '-is_featured', '-is_urgent', '-created_at'],
+                         name='project_listing_idx'),
+            # Home page: active featured projects
+            models.Index(fields=['-is_urgent', '-created_at'], name='project_featured_idx',
+                         condition=models.Q(status='active', is_featured=True)),
+        ]
     
     def __str__(self):
         return self.title
@@ -132,8 +140,14 @@ class Project(models.Model):
     
     @property
     def total_donors(self):
-        """Count unique donors for this project"""
-        return self.donations.filter(status='completed').values('donor_email').distinct().count()
+        """
+        Estimate unique donors for this project from the daily donation aggregates.
+        For lists of projects, fill it in bulk with prefetch_total_donors().
+        """
+        if not hasattr(self, '_total_donors'):
+            from apps.donations.services.aggregates import estimate_donors
+            self._total_donors = estimate_donors(project=self)
+        return self._total_donors
 
 
 class ProjectNeed(models.Model):
@@ -182,6 +196,14 @@ class ProjectNeed(models.Model):
         verbose_name = _("Besoin du projet")
         verbose_name_plural = _("Besoins des projets")
         ordering = ['priority', '-created_at']
+        indexes = [
+            # Donate page: open needs of a type, in Meta.ordering
+            models.Index(fields=['need_type', 'priority', '-created_at'], name='need_open_by_type_idx',
+                         condition=models.Q(is_fulfilled=False)),
+            # Project page: a project's open needs by priority
+            models.Index(fields=['project', 'priority'], name='need_open_by_project_idx',
+                         condition=models.Q(is_fulfilled=False)),
+        ]
     
     def __str__(self):
         return f"{self.project.title} - {self.title}"
@@ -0,0 +1,129 @@
+"""
+Funding Progress
+Cached per-project funding snapshots and the Server-Sent Events stream
+that pushes them to project pages.
+
+A snapshot holds what the progress card shows (amount raised, goal,
+percentage, donor count). It is rebuilt when a donation to the project is
+completed or refunded (see apps/donations/signals.py) and read from the
+cache by the JSON endpoint and the stream, so watchers never query the
+database. Workers only see each other's updates through a shared cache.
+
+Under ASGI the stream polls the cache every PROGRESS_STREAM_INTERVAL seconds
+and sends an event when the snapshot version changes; it is an async
+generator, so an idle watcher costs no thread. Project pages only open it
+when served over ASGI. Under WSGI an open stream would hold a sync worker,
+so pages poll the JSON endpoint instead and the stream URL answers with a
+single event (progress_event_once()).
+"""
+
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+VISIBLE_STATUSES = ['active', 'funded', 'completed']
+
+
+def _key(slug: str) -> str:
+    return f'project_progress:{slug}'
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+def build_progress(slug: str):
+    """Snapshot from the database, or None for unknown/hidden projects"""
+    from .models import Project
+
+    project = (
+        Project.objects.filter(slug=slug, status__in=VISIBLE_STATUSES)
+        .only('pk', 'slug', 'goal_amount', 'current_amount', 'currency')
+        .first()
+    )
+    if project is None:
+        return None
+    return {
+        'project': project.slug,
+        'current_amount': project.current_amount,
+        'goal_amount': project.goal_amount,
+        'currency': project.currency,
+        'progress_percentage': round(float(project.progress_percentage), 1),
+        'donor_count': project.total_donors,
+        'version': time.time_ns() // 1_000_000,
+    }
+
+
+def publish_progress(slug: str):
+    """Rebuild and store a project's snapshot; streams pick it up on their next poll"""
+    snapshot = build_progress(slug)
+    if snapshot is None:
+        cache.delete(_key(slug))
+    else:
+        cache.set(_key(slug), snapshot, _setting('PROGRESS_SNAPSHOT_TIMEOUT', 3600))
+    return snapshot
+
+
+def publish_project_progress(project_id: int):
+    """publish_progress() by primary key (used by the donation signals)"""
+    from .models import Project
+
+    slug = Project.objects.filter(pk=project_id).values_list('slug', flat=True).first()
+    if slug:
+        publish_progress(slug)
+
+
+def forget_progress(slugs):
+    """Drop snapshots (rebuilt on next read), e.g. after a goal change"""
+    cache.delete_many([_key(slug) for slug in slugs])
+
+
+def get_progress(slug: str):
+    """Cached snapshot, built on a miss"""
+    snapshot = cache.get(_key(slug))
+    if snapshot is None:
+        snapshot = publish_progress(slug)
+    return snapshot
+
+
+def _event(snapshot: dict) -> str:
+    data = json.dumps(snapshot, cls=DjangoJSONEncoder)
+    return f"id: {snapshot['version']}\nevent: progress\ndata: {data}\n\n"
+
+
+def progress_event_once(snapshot: dict) -> str:
+    """
+    WSGI: the current snapshot as a single event. A sync worker must not be
+    held by a long-lived stream, so the browser reconnects (polls) after
+    PROGRESS_POLL_INTERVAL seconds instead.
+    """
+    return f"retry: {_setting('PROGRESS_POLL_INTERVAL', 15) * 1000}\n" + _event(snapshot)
+
+
+async def aiter_progress_events(slug: str, snapshot: dict):
+    """Non-blocking event stream (ASGI)"""
+    interval = _setting('PROGRESS_STREAM_INTERVAL', 1)
+    heartbeat = _setting('PROGRESS_STREAM_HEARTBEAT', 15)
+    started = last_sent = time.monotonic()
+
+    yield f"retry: {_setting('PROGRESS_STREAM_RETRY', 3000)}\n" + _event(snapshot)
+    version = snapshot['version']
+    while time.monotonic() - started < _setting('PROGRESS_STREAM_MAX_AGE', 300):
+        await asyncio.sleep(interval)
+        current = await cache.aget(_key(slug))
+        if current is None:
+            current = await sync_to_async(publish_progress)(slug)
+            if current is None:
+                return
+        if current['version'] != version:
+            version = current['version']
+            last_sent = time.monotonic()
+            yield _event(current)
+        elif time.monotonic() - last_sent >= heartbeat:
+            last_sent = time.monotonic()
+            yield ': keepalive\n\n'
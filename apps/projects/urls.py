@@ -8,4 +8,7 @@ app_name = 'projects'
 urlpatterns = [
     path('', views.project_list, name='list'),
     path('<slug:slug>/', views.project_detail, name='detail'),
+    path('<slug:slug>/progression/', views.project_progress, name='progress'),
+    path('<slug:slug>/progression/flux/', views.project_progress_stream, name='progress_stream'),
+    path('<slug:slug>/financement/', views.project_funding_chart, name='funding_chart'),
 ]
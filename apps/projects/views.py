@@ -3,9 +3,15 @@ Projects App Views
 Project listing and detail pages.
 """
 
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404
 from django.core.paginator import Paginator
-from .models import Project, ProjectCategory
+from django.views.decorators.http import require_GET
+from apps.donations.services.aggregates import prefetch_total_donors
+from apps.donations.services.timeseries import RESOLUTIONS, chart_points
+from .models import Project, ProjectCategory, ProjectNeed
+from .progress import aiter_progress_events, get_progress, progress_event_once
 
 
 def project_list(request):
@@ -28,6 +34,7 @@ def project_list(request):
     paginator = Paginator(projects, 9)
     page = request.GET.get('page')
     projects = paginator.get_page(page)
+    projects.object_list = prefetch_total_donors(projects.object_list)
     
     context = {
         'projects': projects,
@@ -51,13 +58,13 @@ def project_detail(request, slug):
     related_projects = Project.objects.filter(
         category=project.category,
         status='active'
-    ).exclude(pk=project.pk)[:3]
+    ).exclude(pk=project.pk).select_related('category')[:3]
     
     # If no same-category projects, show other active projects
     if not related_projects.exists():
         related_projects = Project.objects.filter(
             status='active'
-        ).exclude(pk=project.pk)[:3]
+        ).exclude(pk=project.pk).select_related('category')[:3]
     
     context = {
         'project': project,
@@ -66,5 +73,64 @@ def project_detail(request, slug):
         'articles': project.articles.filter(status='published')[:3],
         'testimonials': project.testimonials.filter(is_active=True)[:3],
         'related_projects': related_projects,
+        # Live stream only under ASGI; sync workers would be held by it
+        'progress_stream': isinstance(request, ASGIRequest),
     }
     return render(request, 'projects/detail.html', context)
+
+
+@require_GET
+def project_progress(request, slug):
+    """Funding progress snapshot as JSON (served from the cache)"""
+    snapshot = get_progress(slug)
+    if snapshot is None:
+        raise Http404
+    response = JsonResponse(snapshot)
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+@require_GET
+def project_progress_stream(request, slug):
+    """Server-Sent Events stream of funding progress updates"""
+    snapshot = get_progress(slug)
+    if snapshot is None:
+        raise Http404
+    if isinstance(request, ASGIRequest):
+        events = aiter_progress_events(slug, snapshot)
+    else:
+        events = [progress_event_once(snapshot)]
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # don't let nginx buffer the stream
+    return response
+
+
+@require_GET
+def project_funding_chart(request, slug):
+    """
+    Funding over time from the precomputed rollups.
+    ?resolution=hour|day|week (default: day), ?need=<need id> for one need.
+    """
+    project = get_object_or_404(
+        Project.objects.only('pk', 'goal_amount', 'currency'),
+        slug=slug,
+        status__in=['active', 'funded', 'completed']
+    )
+    resolution = request.GET.get('resolution', 'day')
+    if resolution not in RESOLUTIONS:
+        resolution = 'day'
+    need_id = request.GET.get('need')
+    need_id = int(need_id) if need_id and need_id.isdigit() else None
+    # Another project's need is not this project's business
+    if need_id and not ProjectNeed.objects.filter(pk=need_id, project=project).exists():
+        raise Http404
+    
+    response = JsonResponse({
+        'resolution': resolution,
+        'currency': project.currency,
+        'goal_amount': float(project.goal_amount),
+        'points': chart_points(project.pk, need_id, resolution),
+    })
+    response['Cache-Control'] = 'public, max-age=60'
+    return response
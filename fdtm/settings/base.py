@@ -38,6 +38,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "apps.core.middleware.ReplicaPinMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",  # For i18n
     "django.middleware.common.CommonMiddleware",
@@ -46,8 +47,51 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "apps.core.middleware.SecurityHeadersMiddleware",
+    "apps.core.middleware.ProfilingMiddleware",
+    "apps.core.middleware.NPlusOneMiddleware",
 ]
 
+# Rate limits for public POST endpoints (apps/core/ratelimit.py), per client IP.
+# Buckets live in the shared tier of the default cache (see CACHES).
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+RATE_LIMITS = {
+    'contact': '5/m',
+    'newsletter': '5/m',
+    'material_contribution': '5/m',
+    'checkout': '10/m',
+    'webhook': '30/m',  # unsigned/invalid deliveries only
+}
+RATE_LIMIT_PROXY_COUNT = int(os.environ.get('RATE_LIMIT_PROXY_COUNT', 0))  # proxies setting X-Forwarded-For
+RATE_LIMIT_TRUSTED_IPS = [ip for ip in os.environ.get('RATE_LIMIT_TRUSTED_IPS', '').split(',') if ip]
+
+# Request profiling (apps/core/profiling.py): Server-Timing header for staff,
+# JSON log lines on the 'fdtm.profiling' logger for a sample of requests
+PROFILING_SERVER_TIMING = os.environ.get('PROFILING_SERVER_TIMING', 'True').lower() == 'true'
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))  # 0-1, share of requests logged
+
+# Prometheus metrics at /metrics (apps/core/metrics.py). With several gunicorn
+# workers, METRICS_MULTIPROC_DIR is a directory shared by the workers
+# (gunicorn.conf.py sets one by default).
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'
+METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR', '')
+METRICS_FLUSH_INTERVAL = 1  # seconds between writes of a worker's metrics file
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')  # bearer token required by /metrics if set
+METRICS_ALLOWED_IPS = os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')  # when no token
+METRICS_DEEPL_USAGE_INTERVAL = 300  # seconds between DeepL usage API calls
+
+# N+1 query detection (apps/core/nplusone.py): flags the same query shape
+# issued from the same line NPLUSONE_THRESHOLD times in one request.
+# Strict mode raises instead of logging a warning.
+NPLUSONE_ENABLED = os.environ.get('NPLUSONE_ENABLED', 'False').lower() == 'true'
+NPLUSONE_STRICT = os.environ.get('NPLUSONE_STRICT', 'False').lower() == 'true'
+NPLUSONE_THRESHOLD = 3
+
+# External service clients (apps/core/services.py) are built on first use.
+# SERVICES_WARMUP: the ones services.warmup() builds ahead of the first request.
+# SERVICE_FACTORIES = {'deepl': 'path.to.fake_translator'} swaps in other clients.
+SERVICES_WARMUP = [name for name in os.environ.get('SERVICES_WARMUP', 'stripe,fapshi,deepl').split(',') if name]
+SERVICE_FACTORIES = {}
+
 # Site URL for payment callbacks
 SITE_URL = os.environ.get('SITE_URL', 'http://127.0.0.1:8000')
 
@@ -121,6 +165,63 @@ MEDIA_ROOT = BASE_DIR / "media"
 # Default primary key field type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# =============================================================================
+# DATABASE READ REPLICAS
+# =============================================================================
+# Comma-separated database URLs (apps/core/db_router.py). Reads go to a
+# replica unless the request or transaction has written to the primary.
+# Each settings module adds REPLICA_DATABASES to its DATABASES.
+import dj_database_url
+
+DATABASE_REPLICA_URLS = [url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+REPLICA_DATABASES = {
+    f'replica{i}': {**dj_database_url.parse(url, conn_max_age=600), 'TEST': {'MIRROR': 'default'}}
+    for i, url in enumerate(DATABASE_REPLICA_URLS, 1)
+}
+DATABASE_ROUTERS = ['apps.core.db_router.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 10))  # primary reads after a write
+
+# =============================================================================
+# CACHE - process-local LRU in front of a cache shared by all workers
+# =============================================================================
+# CACHE_BACKEND: 'file' (default), 'db' (run `manage.py createcachetable`),
+# 'redis' or 'memcached' (CACHE_LOCATION is the server URL/address), or
+# 'locmem' (one process only)
+CACHE_BACKENDS = {
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'db': 'django.core.cache.backends.db.DatabaseCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+}
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'file')
+CACHE_DEFAULT_LOCATIONS = {'file': '/var/tmp/fdtm_cache', 'db': 'fdtm_cache'}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'apps.core.cache.TwoTierCache',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_MAX_ENTRIES': int(os.environ.get('CACHE_LOCAL_MAX_ENTRIES', 2000)),
+            # Key prefix -> seconds a copy may be served from process memory.
+            # Only immutable keys: content-addressed or versioned (apps/core/cache.py)
+            'LOCAL_PREFIXES': {
+                'version:': 2,  # namespace versions: how long a bump takes to reach every worker
+                'site_settings:': 300,
+                'donate_page:': 300,
+                'translation:': 3600,
+                'template.cache.': 300,  # {% cache %} fragments (vary on a version to invalidate)
+            },
+        },
+    },
+    'shared': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.environ.get('CACHE_LOCATION', CACHE_DEFAULT_LOCATIONS.get(CACHE_BACKEND, '')),
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 10000} if CACHE_BACKEND in ('file', 'db', 'locmem') else {},
+    },
+}
+
 # =============================================================================
 # PAYMENT SETTINGS
 # =============================================================================
@@ -134,6 +235,80 @@ FAPSHI_API_KEY = os.environ.get('FAPSHI_API_KEY', '')
 FAPSHI_API_SECRET = os.environ.get('FAPSHI_API_SECRET', '')
 FAPSHI_WEBHOOK_SECRET = os.environ.get('FAPSHI_WEBHOOK_SECRET', '')
 
+# Provider API endpoints; point both at `manage.py run_payment_simulator`
+# (e.g. http://127.0.0.1:12111) for load and failure tests
+STRIPE_API_BASE = os.environ.get('STRIPE_API_BASE', '')  # '' = https://api.stripe.com
+FAPSHI_API_BASE = os.environ.get('FAPSHI_API_BASE', '')  # '' = https://live.fapshi.com
+
+# Payment gateway (apps/donations/services/gateway.py)
+# PAYMENT_PROVIDERS = {'stripe': {'class': '...FakeProvider', 'latency': 0.2}} swaps in fakes
+PAYMENT_PROVIDERS = None  # None = real Stripe and Fapshi providers
+PAYMENT_DEADLINE = float(os.environ.get('PAYMENT_DEADLINE', 8))  # seconds per provider call
+PAYMENT_HEALTH_WINDOW = 60  # seconds of calls used for error rate / p95
+PAYMENT_CIRCUIT_ERROR_RATE = 0.5  # open the circuit above this error rate...
+PAYMENT_CIRCUIT_MIN_CALLS = 10  # ...once the window holds this many calls
+PAYMENT_CIRCUIT_COOLDOWN = 30  # seconds before a trial call is let through
+PAYMENT_GATEWAY_THREADS = 32
+# Post the donate form to the async checkout view (when served by fdtm.asgi)
+PAYMENT_ASYNC_CHECKOUT = os.environ.get('PAYMENT_ASYNC_CHECKOUT', 'False').lower() == 'true'
+# Stubbed providers for load tests: PAYMENT_FAKE_LATENCY=0.3 (seconds)
+if os.environ.get('PAYMENT_FAKE_LATENCY'):
+    PAYMENT_PROVIDERS = {
+        name: {
+            'class': 'apps.donations.services.gateway.FakeProvider',
+            'latency': os.environ['PAYMENT_FAKE_LATENCY'],
+            'error_rate': os.environ.get('PAYMENT_FAKE_ERROR_RATE', 0),
+            'idempotent': name == 'stripe',
+        }
+        for name in ('stripe', 'fapshi')
+    }
+
+# =============================================================================
+# CURRENCY CONVERSION
+# =============================================================================
+# Donations are converted into the project currency at completion time.
+# Rates live in the ExchangeRate table (load with `manage.py load_exchange_rates`).
+FX_BASE_CURRENCY = 'EUR'
+FX_RATES_FILE = os.environ.get('FX_RATES_FILE', str(BASE_DIR / 'fx_rates.json'))
+FX_CACHE_TIMEOUT = int(os.environ.get('FX_CACHE_TIMEOUT', 300))  # seconds
+# Fallback rates (units per 1 EUR) used when the table has no entry, one per
+# Donation currency so that no donation is left unconverted (and uncredited).
+# XAF is pegged to the euro; the others are indicative: load real rates.
+FX_DEFAULT_RATES = {
+    'XAF': '655.957',
+    'USD': '1.08',
+    'GBP': '0.85',
+}
+
+# Cached donate page context bundles, rebuilt whenever projects, needs,
+# impacts or FAQs change
+DONATE_PAGE_CACHE_TIMEOUT = int(os.environ.get('DONATE_PAGE_CACHE_TIMEOUT', 600))  # seconds
+
+# Processed Stripe events/sessions, so webhook retries skip the database
+# (apps/donations/services/webhook_dedup.py). Stripe retries for up to 3 days.
+WEBHOOK_SEEN_LRU_SIZE = 10000  # per process
+WEBHOOK_SEEN_TTL = 3 * 24 * 3600  # seconds, in the shared cache
+
+# Live funding progress on project pages (apps/projects/progress.py).
+# Snapshots are refreshed on every completed donation; streams poll the cache.
+PROGRESS_SNAPSHOT_TIMEOUT = 3600  # seconds
+PROGRESS_STREAM_INTERVAL = 1  # seconds between cache polls per stream
+PROGRESS_STREAM_HEARTBEAT = 15  # seconds between keepalive comments
+PROGRESS_STREAM_MAX_AGE = int(os.environ.get('PROGRESS_STREAM_MAX_AGE', 300))  # then the browser reconnects
+PROGRESS_STREAM_RETRY = 3000  # reconnection delay sent to browsers (ms)
+PROGRESS_POLL_INTERVAL = 15  # seconds between polls when not served over ASGI
+
+# Funding-over-time charts (apps/donations/services/timeseries.py)
+FUNDING_CHART_POINTS = {'hour': 168, 'day': 90, 'week': 104}  # buckets returned per chart
+FUNDING_HOURLY_RETENTION_DAYS = 90
+
+# =============================================================================
+# TAX RECEIPTS
+# =============================================================================
+# 'pdf' requires weasyprint; falls back to HTML receipts otherwise
+RECEIPT_FORMAT = os.environ.get('RECEIPT_FORMAT', 'html')
+RECEIPT_WORKERS = int(os.environ.get('RECEIPT_WORKERS', 0)) or None  # None = one per CPU
+
 # =============================================================================
 # BACKBLAZE B2 STORAGE SETTINGS
 # =============================================================================
@@ -153,7 +328,19 @@ DEEPL_API_KEY = os.environ.get('DEEPL_API_KEY', '')
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
 EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 587))
-EMAIL_USE_TLS = True
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True') == 'True'
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_TIMEOUT = int(os.environ.get('EMAIL_TIMEOUT', 30))
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@fdtm.org')
+
+# Outbox delivery (`manage.py send_queued_email`)
+EMAIL_OUTBOX_BATCH_SIZE = int(os.environ.get('EMAIL_OUTBOX_BATCH_SIZE', 100))  # messages per SMTP connection
+EMAIL_RATE_PER_SECOND = float(os.environ.get('EMAIL_RATE_PER_SECOND', 5))  # provider rate limit
+EMAIL_MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS', 5))
+EMAIL_RETRY_BASE_DELAY = int(os.environ.get('EMAIL_RETRY_BASE_DELAY', 60))  # seconds, doubled per attempt
+
+# Newsletter campaigns (`manage.py send_newsletter_campaign`)
+NEWSLETTER_BATCH_SIZE = int(os.environ.get('NEWSLETTER_BATCH_SIZE', 500))  # subscribers per keyset batch
+# Unsubscribe links in campaign emails stop working after this long (seconds)
+NEWSLETTER_UNSUBSCRIBE_MAX_AGE = int(os.environ.get('NEWSLETTER_UNSUBSCRIBE_MAX_AGE', 60 * 60 * 24 * 180))
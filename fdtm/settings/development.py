@@ -14,8 +14,21 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Concurrent local servers (benchmark_checkout, several workers):
+        # take the write lock up front and wait for it instead of failing
+        "OPTIONS": {
+            "transaction_mode": "IMMEDIATE",
+            "timeout": 20,
+            "init_command": "PRAGMA journal_mode=WAL;",
+        },
     }
 }
+# e.g. DATABASE_REPLICA_URLS=sqlite:////tmp/replica.sqlite3, refreshed with
+# `manage.py sync_replica`
+DATABASES.update(REPLICA_DATABASES)
+
+# Log N+1 queries on every request (NPLUSONE_STRICT=True to raise instead)
+NPLUSONE_ENABLED = os.environ.get('NPLUSONE_ENABLED', 'True').lower() == 'true'
 
 # Use local file storage in development
 DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
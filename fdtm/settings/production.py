@@ -17,6 +17,11 @@ DATABASES = {
         conn_max_age=600,
     )
 }
+DATABASES.update(REPLICA_DATABASES)
+
+# /metrics: behind a proxy on the same host every client is 127.0.0.1, so no
+# address is trusted by default; set METRICS_TOKEN (or list the scraper)
+METRICS_ALLOWED_IPS = [ip for ip in os.environ.get('METRICS_ALLOWED_IPS', '').split(',') if ip]
 
 # Security settings
 SECURE_BROWSER_XSS_FILTER = True
@@ -54,9 +59,22 @@ LOGGING = {
             'filename': BASE_DIR / 'logs' / 'django.log',
             'formatter': 'verbose',
         },
+        'profiling': {
+            'level': 'INFO',
+            'class': 'logging.FileHandler',
+            'filename': BASE_DIR / 'logs' / 'profiling.log',
+        },
     },
     'root': {
         'handlers': ['file'],
         'level': 'ERROR',
     },
+    'loggers': {
+        # One JSON line per sampled request (PROFILING_SAMPLE_RATE)
+        'fdtm.profiling': {
+            'handlers': ['profiling'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
 }
@@ -9,10 +9,14 @@ from django.conf.urls.static import static
 from django.conf.urls.i18n import i18n_patterns
 from django.views.i18n import set_language
 
+from apps.core import views as core_views
+
 urlpatterns = [
     # Language switcher URL
     path('i18n/', include('django.conf.urls.i18n')),
     path('set-language/', set_language, name='set_language'),
+    # Prometheus scrape endpoint (not translated)
+    path('metrics', core_views.metrics_endpoint, name='metrics'),
 ]
 
 # i18n URLs (with language prefix)